@@ -0,0 +1,519 @@
+#!/usr/bin/env python3
+"""
+TDD Context Management Script - Benchmark
+
+Benchmarks the entry points of the context scripts against generated
+fixtures: synthetic repositories of any size (with deep node_modules trees
+for the scan to prune) and long UMCA CURRENT_STATE.md / EVIDENCE_LOG.md
+files. Every measured run happens in a fresh child process, after an
+unmeasured setup step, so each result covers exactly one call.
+
+For each case it records wall time (median of --repeat runs), peak RSS and
+syscall counts. Syscalls are counted with `strace -f -c` when --strace is
+given and strace is installed; otherwise the read and write syscall counts
+come from /proc/self/io of the measuring process (Linux only). The kernel
+adds a child's counts to its parent's when the child is reaped, so these
+include git, scan workers and other helpers the case waited for, but not
+processes still running when it returns, such as a Jest daemon.
+
+Usage:
+    python benchmark.py [--files 1000,10000] [--entries 10000] [--cases a,b]
+                        [--repeat 3] [--strace] [--workdir DIR]
+                        [--save baseline.json] [--compare baseline.json]
+    python benchmark.py --generate-repo DIR --files N [--node-modules N]
+
+Fixtures are generated once per size under --workdir and reused. With
+--compare, exits with status 1 if any case regressed beyond the tolerances.
+"""
+
+import io
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import resource
+import argparse
+import platform
+import functools
+import tempfile
+import contextlib
+import subprocess
+import statistics
+import importlib.util
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Callable, Tuple
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+UMCA_SCRIPT = SCRIPTS_DIR.parents[1] / 'docs' / 'UMCA' / 'scripts' / 'update_context.py'
+BASELINE_VERSION = 1
+
+# Files per generated source directory, and how deep node_modules nests
+FILES_PER_DIR = 100
+NODE_MODULES_DEPTH = 8
+
+
+# --- Fixture generators ---
+
+def _write(path: Path, content: str, made_dirs: Optional[set] = None):
+    if made_dirs is None or path.parent not in made_dirs:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if made_dirs is not None:
+            made_dirs.add(path.parent)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+
+
+@functools.lru_cache(maxsize=None)
+def _padding(lines: int) -> str:
+    return ''.join(f'  const line{n} = value + {n}; // padding\n' for n in range(lines))
+
+
+def _source_file(index: int) -> Tuple[str, str]:
+    """Get a deterministic (suffix, content) for the index-th source file."""
+    suffix = ('.ts', '.tsx', '.test.ts', '.js', '.jsx')[index % 5]
+    lines = 10 + (index * 37) % 290
+    return suffix, (f'// generated source file {index}\nexport const value = {index};\n'
+                    + _padding(lines - 2))
+
+
+def generate_repo(root: Path, files: int, node_modules_files: Optional[int] = None,
+                  depth: int = NODE_MODULES_DEPTH) -> Path:
+    """Create (or reuse) a synthetic repository with `files` source files.
+
+    Sources are spread FILES_PER_DIR to a directory under src/. node_modules
+    gets `node_modules_files` files (default: half of `files`) in packages
+    nested `depth` levels deep, which a correct scan never enters.
+    """
+    if node_modules_files is None:
+        node_modules_files = files // 2
+    params = {'files': files, 'node_modules_files': node_modules_files, 'depth': depth}
+    marker = root / '.bench_fixture.json'
+    if marker.exists() and json.loads(marker.read_text()) == params:
+        return root
+    if root.exists():
+        shutil.rmtree(root)
+
+    _write(root / 'package.json', json.dumps({
+        'name': 'bench-fixture', 'private': True, 'scripts': {'test': 'jest'}}, indent=2))
+    _write(root / '.gitignore', 'node_modules/\ncoverage/\n')
+    made_dirs: set = set()
+    for index in range(files):
+        suffix, content = _source_file(index)
+        group, member = divmod(index, FILES_PER_DIR)
+        _write(root / 'src' / f'module{group // FILES_PER_DIR}' / f'group{group % FILES_PER_DIR}'
+               / f'file{member}{suffix}', content, made_dirs)
+
+    written = 0
+    package = 0
+    while written < node_modules_files:
+        package_dir = root / 'node_modules'
+        for level in range(depth):
+            package_dir = package_dir / f'pkg{package}-{level}'
+            if level < depth - 1:
+                package_dir = package_dir / 'node_modules'
+        for name in ('index.js', 'lib.js', 'types.d.ts', 'package.json'):
+            if written >= node_modules_files:
+                break
+            _write(package_dir / name, f'module.exports = {package};\n', made_dirs)
+            written += 1
+        package += 1
+
+    _write(marker, json.dumps(params))
+    return root
+
+
+def generate_current_state(path: Path, entries: int):
+    """Write a CURRENT_STATE.md with `entries` Recent Activity entries."""
+    lines = ['# Current State - Benchmark Fixture', '', '**Last Updated**: 2025-01-01',
+             '**Update Frequency**: Automatically updated by UMCA after each task completion', '',
+             '## Project Status', '', '**Current Phase**: Benchmark', '', '## Recent Activity', '']
+    for index in range(entries):
+        day = f'2025-{1 + index % 12:02d}-{1 + index % 28:02d}'
+        lines += [f'### {day} - Context Update',
+                  f'- 🔄 **{day} 12:00:00 UTC**: Generated activity entry {index}', '', '']
+    lines += ['## Active Tasks', '', '- Benchmark task', '']
+    _write(path, '\n'.join(lines))
+
+
+def generate_evidence_log(path: Path, entries: int):
+    """Write an EVIDENCE_LOG.md with `entries` context update evidence blocks."""
+    lines = ['# Evidence Log - Benchmark Fixture', '', '**Last Updated**: 2025-01-01', '',
+             '## Evidence Registry', '']
+    for index in range(entries):
+        day = f'2025-{1 + index % 12:02d}-{1 + index % 28:02d}'
+        lines += [f'### {day} - Context Update Evidence', '', '#### Project State Update',
+                  f'- **Artifact**: Context Update - Generated evidence entry {index}',
+                  '- **Type**: State Management',
+                  f'- **Timestamp**: {day} 12:00:00 UTC',
+                  '- **Location**: `docs/UMCA/state/CURRENT_STATE.md`',
+                  '- **Validation**: Automated context persistence',
+                  '- **Status**: ✅ LOGGED', '', '']
+    lines += ['## Quality Gate Evidence', '', 'No gates recorded.', '']
+    _write(path, '\n'.join(lines))
+
+
+def generate_state(root: Path, entries: int) -> Path:
+    """Create (or reuse) pristine UMCA state files with `entries` entries each."""
+    pristine = root / 'pristine'
+    marker = root / '.bench_fixture.json'
+    if marker.exists() and json.loads(marker.read_text()) == {'entries': entries}:
+        return root
+    if root.exists():
+        shutil.rmtree(root)
+    generate_current_state(pristine / 'CURRENT_STATE.md', entries)
+    generate_evidence_log(pristine / 'EVIDENCE_LOG.md', entries)
+    _write(marker, json.dumps({'entries': entries}))
+    return root
+
+
+def reset_repo(root: Path) -> Path:
+    """Remove the context files a previous run left in a generated repository."""
+    shutil.rmtree(root / '.trae', ignore_errors=True)
+    return root
+
+
+def reset_state(root: Path) -> Path:
+    """Replace the working UMCA project under root with the pristine files.
+
+    Returns the project directory to run in.
+    """
+    project = root / 'project'
+    if project.exists():
+        shutil.rmtree(project)
+    state_dir = project / 'docs' / 'UMCA' / 'state'
+    state_dir.mkdir(parents=True)
+    (project / 'docs' / 'UMCA' / 'evidence').mkdir()
+    _write(project / 'README.md', '# Benchmark fixture\n')
+    for name in ('CURRENT_STATE.md', 'EVIDENCE_LOG.md'):
+        shutil.copyfile(root / 'pristine' / name, state_dir / name)
+    return project
+
+
+# --- Cases (run inside the measured child process) ---
+
+def _umca():
+    spec = importlib.util.spec_from_file_location('umca_update_context', UMCA_SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _updater(root: Path):
+    from update_context import ContextUpdater
+    return ContextUpdater(str(root))
+
+
+def _full_scan(root: Path):
+    _updater(root).analyze_codebase(full_rescan=True, discovery='walk')
+
+
+def _write_context(root: Path):
+    updater = _updater(root)
+    context = updater._get_default_context()
+    context['code_metrics'] = updater.analyze_codebase(discovery='walk')
+    context['current_gate'] = 'G3'
+    with open(updater.context_file, 'w') as f:
+        json.dump(context, f, indent=2)
+    for _ in range(50):
+        updater.store.record(context)
+
+
+def _check_context(root: Path):
+    from check_context import ContextChecker
+    checker = ContextChecker(str(root))
+    context = checker.load_context()
+    checker.check_context_freshness(context)
+    issues = (checker.validate_tdd_compliance(context) + checker.validate_prohibited_patterns(context)
+              + checker.validate_quality_gates(context, 'G4'))
+    checker.generate_report(context, issues, checker.suggest_next_actions(context, issues))
+
+
+def _update_evidence(root: Path):
+    _umca().update_evidence_log('Benchmark change')
+
+
+# name -> (fixture kind, setup or None, run); setup runs in its own process first
+CASES: Dict[str, Tuple[str, Optional[Callable[[Path], None]], Callable[[Path], None]]] = {
+    'analyze_codebase_full': ('repo', None, _full_scan),
+    'analyze_codebase_incremental': ('repo', _full_scan,
+                                     lambda root: _updater(root).analyze_codebase(discovery='walk')),
+    'check_context': ('repo', _write_context, _check_context),
+    'update_current_state': ('state', None, lambda root: _umca().update_current_state('Benchmark change')),
+    'update_evidence_log_import': ('state', None, _update_evidence),
+    'update_evidence_log': ('state', _update_evidence, _update_evidence),
+}
+
+
+def _proc_io() -> Dict[str, int]:
+    try:
+        with open('/proc/self/io', 'r') as f:
+            return {key: int(value) for key, value in (line.split(': ') for line in f)}
+    except OSError:
+        return {}
+
+
+def run_case(name: str, root: Path, setup: bool) -> Dict[str, Any]:
+    """Run one case's setup or measured step in this process."""
+    kind, setup_func, run_func = CASES[name]
+    func = setup_func if setup else run_func
+    before = _proc_io()
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        func(root)
+    seconds = time.perf_counter() - started
+    after = _proc_io()
+    # Waited-for helpers count towards the peak as well
+    peak_rss_kb = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                      resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    result: Dict[str, Any] = {'wall_seconds': seconds, 'peak_rss_kb': peak_rss_kb}
+    if before and after:
+        # Includes the reaped children's syscalls; see the module docstring
+        result['read_syscalls'] = after['syscr'] - before['syscr']
+        result['write_syscalls'] = after['syscw'] - before['syscw']
+    return result
+
+
+# --- Measurement ---
+
+def _child_env(root: Path, workdir: Path) -> Dict[str, str]:
+    env = dict(os.environ)
+    state_dir = root / 'docs' / 'UMCA' / 'state'
+    env.update({
+        'UMCA_STATE_DIR': str(state_dir),
+        'UMCA_EVIDENCE_DIR': str(root / 'docs' / 'UMCA' / 'evidence'),
+        'XDG_CACHE_HOME': str(workdir / 'cache')
+    })
+    return env
+
+
+def _strace_total(report: str) -> Optional[int]:
+    """Get the total call count from an `strace -c` summary table."""
+    lines = report.splitlines()
+    header = next((line for line in lines if 'calls' in line and 'syscall' in line), None)
+    total = next((line for line in lines if line.rstrip().endswith('total')), None)
+    if header is None or total is None:
+        return None
+    # Columns are right-aligned under their headers
+    calls_end = header.index('calls') + len('calls')
+    try:
+        return int(total[:calls_end].split()[-1])
+    except (ValueError, IndexError):
+        return None
+
+
+def measure(name: str, root: Path, workdir: Path, setup: bool = False,
+            strace: bool = False) -> Dict[str, Any]:
+    """Run one step of a case in a child process and measure it.
+
+    The child reports its own peak RSS, which covers the helper processes
+    it waited for.
+    """
+    command = [sys.executable, str(Path(__file__).resolve()), '--run-case', name, str(root)]
+    if setup:
+        command.append('--setup')
+    strace_file = workdir / 'strace.txt'
+    if strace:
+        command = ['strace', '-f', '-c', '-o', str(strace_file)] + command
+    process = subprocess.Popen(command, cwd=root, env=_child_env(root, workdir),
+                               stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    stdout, stderr = process.communicate()
+    if process.returncode != 0:
+        raise RuntimeError(f'{name} failed: {stderr.decode(errors="replace").strip()}')
+    result = json.loads(stdout.decode().strip().splitlines()[-1])
+    if strace:
+        result['syscalls'] = _strace_total(strace_file.read_text())
+    return result
+
+
+def benchmark_case(name: str, workdir: Path, repeat: int, reset: Callable[[], Path],
+                   strace: bool = False) -> Dict[str, Any]:
+    """Run a case `repeat` times from a fresh fixture and combine the measurements.
+
+    `reset` restores the fixture and returns the directory to run in.
+    """
+    kind, setup_func, _ = CASES[name]
+    runs = []
+    for _ in range(repeat):
+        root = reset()
+        if setup_func is not None:
+            measure(name, root, workdir, setup=True)
+        result = measure(name, root, workdir)
+        if strace:
+            # A separate traced run, so tracing overhead stays out of the timings
+            root = reset()
+            if setup_func is not None:
+                measure(name, root, workdir, setup=True)
+            result['syscalls'] = measure(name, root, workdir, strace=True)['syscalls']
+        runs.append(result)
+
+    combined = {'wall_seconds': round(statistics.median(r['wall_seconds'] for r in runs), 4),
+                'peak_rss_kb': max(r['peak_rss_kb'] for r in runs)}
+    for key in ('read_syscalls', 'write_syscalls', 'syscalls'):
+        values = [r[key] for r in runs if r.get(key) is not None]
+        if values:
+            combined[key] = int(statistics.median(values))
+    return combined
+
+
+# --- Baselines ---
+
+# metric -> (relative tolerance, absolute slack below which differences are noise)
+TOLERANCES = {
+    'wall_seconds': (0.25, 0.02),
+    'peak_rss_kb': (0.20, 2048),
+    'read_syscalls': (0.10, 50),
+    'write_syscalls': (0.10, 50),
+    'syscalls': (0.10, 200),
+}
+
+
+def compare_results(baseline: Dict[str, Any], results: Dict[str, Dict[str, Any]],
+                    scale: float = 1.0) -> List[Dict[str, Any]]:
+    """Compare results with a baseline; each row says whether it regressed.
+
+    `scale` multiplies every relative tolerance (e.g. 2 on a noisy machine).
+    """
+    rows = []
+    for case, metrics in results.items():
+        before = baseline.get('results', {}).get(case)
+        if before is None:
+            continue
+        for metric, value in metrics.items():
+            if metric not in before or metric not in TOLERANCES or value is None or before[metric] is None:
+                continue
+            relative, slack = TOLERANCES[metric]
+            limit = max(before[metric] * (1 + relative * scale), before[metric] + slack)
+            rows.append({
+                'case': case,
+                'metric': metric,
+                'baseline': before[metric],
+                'current': value,
+                'change': round((value - before[metric]) / before[metric] * 100, 1) if before[metric] else None,
+                'regressed': value > limit
+            })
+    return rows
+
+
+def format_results(results: Dict[str, Dict[str, Any]]) -> str:
+    lines = [f"{'Case':<48} {'Wall (s)':>9} {'Peak RSS':>10} {'Syscalls':>18}"]
+    for case, metrics in results.items():
+        if 'syscalls' in metrics:
+            syscalls = str(metrics['syscalls'])
+        elif 'read_syscalls' in metrics:
+            syscalls = f"{metrics['read_syscalls']}r/{metrics['write_syscalls']}w"
+        else:
+            syscalls = '-'
+        lines.append(f"{case:<48} {metrics['wall_seconds']:>9.4f} "
+                     f"{metrics['peak_rss_kb'] / 1024:>8.1f}MB {syscalls:>18}")
+    return "\n".join(lines)
+
+
+def format_comparison(rows: List[Dict[str, Any]]) -> str:
+    lines = [f"{'Case':<48} {'Metric':<15} {'Baseline':>12} {'Current':>12} {'Change':>8}"]
+    for row in rows:
+        change = f"{row['change']:+.1f}%" if row['change'] is not None else '-'
+        flag = '  REGRESSION' if row['regressed'] else ''
+        lines.append(f"{row['case']:<48} {row['metric']:<15} {row['baseline']:>12} "
+                     f"{row['current']:>12} {change:>8}{flag}")
+    return "\n".join(lines)
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(part.replace('_', '')) for part in value.split(',') if part]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the TDD context scripts')
+    parser.add_argument('--files', type=_int_list, default=[1000, 10000],
+                        help='Comma-separated source file counts for repository cases')
+    parser.add_argument('--node-modules', type=int,
+                        help='Files under node_modules per repository (default: half of --files)')
+    parser.add_argument('--entries', type=_int_list, default=[10000],
+                        help='Comma-separated entry counts for the UMCA state files')
+    parser.add_argument('--cases', help=f"Comma-separated cases to run (default: all of {', '.join(CASES)})")
+    parser.add_argument('--repeat', type=int, default=3, help='Measured runs per case (median is kept)')
+    parser.add_argument('--strace', action='store_true', help='Count all syscalls with strace -f -c')
+    parser.add_argument('--workdir', type=Path,
+                        default=Path(tempfile.gettempdir()) / 'trae-benchmark',
+                        help='Where fixtures are generated and kept between runs')
+    parser.add_argument('--save', type=Path, help='Write the results as a JSON baseline')
+    parser.add_argument('--compare', type=Path, help='Compare with a JSON baseline; exit 1 on regressions')
+    parser.add_argument('--tolerance-scale', type=float, default=1.0,
+                        help='Multiply the regression tolerances (e.g. 2 on noisy machines)')
+    parser.add_argument('--generate-repo', type=Path, metavar='DIR',
+                        help='Only generate a synthetic repository (sized by the first --files) and exit')
+    parser.add_argument('--run-case', nargs=2, metavar=('CASE', 'ROOT'), help=argparse.SUPPRESS)
+    parser.add_argument('--setup', action='store_true', help=argparse.SUPPRESS)
+
+    args = parser.parse_args()
+
+    if args.run_case:
+        result = run_case(args.run_case[0], Path(args.run_case[1]), args.setup)
+        print(json.dumps(result))
+        return
+
+    if args.generate_repo:
+        generate_repo(args.generate_repo, args.files[0], args.node_modules)
+        print(f"Generated {args.files[0]} source files in {args.generate_repo}")
+        return
+
+    if args.strace and not shutil.which('strace'):
+        print("Error: --strace needs strace installed")
+        sys.exit(2)
+
+    cases = args.cases.split(',') if args.cases else list(CASES)
+    unknown = [name for name in cases if name not in CASES]
+    if unknown:
+        print(f"Error: unknown cases: {', '.join(unknown)}")
+        sys.exit(2)
+
+    workdir = args.workdir.resolve()
+    workdir.mkdir(parents=True, exist_ok=True)
+    results: Dict[str, Dict[str, Any]] = {}
+    for name in cases:
+        kind = CASES[name][0]
+        for size in (args.files if kind == 'repo' else args.entries):
+            key = f"{name}[{'files' if kind == 'repo' else 'entries'}={size}]"
+            print(f"{key}: generating fixture...", end='', flush=True)
+            if kind == 'repo':
+                root = generate_repo(workdir / f'repo-{size}-{args.node_modules}', size, args.node_modules)
+                reset = functools.partial(reset_repo, root)
+            else:
+                reset = functools.partial(reset_state, generate_state(workdir / f'state-{size}', size))
+            print(" measuring...", end='', flush=True)
+            results[key] = benchmark_case(name, workdir, args.repeat, reset, args.strace)
+            print(f" {results[key]['wall_seconds']}s", flush=True)
+
+    print()
+    print(format_results(results))
+
+    if args.save:
+        args.save.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.save, 'w') as f:
+            json.dump({
+                'version': BASELINE_VERSION,
+                'created_at': datetime.now().isoformat(),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'cpus': os.cpu_count(),
+                'results': results
+            }, f, indent=2)
+        print(f"\nBaseline written to {args.save}")
+
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+        rows = compare_results(baseline, results, args.tolerance_scale)
+        print()
+        print(format_comparison(rows))
+        regressions = [row for row in rows if row['regressed']]
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {args.compare}")
+            sys.exit(1)
+        print(f"\nNo regressions against {args.compare}")
+
+if __name__ == '__main__':
+    main()
@@ -7,7 +7,7 @@ with the development guardrails framework. It provides insights into the
 current state and suggests next actions.
 
 Usage:
-    python check_context.py [--gate <gate>] [--validate] [--json]
+    python check_context.py [--gate <gate>] [--validate] [--json] [--history N] [--audit N]
 """
 
 import os
@@ -18,11 +18,21 @@ from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Dict, List, Any, Optional, Tuple
 
+from context_store import ContextStore
+from context_watch import read_watch_state
+from coverage_report import percentage as coverage_pct
+from guardrails_config import load_guardrails_config
+from guardrails_rules import load_rules
+from prohibited_patterns import load_scanner
+
 class ContextChecker:
     def __init__(self, project_root: str):
         self.project_root = Path(project_root)
         self.context_file = self.project_root / '.trae' / 'context' / 'development_context.json'
         self.guardrails_config = self.project_root / '.trae' / 'guardrails' / 'config.yml'
+        self.store = ContextStore(self.context_file.parent / 'context_history.db')
+        self.rules = load_rules(self.project_root)
+        self._rule_issues: Optional[Tuple[Dict[str, Any], List[Dict[str, str]]]] = None
         
     def load_context(self) -> Optional[Dict[str, Any]]:
         """Load the current development context."""
@@ -38,6 +48,10 @@ class ContextChecker:
     
     def check_context_freshness(self, context: Dict[str, Any]) -> Tuple[bool, str]:
         """Check if the context is fresh (updated recently)."""
+        watch = read_watch_state(self.context_file.parent)
+        if watch:
+            return True, f"Context is kept fresh by a {watch['backend']} watcher (pid {watch['pid']})"
+        
         last_updated_str = context['project_info'].get('last_updated')
         if not last_updated_str:
             return False, "No last updated timestamp found"
@@ -58,47 +72,19 @@ class ContextChecker:
         """Validate TDD compliance based on current context."""
         issues = []
         
-        tdd_cycle = context.get('tdd_cycle', {})
         test_status = context.get('test_status', {})
         
-        # Check if we're following RED-GREEN-REFACTOR cycle
-        current_cycle = tdd_cycle.get('current_cycle', 'UNKNOWN')
-        
-        if current_cycle == 'RED':
-            if test_status.get('failing_tests', 0) == 0:
-                issues.append({
-                    'type': 'TDD_VIOLATION',
-                    'severity': 'HIGH',
-                    'message': 'In RED phase but no failing tests found. Write failing tests first.'
-                })
-        
-        elif current_cycle == 'GREEN':
-            if test_status.get('failing_tests', 0) > 0:
-                issues.append({
-                    'type': 'TDD_VIOLATION',
-                    'severity': 'HIGH',
-                    'message': 'In GREEN phase but failing tests exist. Fix failing tests before proceeding.'
-                })
+        # Stopping points and monitoring alerts from the guardrails config
+        issues.extend(issue for issue in self.evaluate_rules(context)
+                      if not issue['rule'].startswith('quality_gates.'))
         
-        elif current_cycle == 'REFACTOR':
-            if test_status.get('failing_tests', 0) > 0:
-                issues.append({
-                    'type': 'TDD_VIOLATION',
-                    'severity': 'CRITICAL',
-                    'message': 'In REFACTOR phase but failing tests exist. All tests must pass before refactoring.'
-                })
-        
-        # Check test coverage
-        coverage = test_status.get('coverage_percentage', 0)
-        if coverage < 80:
-            issues.append({
-                'type': 'COVERAGE_LOW',
-                'severity': 'MEDIUM',
-                'message': f'Test coverage is {coverage}%. Target is 80% minimum.'
-            })
-        
-        # Check if tests have been run recently
+        # Check if tests have been run recently; a cache hit re-validates
+        # the stored results against unchanged inputs
         last_run = test_status.get('last_run')
+        if self.is_cached_result(test_status):
+            last_run = test_status['cache'].get('checked_at') or last_run
+        # A watcher re-runs related tests on every change, so old results are current
+        watched = read_watch_state(self.context_file.parent) is not None
         if not last_run:
             issues.append({
                 'type': 'NO_TEST_RUN',
@@ -108,7 +94,7 @@ class ContextChecker:
         else:
             try:
                 last_run_time = datetime.fromisoformat(last_run.replace('Z', '+00:00'))
-                if datetime.now() - last_run_time > timedelta(minutes=30):
+                if not watched and datetime.now() - last_run_time > timedelta(minutes=30):
                     issues.append({
                         'type': 'STALE_TESTS',
                         'severity': 'MEDIUM',
@@ -117,15 +103,100 @@ class ContextChecker:
             except ValueError:
                 pass
         
+        # A crashed or timed-out shard means some test files have no fresh results
+        for shard_error in test_status.get('shard_errors', []):
+            issues.append({
+                'type': 'TEST_SHARD_FAILED',
+                'severity': 'HIGH',
+                'message': f'Test {shard_error}; its test files show earlier results.'
+            })
+        
+        return issues
+    
+    def validate_prohibited_patterns(self, context: Dict[str, Any]) -> List[Dict[str, str]]:
+        """Report prohibited patterns found by the last code scan, one issue per pattern."""
+        found = context.get('code_metrics', {}).get('prohibited_patterns')
+        if not found or not found['counts']:
+            return []
+        rules = load_scanner(load_guardrails_config(self.project_root)).rules
+        issues = []
+        for name, count in found['counts'].items():
+            rule = rules.get(name)
+            if rule is None:
+                # No longer configured; the next scan drops its findings
+                continue
+            locations = [f"{finding['path']}:{finding['line']}"
+                         for finding in found['findings'] if finding['pattern'] == name]
+            shown = ', '.join(locations[:3]) + (f" and {count - 3} more" if count > 3 else '')
+            issues.append({
+                'type': 'PROHIBITED_PATTERN',
+                'severity': rule['severity'],
+                'message': f"{rule['description']}: {count} found ({shown})",
+                'pattern': name,
+                'locations': locations
+            })
         return issues
     
+    def evaluate_rules(self, context: Dict[str, Any]) -> List[Dict[str, str]]:
+        """Check a context against every compiled guardrails rule, once per context."""
+        if self._rule_issues is None or self._rule_issues[0] is not context:
+            previous_coverage = []
+            if self.store.exists() and self.rules.history_window:
+                # Only runs recorded before this context count towards its trend
+                previous_coverage = self.store.previous_coverage(
+                    self.rules.history_window, context.get('project_info', {}).get('last_updated'))
+            self._rule_issues = (context, self.rules.evaluate(context, previous_coverage))
+        return self._rule_issues[1]
+    
+    def audit_history(self, runs: int) -> List[Dict[str, Any]]:
+        """Check the last `runs` recorded contexts against the current rules, oldest first."""
+        if not self.store.exists():
+            return []
+        window = self.rules.history_window
+        rows = self.store.contexts(runs + window)
+        results = self.rules.evaluate_many(row['context'] for row in rows)
+        audit = [{'id': row['id'], 'recorded_at': row['recorded_at'], 'issues': issues}
+                 for row, issues in zip(rows, results)]
+        return audit[-runs:]
+    
+    def format_audit(self, audit: List[Dict[str, Any]]) -> str:
+        """Format audit_history results as a table."""
+        if not audit:
+            return "No context history recorded yet."
+        lines = [f"{'Recorded':<26} {'Critical':>8} {'High':>5} {'Medium':>6}  Rules"]
+        for entry in audit:
+            counts = {severity: sum(1 for issue in entry['issues'] if issue['severity'] == severity)
+                      for severity in ('CRITICAL', 'HIGH', 'MEDIUM')}
+            rules = ', '.join(issue['rule'] for issue in entry['issues']) or '-'
+            lines.append(f"{entry['recorded_at'] or '':<26} {counts['CRITICAL']:>8} {counts['HIGH']:>5} "
+                         f"{counts['MEDIUM']:>6}  {rules}")
+        return "\n".join(lines)
+    
+    def format_history(self, runs: int) -> str:
+        """Format the last `runs` recorded updates as a table."""
+        rows = self.store.recent(runs) if self.store.exists() else []
+        if not rows:
+            return "No context history recorded yet."
+        lines = [f"{'Recorded':<26} {'Gate':<4} {'Cycle':<8} {'Tests':>6} {'Failing':>7} "
+                 f"{'Coverage':>8} {'Files':>6} {'Seconds':>7}"]
+        for row in rows:
+            lines.append(f"{row['recorded_at'] or '':<26} {row['gate'] or '':<4} {row['tdd_cycle'] or '':<8} "
+                         f"{row['total_tests'] or 0:>6} {row['failing_tests'] or 0:>7} "
+                         f"{row['coverage_percentage'] or 0:>7}% {row['total_files'] or 0:>6} "
+                         f"{row['update_seconds'] if row['update_seconds'] is not None else '':>7}")
+        return "\n".join(lines)
+    
+    def is_cached_result(self, test_status: Dict[str, Any]) -> bool:
+        """Check whether the test results were reused from the result cache."""
+        return bool(test_status.get('cache', {}).get('hit'))
+    
     def validate_quality_gates(self, context: Dict[str, Any], target_gate: Optional[str] = None) -> List[Dict[str, str]]:
         """Validate quality gate compliance."""
         issues = []
         quality_gates = context.get('quality_gates', {})
         current_gate = context.get('current_gate', 'G1')
         
-        gate_order = ['G1', 'G2', 'G3', 'G4', 'G5']
+        gate_order = self.rules.gate_order
         
         if target_gate:
             if target_gate not in gate_order:
@@ -147,59 +218,9 @@ class ContextChecker:
                     'message': f'Cannot skip from {current_gate} to {target_gate}. Gates must be completed sequentially.'
                 })
         
-        # Validate current gate requirements
-        if current_gate == 'G1':
-            # Requirements validation
-            if not quality_gates.get('G1', {}).get('requirements_validated', False):
-                issues.append({
-                    'type': 'GATE_REQUIREMENT',
-                    'severity': 'HIGH',
-                    'message': 'G1: Requirements not validated. Complete requirements analysis.'
-                })
-        
-        elif current_gate == 'G2':
-            # Architecture approval
-            if not quality_gates.get('G2', {}).get('architecture_approved', False):
-                issues.append({
-                    'type': 'GATE_REQUIREMENT',
-                    'severity': 'HIGH',
-                    'message': 'G2: Architecture not approved. Complete architecture design and review.'
-                })
-        
-        elif current_gate == 'G3':
-            # Implementation requirements
-            code_metrics = context.get('code_metrics', {})
-            if code_metrics.get('total_files', 0) == 0:
-                issues.append({
-                    'type': 'GATE_REQUIREMENT',
-                    'severity': 'HIGH',
-                    'message': 'G3: No implementation files found. Begin implementation.'
-                })
-        
-        elif current_gate == 'G4':
-            # Testing requirements
-            test_status = context.get('test_status', {})
-            if test_status.get('total_tests', 0) == 0:
-                issues.append({
-                    'type': 'GATE_REQUIREMENT',
-                    'severity': 'CRITICAL',
-                    'message': 'G4: No tests found. Implement comprehensive test suite.'
-                })
-            elif test_status.get('failing_tests', 0) > 0:
-                issues.append({
-                    'type': 'GATE_REQUIREMENT',
-                    'severity': 'CRITICAL',
-                    'message': 'G4: Failing tests exist. All tests must pass for G4 completion.'
-                })
-        
-        elif current_gate == 'G5':
-            # Deployment readiness
-            if not quality_gates.get('G5', {}).get('deployment_ready', False):
-                issues.append({
-                    'type': 'GATE_REQUIREMENT',
-                    'severity': 'HIGH',
-                    'message': 'G5: Deployment not ready. Complete deployment preparation.'
-                })
+        # Criteria and thresholds of the current gate from the guardrails config
+        issues.extend(issue for issue in self.evaluate_rules(context)
+                      if issue['rule'].startswith('quality_gates.'))
         
         return issues
     
@@ -274,7 +295,8 @@ class ContextChecker:
                     'total_issues': len(issues),
                     'critical_issues': len([i for i in issues if i['severity'] == 'CRITICAL']),
                     'high_issues': len([i for i in issues if i['severity'] == 'HIGH']),
-                    'medium_issues': len([i for i in issues if i['severity'] == 'MEDIUM'])
+                    'medium_issues': len([i for i in issues if i['severity'] == 'MEDIUM']),
+                    'test_results_cached': self.is_cached_result(context.get('test_status', {}))
                 }
             }
             return json.dumps(report_data, indent=2)
@@ -300,6 +322,29 @@ class ContextChecker:
         report.append(f"   Passing: {test_status.get('passing_tests', 0)}")
         report.append(f"   Failing: {test_status.get('failing_tests', 0)}")
         report.append(f"   Coverage: {test_status.get('coverage_percentage', 0)}%")
+        coverage = test_status.get('coverage')
+        if coverage:
+            overall = coverage['overall']
+            report.append(f"   Lines {overall['lines']['pct']}%, Statements {overall['statements']['pct']}%, "
+                          f"Branches {overall['branches']['pct']}%, Functions {overall['functions']['pct']}%")
+            lowest = sorted(coverage['files'].items(), key=lambda item: coverage_pct(*item[1]['lines']))[:3]
+            for path, summary in lowest:
+                if coverage_pct(*summary['lines']) < 80:
+                    report.append(f"   Low: {path} ({coverage_pct(*summary['lines'])}% lines)")
+        elif test_status.get('coverage_source') == 'test_pass_rate':
+            report.append("   Note: no coverage report found; coverage shows the test pass rate")
+        if self.is_cached_result(test_status):
+            report.append(f"   Results: cached (run {test_status.get('last_run', 'Unknown')}, "
+                          f"reused {test_status['cache'].get('checked_at', 'Unknown')})")
+        elif test_status.get('last_run'):
+            report.append(f"   Results: fresh (run {test_status['last_run']})")
+        if test_status.get('shards'):
+            shard_states = ', '.join(f"{shard['shard']} {shard['status']}" for shard in test_status['shards'])
+            report.append(f"   Shards: {shard_states}")
+        if test_status.get('shard_errors'):
+            report.append("   Note: some shards did not finish; their files show earlier results")
+        elif test_status.get('complete') is False:
+            report.append("   Note: run stopped at the first failing test; other files show earlier results")
         
         # Issues
         if issues:
@@ -331,6 +376,10 @@ def main():
     parser.add_argument('--validate', action='store_true', help='Run full validation')
     parser.add_argument('--json', action='store_true', help='Output as JSON')
     parser.add_argument('--issues-only', action='store_true', help='Show only issues')
+    parser.add_argument('--history', type=int, metavar='N',
+                        help='Show the last N recorded context updates and exit')
+    parser.add_argument('--audit', type=int, metavar='N',
+                        help='Check the last N recorded contexts against the current rules and exit')
     
     args = parser.parse_args()
     
@@ -349,6 +398,15 @@ def main():
     
     checker = ContextChecker(str(project_root))
     
+    if args.history:
+        print(checker.format_history(args.history))
+        return
+    
+    if args.audit:
+        audit = checker.audit_history(args.audit)
+        print(json.dumps(audit, indent=2) if args.json else checker.format_audit(audit))
+        return
+    
     # Load context
     context = checker.load_context()
     if not context:
@@ -365,6 +423,7 @@ def main():
     
     if args.validate or args.gate:
         issues.extend(checker.validate_tdd_compliance(context))
+        issues.extend(checker.validate_prohibited_patterns(context))
         issues.extend(checker.validate_quality_gates(context, args.gate))
     
     # Generate suggestions
@@ -0,0 +1,814 @@
+#!/usr/bin/env python3
+"""
+TDD Context Management - Codebase Scan
+
+Computes the code metrics recorded by update_context.py. Per-file results are
+kept in a manifest next to development_context.json, keyed by path, size,
+mtime and inode, so repeated scans only re-read files that are new or changed
+and adjust the stored totals by the difference.
+
+The tree is walked with os.scandir and ignored directories (built-in defaults,
+.gitignore files and the code_metrics.ignore list in the guardrails config)
+are pruned before they are entered.
+
+Lines are counted on raw bytes in fixed-size chunks, spread across a process
+pool when there are enough files to make it worthwhile. The prohibited
+pattern matcher, when given, searches the same chunks, and each file read is
+split into code, comment and blank lines (see source_lines.py).
+
+File discovery is pluggable: inside a git checkout the file list comes from a
+single streamed `git ls-files -z` call, otherwise the tree is walked.
+"""
+
+import os
+import re
+import json
+import stat
+import time
+import codecs
+import shutil
+import hashlib
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Iterator, Pattern, Tuple
+
+from source_lines import JSX_EXTENSIONS, LineClassifier, normalize_newlines
+
+SOURCE_EXTENSIONS = ('.ts', '.tsx', '.js', '.jsx')
+
+METRIC_KEYS = ['total_files', 'total_lines', 'typescript_files', 'component_files', 'test_files',
+               'code_lines', 'comment_lines', 'blank_lines']
+
+# Files modified this close to the scan start may change again within the same
+# mtime tick without a size change, so they are never trusted on the next run.
+RACY_WINDOW_NS = 2_000_000_000
+
+# Always pruned, in .gitignore syntax. Dot-directories are skipped separately.
+DEFAULT_IGNORE_PATTERNS = [
+    'node_modules/',
+    'dist/',
+    'build/',
+    'coverage/',
+    'out/',
+    '__pycache__/',
+]
+
+
+def empty_metrics() -> Dict[str, int]:
+    """Get a zeroed code metrics structure."""
+    return {key: 0 for key in METRIC_KEYS}
+
+
+def file_contributions(rel_path: str, lines: int, source_lines: Optional[List[int]] = None) -> Dict[str, int]:
+    """Get the amount a single source file adds to each metric.
+
+    `source_lines` is the file's [code, comment, blank] split, if it was read.
+    """
+    name = rel_path.rsplit('/', 1)[-1]
+    lower = name.lower()
+    suffix = os.path.splitext(name)[1]
+    code, comment, blank = source_lines or (0, 0, 0)
+    return {
+        'total_files': 1,
+        'total_lines': lines,
+        'typescript_files': int(suffix in ('.ts', '.tsx')),
+        'component_files': int(suffix in ('.tsx', '.jsx') or 'component' in lower),
+        'test_files': int('test' in lower or 'spec' in lower),
+        'code_lines': code,
+        'comment_lines': comment,
+        'blank_lines': blank
+    }
+
+
+CHUNK_SIZE = 1 << 20
+
+# Below this many files the process pool costs more than it saves.
+PARALLEL_MIN_FILES = 64
+
+
+Match = Tuple[str, int]
+
+
+def _find_matches(matcher: Pattern[bytes], text: bytes, line_base: int, matches: List[Match]):
+    """Record (group name, 1-based line) for each match in whole lines of text."""
+    line = line_base + 1
+    pos = 0
+    for match in matcher.finditer(text):
+        line += text.count(b'\n', pos, match.start())
+        pos = match.start()
+        matches.append((match.lastgroup, line))
+
+
+def count_lines(file_path: Path, max_file_size: Optional[int] = None,
+                matcher: Optional[Pattern[bytes]] = None
+                ) -> Tuple[int, str, Optional[str], List[Match], Optional[List[int]]]:
+    """Count lines without decoding, matching len(f.readlines()) in UTF-8 text mode.
+
+    Universal newlines are honoured: \\n, \\r and \\r\\n each end one line, and a
+    trailing unterminated line counts too. Files that are not valid UTF-8
+    count as zero lines, as they did when they were read as text. Returns the
+    line count, a status ('ok', 'binary' when the first chunk contains a NUL
+    byte, 'oversized' when larger than max_file_size, 'undecodable' or
+    'error') and a content digest computed in the same pass, or None when the
+    file was not read completely.
+
+    The chunks are also fed, one run of whole lines at a time with line
+    breaks normalised to \\n, to the code/comment/blank classifier and, when
+    given, to the `matcher` (a regex of named groups); the matches of a file
+    that was counted are returned as (group name, line) pairs. The last
+    element is the [code, comment, blank] split of a counted file, or None
+    when a line is longer than CHUNK_SIZE (a minified bundle), which would
+    otherwise have to be held whole.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    decoder = None
+    valid = True
+    breaks = 0
+    last = b''
+    matches: List[Match] = []
+    classifier: Optional[LineClassifier] = LineClassifier(str(file_path).endswith(JSX_EXTENSIONS))
+    # The unterminated last line of the chunks searched so far
+    partial = b''
+    line_base = 0
+    try:
+        with open(file_path, 'rb') as f:
+            if max_file_size is not None and os.fstat(f.fileno()).st_size > max_file_size:
+                return 0, 'oversized', None, [], None
+
+            first = True
+            while True:
+                chunk = f.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                if first and b'\x00' in chunk:
+                    return 0, 'binary', None, [], None
+                first = False
+                digest.update(chunk)
+                if not valid:
+                    continue
+
+                if decoder is None and not chunk.isascii():
+                    decoder = codecs.getincrementaldecoder('utf-8')()
+                if decoder is not None:
+                    try:
+                        decoder.decode(chunk)
+                    except UnicodeDecodeError:
+                        valid = False
+                        continue
+
+                text = chunk
+                breaks += chunk.count(b'\n') + chunk.count(b'\r') - chunk.count(b'\r\n')
+                if last == b'\r' and chunk[:1] == b'\n':
+                    breaks -= 1
+                    # The \n of a \r\n split across chunks; the \r already ended the line
+                    text = chunk[1:]
+                last = chunk[-1:]
+
+                text = normalize_newlines(text)
+                cut = text.rfind(b'\n') + 1
+                if cut:
+                    run = partial + text[:cut]
+                    partial = text[cut:]
+                    if matcher is not None:
+                        _find_matches(matcher, run, line_base, matches)
+                        line_base += run.count(b'\n')
+                    if classifier is not None:
+                        classifier.feed(run)
+                else:
+                    partial += text
+                if len(partial) > CHUNK_SIZE:
+                    # One huge line: search what there is (a match across the cut
+                    # is missed) and stop classifying rather than buffer it all
+                    if matcher is not None:
+                        _find_matches(matcher, partial, line_base, matches)
+                    classifier = None
+                    partial = b''
+    except OSError:
+        return 0, 'error', None, [], None
+
+    if valid and decoder is not None:
+        try:
+            decoder.decode(b'', final=True)
+        except UnicodeDecodeError:
+            valid = False
+    if not valid:
+        return 0, 'undecodable', digest.hexdigest(), [], None
+
+    if matcher is not None and partial:
+        _find_matches(matcher, partial, line_base, matches)
+    if classifier is not None:
+        classifier.feed(partial, final=True)
+    if last and last not in (b'\n', b'\r'):
+        breaks += 1
+    return breaks, 'ok', digest.hexdigest(), matches, classifier.counts if classifier else None
+
+
+def _count_lines_task(args: Tuple[str, Optional[int], Optional[Pattern[bytes]]]
+                      ) -> Tuple[int, str, Optional[str], List[Match], Optional[List[int]]]:
+    return count_lines(Path(args[0]), args[1], args[2])
+
+
+def count_lines_bulk(paths: List[Path], max_file_size: Optional[int] = None,
+                     workers: Optional[int] = None,
+                     matcher: Optional[Pattern[bytes]] = None
+                     ) -> List[Tuple[int, str, Optional[str], List[Match], Optional[List[int]]]]:
+    """Count lines (and search for matches) in many files, in a process pool when it pays off."""
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(paths) < PARALLEL_MIN_FILES:
+        return [count_lines(path, max_file_size, matcher) for path in paths]
+
+    tasks = [(str(path), max_file_size, matcher) for path in paths]
+    chunksize = max(1, len(tasks) // (workers * 4))
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(_count_lines_task, tasks, chunksize=chunksize))
+    except (OSError, RuntimeError):
+        # Process pools are unavailable in some sandboxes; count inline.
+        return [count_lines(path, max_file_size, matcher) for path in paths]
+
+
+def _glob_to_regex(pattern: str) -> str:
+    """Translate a .gitignore glob (without anchoring) to a regex body."""
+    regex = []
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith('**/', i):
+            regex.append('(?:.*/)?')
+            i += 3
+        elif pattern.startswith('/**', i) and i + 3 == len(pattern):
+            regex.append('/.*')
+            i += 3
+        elif pattern.startswith('**', i):
+            regex.append('.*')
+            i += 2
+        elif pattern[i] == '*':
+            regex.append('[^/]*')
+            i += 1
+        elif pattern[i] == '?':
+            regex.append('[^/]')
+            i += 1
+        elif pattern[i] == '[':
+            end = pattern.find(']', i + 1)
+            if end == -1:
+                regex.append(re.escape(pattern[i]))
+                i += 1
+            else:
+                body = pattern[i + 1:end].replace('\\', '\\\\')
+                if body.startswith('!'):
+                    body = '^' + body[1:]
+                regex.append(f'[{body}]')
+                i = end + 1
+        elif pattern[i] == '\\' and i + 1 < len(pattern):
+            regex.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            regex.append(re.escape(pattern[i]))
+            i += 1
+    return ''.join(regex)
+
+
+class IgnoreRules:
+    """Ordered .gitignore-style rules; the last matching rule wins."""
+
+    def __init__(self):
+        # (compiled regex, negated, directory only)
+        self.rules: List[Tuple[Any, bool, bool]] = []
+
+    def add_pattern(self, line: str, base: str = ''):
+        """Add one .gitignore line, relative to the directory `base`."""
+        line = line.rstrip('\n').rstrip('\r')
+        if not line.strip() or line.startswith('#'):
+            return
+        if not line.endswith('\\ '):
+            line = line.rstrip()
+        negated = line.startswith('!')
+        if negated:
+            line = line[1:]
+        elif line.startswith('\\!') or line.startswith('\\#'):
+            line = line[1:]
+        dir_only = line.endswith('/')
+        line = line.rstrip('/')
+        if not line:
+            return
+
+        prefix = re.escape(base + '/') if base else ''
+        if '/' in line:
+            body = _glob_to_regex(line.lstrip('/'))
+            regex = f'^{prefix}{body}$'
+        else:
+            regex = f'^{prefix}(?:.*/)?{_glob_to_regex(line)}$'
+        self.rules.append((re.compile(regex, re.DOTALL), negated, dir_only))
+
+    def add_file(self, ignore_file: str, base: str = ''):
+        """Add every rule from a .gitignore file found in `base`."""
+        try:
+            with open(ignore_file, 'r', encoding='utf-8', errors='replace') as f:
+                for line in f:
+                    self.add_pattern(line, base)
+        except OSError:
+            pass
+
+    def copy(self) -> 'IgnoreRules':
+        rules = IgnoreRules()
+        rules.rules = list(self.rules)
+        return rules
+
+    def is_ignored(self, rel_path: str, is_dir: bool) -> bool:
+        """Check a project-relative posix path against the rules."""
+        ignored = False
+        for regex, negated, dir_only in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if regex.match(rel_path):
+                ignored = not negated
+        return ignored
+
+
+def build_ignore_rules(extra_patterns: Optional[List[str]] = None) -> IgnoreRules:
+    """Get the root ignore rules: built-in defaults, then configured patterns."""
+    rules = IgnoreRules()
+    for pattern in DEFAULT_IGNORE_PATTERNS + list(extra_patterns or []):
+        rules.add_pattern(pattern)
+    return rules
+
+
+def normalize_roots(roots: Optional[List[str]]) -> List[str]:
+    """Clean project-relative directories, dropping any inside another one."""
+    cleaned = sorted({root.strip('/') for root in roots or [] if root.strip('/')})
+    return [root for root in cleaned
+            if not any(root.startswith(other + '/') for other in cleaned)]
+
+
+def _subtree_rules(project_root: Path, rel_dir: str, rules: IgnoreRules) -> Optional[IgnoreRules]:
+    """Get the rules in force inside rel_dir, or None if a walk would prune it.
+
+    Applies every .gitignore above rel_dir; rel_dir's own is read by the walk.
+    """
+    rules = rules.copy()
+    parent = ''
+    for name in rel_dir.split('/'):
+        rules.add_file(str(project_root / parent / '.gitignore'), parent)
+        child = f'{parent}/{name}' if parent else name
+        if name.startswith('.') or rules.is_ignored(child, True):
+            return None
+        parent = child
+    return rules
+
+
+def walk_files(project_root: Path, ignore_rules: Optional[IgnoreRules] = None,
+               stats: Optional[Dict[str, int]] = None,
+               suffixes: Optional[Tuple[str, ...]] = None,
+               dirs: Optional[List[str]] = None,
+               roots: Optional[List[str]] = None) -> Iterator[Tuple[str, os.DirEntry]]:
+    """Yield (relative posix path, DirEntry) for every file not ignored.
+
+    Ignored and dot-prefixed directories are pruned without being entered.
+    Nested .gitignore files apply to their own subtree. Files whose suffix is
+    not in `suffixes` (when given) are skipped before any rule matching. When
+    `stats` is given, it is filled with entries_visited, dirs_pruned and
+    files_ignored counts; when `dirs` is given, the relative path of every
+    directory entered is appended to it. `roots` limits the walk to those
+    project-relative directories.
+    """
+    if stats is None:
+        stats = {}
+    for key in ('entries_visited', 'dirs_pruned', 'files_ignored'):
+        stats.setdefault(key, 0)
+
+    root_rules = ignore_rules.copy() if ignore_rules is not None else build_ignore_rules()
+    stack: List[Tuple[str, str, IgnoreRules]] = []
+    if roots:
+        for rel_dir in reversed(normalize_roots(roots)):
+            rules = _subtree_rules(project_root, rel_dir, root_rules)
+            if rules is not None and (project_root / rel_dir).is_dir():
+                stack.append((str(project_root / rel_dir), rel_dir, rules))
+    else:
+        stack.append((str(project_root), '', root_rules))
+
+    while stack:
+        dir_path, rel_dir, rules = stack.pop()
+        if dirs is not None:
+            dirs.append(rel_dir)
+        try:
+            with os.scandir(dir_path) as entries:
+                entries = list(entries)
+        except OSError:
+            continue
+
+        for entry in entries:
+            if entry.name == '.gitignore':
+                rules = rules.copy()
+                rules.add_file(entry.path, rel_dir)
+                break
+
+        subdirs = []
+        for entry in entries:
+            stats['entries_visited'] += 1
+            rel_path = f'{rel_dir}/{entry.name}' if rel_dir else entry.name
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+            except OSError:
+                continue
+
+            if is_dir:
+                if entry.name.startswith('.') or rules.is_ignored(rel_path, True):
+                    stats['dirs_pruned'] += 1
+                else:
+                    subdirs.append((entry.path, rel_path, rules))
+            elif suffixes is not None and not entry.name.endswith(suffixes):
+                continue
+            elif entry.name.startswith('.') or rules.is_ignored(rel_path, False):
+                stats['files_ignored'] += 1
+            else:
+                yield rel_path, entry
+
+        stack.extend(reversed(subdirs))
+
+
+def is_path_ignored(project_root: Path, rel_path: str, ignore_rules: Optional[IgnoreRules] = None) -> bool:
+    """Check one file the way walk_files would reach it.
+
+    Applies dot-prefixed parts, the root rules and every .gitignore between
+    the project root and the file, without listing any directory.
+    """
+    rules = ignore_rules.copy() if ignore_rules is not None else build_ignore_rules()
+    parts = rel_path.split('/')
+    rel_dir = ''
+    for index, name in enumerate(parts):
+        rules.add_file(str(project_root / rel_dir / '.gitignore'), rel_dir)
+        rel_child = f'{rel_dir}/{name}' if rel_dir else name
+        is_dir = index < len(parts) - 1
+        if name.startswith('.') or rules.is_ignored(rel_child, is_dir):
+            return True
+        rel_dir = rel_child
+    return False
+
+
+DISCOVERY_BACKENDS = ('auto', 'git', 'walk')
+
+
+def find_git_dir(project_root: Path) -> Optional[Path]:
+    """Find the .git file or directory governing project_root, if any."""
+    for path in [project_root] + list(project_root.parents):
+        if (path / '.git').exists():
+            return path / '.git'
+    return None
+
+
+def select_discovery(project_root: Path, requested: str = 'auto') -> str:
+    """Resolve the discovery backend to use for a project."""
+    if requested == 'walk':
+        return 'walk'
+    if shutil.which('git') and find_git_dir(project_root) is not None:
+        return 'git'
+    return 'walk'
+
+
+def git_files(project_root: Path, ignore_rules: Optional[IgnoreRules] = None,
+              stats: Optional[Dict[str, int]] = None,
+              suffixes: Optional[Tuple[str, ...]] = None,
+              roots: Optional[List[str]] = None) -> Iterator[str]:
+    """Yield relative posix paths of tracked and unignored untracked files.
+
+    Paths are streamed from one `git ls-files -z` process. Dot-prefixed path
+    parts and the ignore rules are applied as in walk_files, with directory
+    decisions cached so each directory is matched once. Raises RuntimeError
+    if git fails before producing any output.
+    """
+    if stats is None:
+        stats = {}
+    for key in ('entries_visited', 'dirs_pruned', 'files_ignored'):
+        stats.setdefault(key, 0)
+    rules = ignore_rules if ignore_rules is not None else build_ignore_rules()
+    dir_ignored: Dict[str, bool] = {'': False}
+
+    def is_dir_ignored(rel_dir: str) -> bool:
+        if rel_dir not in dir_ignored:
+            parent, _, name = rel_dir.rpartition('/')
+            dir_ignored[rel_dir] = (is_dir_ignored(parent) or name.startswith('.')
+                                    or rules.is_ignored(rel_dir, True))
+            if dir_ignored[rel_dir] and not dir_ignored[parent]:
+                stats['dirs_pruned'] += 1
+        return dir_ignored[rel_dir]
+
+    pathspecs = ['--'] + normalize_roots(roots) if roots else []
+    process = subprocess.Popen(
+        ['git', '--literal-pathspecs', 'ls-files', '-z', '--cached', '--others', '--exclude-standard']
+        + pathspecs,
+        cwd=project_root,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL
+    )
+    produced = False
+    try:
+        pending = b''
+        while True:
+            chunk = process.stdout.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            produced = True
+            parts = (pending + chunk).split(b'\0')
+            pending = parts.pop()
+            for raw in parts:
+                stats['entries_visited'] += 1
+                rel_path = os.fsdecode(raw)
+                if suffixes is not None and not rel_path.endswith(suffixes):
+                    continue
+                rel_dir, _, name = rel_path.rpartition('/')
+                if name.startswith('.') or is_dir_ignored(rel_dir) or rules.is_ignored(rel_path, False):
+                    stats['files_ignored'] += 1
+                    continue
+                yield rel_path
+    finally:
+        process.stdout.close()
+        returncode = process.wait()
+    if returncode != 0 and not produced:
+        raise RuntimeError(f'git ls-files failed with exit code {returncode}')
+
+
+def iter_source_files(project_root: Path, ignore_rules: Optional[IgnoreRules] = None,
+                      stats: Optional[Dict[str, int]] = None,
+                      discovery: str = 'walk',
+                      suffixes: Optional[Tuple[str, ...]] = SOURCE_EXTENSIONS,
+                      roots: Optional[List[str]] = None
+                      ) -> Iterator[Tuple[str, os.stat_result]]:
+    """Yield (relative posix path, stat) for every source file in the project.
+
+    `discovery` is 'git' or 'walk'; if git cannot list the files the walk is
+    used instead. The backend actually used is recorded in stats['discovery'].
+    Pass suffixes=None to list every file that is not ignored, and `roots`
+    to list only the files under those project-relative directories.
+    """
+    if stats is None:
+        stats = {}
+
+    if discovery == 'git':
+        stats['discovery'] = 'git'
+        try:
+            for rel_path in git_files(project_root, ignore_rules, stats, suffixes, roots):
+                try:
+                    file_stat = os.stat(project_root / rel_path)
+                except OSError:
+                    continue
+                if stat.S_ISREG(file_stat.st_mode):
+                    yield rel_path, file_stat
+            return
+        except (OSError, RuntimeError):
+            pass
+
+    stats['discovery'] = 'walk'
+    for rel_path, entry in walk_files(project_root, ignore_rules, stats, suffixes, roots=roots):
+        try:
+            file_stat = entry.stat()
+        except OSError:
+            continue
+        if stat.S_ISREG(file_stat.st_mode):
+            yield rel_path, file_stat
+
+
+class FileManifest:
+    """Persisted per-file scan results plus the totals they add up to."""
+
+    VERSION = 4
+
+    def __init__(self, manifest_file: Path, settings: Optional[Dict[str, Any]] = None):
+        self.manifest_file = manifest_file
+        # Scan settings that affect per-file results; a mismatch invalidates the manifest.
+        self.settings = settings or {}
+        # path -> [size, mtime_ns, inode, lines, content digest or None,
+        #          prohibited pattern findings as [pattern, line] pairs,
+        #          [code, comment, blank] lines or None]
+        self.files: Dict[str, List[Any]] = {}
+        self.totals = empty_metrics()
+
+    def load(self) -> bool:
+        """Load the manifest; return False if it is missing or unusable."""
+        if not self.manifest_file.exists():
+            return False
+        try:
+            with open(self.manifest_file, 'r') as f:
+                data = json.load(f)
+        except (json.JSONDecodeError, IOError):
+            return False
+        if data.get('version') != self.VERSION or data.get('settings', {}) != self.settings:
+            return False
+        totals = data.get('totals', {})
+        if set(totals) != set(METRIC_KEYS):
+            return False
+        self.files = data.get('files', {})
+        self.totals = {key: totals[key] for key in METRIC_KEYS}
+        return True
+
+    def save(self):
+        """Write the manifest atomically."""
+        tmp_file = self.manifest_file.with_suffix('.tmp')
+        with open(tmp_file, 'w') as f:
+            json.dump({
+                'version': self.VERSION,
+                'settings': self.settings,
+                'totals': self.totals,
+                'files': self.files
+            }, f, separators=(',', ':'))
+        os.replace(tmp_file, self.manifest_file)
+
+    def digests(self) -> Dict[str, str]:
+        """Get a content fingerprint per file, falling back to size and mtime."""
+        return {path: entry[4] or f'{entry[0]}:{entry[1]}' for path, entry in self.files.items()}
+
+
+def _apply(totals: Dict[str, int], rel_path: str, entry: List[Any], sign: int):
+    for key, value in file_contributions(rel_path, entry[3], entry[6]).items():
+        totals[key] += sign * value
+
+
+def _scan_paths(project_root: Path, manifest: FileManifest, paths: List[str],
+                ignore_patterns: Optional[List[str]], max_file_size: Optional[int],
+                workers: Optional[int], scan_started_ns: int,
+                patterns=None) -> Tuple[Dict[str, int], Dict[str, Any]]:
+    """Update a loaded manifest for a known set of changed paths."""
+    totals = dict(manifest.totals)
+    summary = {
+        'mode': 'paths',
+        'files_reread': 0,
+        'files_reused': len(manifest.files),
+        'files_removed': 0,
+        'bytes_read': 0,
+        'discovery': 'paths'
+    }
+    ignore_rules = build_ignore_rules(ignore_patterns)
+    pending: List[Tuple[str, List[Any]]] = []
+
+    for rel_path in sorted(set(paths)):
+        old = manifest.files.get(rel_path)
+        file_stat = None
+        if rel_path.endswith(SOURCE_EXTENSIONS) and not is_path_ignored(project_root, rel_path, ignore_rules):
+            try:
+                file_stat = os.stat(project_root / rel_path)
+            except OSError:
+                pass
+        if file_stat is not None and not stat.S_ISREG(file_stat.st_mode):
+            file_stat = None
+
+        if file_stat is not None and old is not None and old[:3] == [
+                file_stat.st_size, file_stat.st_mtime_ns, file_stat.st_ino]:
+            continue
+        if old is not None:
+            _apply(totals, rel_path, old, -1)
+            del manifest.files[rel_path]
+            summary['files_reused'] -= 1
+            if file_stat is None:
+                summary['files_removed'] += 1
+        if file_stat is not None:
+            mtime_ns = file_stat.st_mtime_ns
+            if mtime_ns >= scan_started_ns - RACY_WINDOW_NS:
+                mtime_ns = -1
+            pending.append((rel_path, [file_stat.st_size, mtime_ns, file_stat.st_ino]))
+
+    counts = count_lines_bulk([project_root / rel_path for rel_path, _ in pending],
+                              max_file_size, workers, patterns.regex if patterns else None)
+    for (rel_path, entry), (lines, status, digest, matches, source_lines) in zip(pending, counts):
+        findings = patterns.findings(rel_path, lines, matches) if patterns else []
+        manifest.files[rel_path] = entry + [lines, digest, findings, source_lines]
+        _apply(totals, rel_path, manifest.files[rel_path], 1)
+        summary['files_reread'] += 1
+        if status == 'ok':
+            summary['bytes_read'] += entry[0]
+        else:
+            summary[f'files_{status}'] = summary.get(f'files_{status}', 0) + 1
+
+    manifest.totals = totals
+    manifest.save()
+    return totals, summary
+
+
+def scan_codebase(project_root: Path, manifest: Optional[FileManifest] = None,
+                  full_rescan: bool = False,
+                  ignore_patterns: Optional[List[str]] = None,
+                  max_file_size: Optional[int] = None,
+                  workers: Optional[int] = None,
+                  discovery: str = 'auto',
+                  paths: Optional[List[str]] = None,
+                  patterns=None) -> Tuple[Dict[str, int], Dict[str, Any]]:
+    """Compute code metrics, reusing manifest entries for unchanged files.
+
+    Files larger than max_file_size bytes are counted as files but not read.
+    `discovery` is one of DISCOVERY_BACKENDS. When `paths` lists every file
+    changed since the manifest was saved (as a file watcher does), only
+    those are checked and nothing is listed; without a usable manifest the
+    whole tree is scanned as usual. `patterns` (a prohibited_patterns
+    PatternScanner) is applied to every file that is read, and its findings
+    are kept with the file's manifest entry.
+    Returns the metrics and a summary of how much work the scan did.
+    """
+    scan_started_ns = time.time_ns()
+    incremental = manifest is not None and not full_rescan and manifest.load()
+    if paths is not None and incremental:
+        return _scan_paths(project_root, manifest, paths, ignore_patterns,
+                           max_file_size, workers, scan_started_ns, patterns)
+
+    previous = dict(manifest.files) if incremental else {}
+    totals = dict(manifest.totals) if incremental else empty_metrics()
+    current: Dict[str, List[Any]] = {}
+    summary = {
+        'mode': 'incremental' if incremental else 'full',
+        'files_reread': 0,
+        'files_reused': 0,
+        'files_removed': 0,
+        'bytes_read': 0
+    }
+    walk_stats: Dict[str, int] = {}
+    ignore_rules = build_ignore_rules(ignore_patterns)
+    pending: List[Tuple[str, List[Any]]] = []
+
+    backend = select_discovery(project_root, discovery)
+
+    for rel_path, file_stat in iter_source_files(project_root, ignore_rules, walk_stats, backend):
+        mtime_ns = file_stat.st_mtime_ns
+        if mtime_ns >= scan_started_ns - RACY_WINDOW_NS:
+            mtime_ns = -1
+        key = [file_stat.st_size, file_stat.st_mtime_ns, file_stat.st_ino]
+
+        old = previous.pop(rel_path, None)
+        if old is not None and old[:3] == key:
+            current[rel_path] = old
+            summary['files_reused'] += 1
+            continue
+
+        if old is not None:
+            _apply(totals, rel_path, old, -1)
+        pending.append((rel_path, [file_stat.st_size, mtime_ns, file_stat.st_ino]))
+
+    counts = count_lines_bulk([project_root / rel_path for rel_path, _ in pending],
+                              max_file_size, workers, patterns.regex if patterns else None)
+    for (rel_path, entry), (lines, status, digest, matches, source_lines) in zip(pending, counts):
+        findings = patterns.findings(rel_path, lines, matches) if patterns else []
+        current[rel_path] = entry + [lines, digest, findings, source_lines]
+        _apply(totals, rel_path, current[rel_path], 1)
+        summary['files_reread'] += 1
+        if status == 'ok':
+            summary['bytes_read'] += entry[0]
+        else:
+            summary[f'files_{status}'] = summary.get(f'files_{status}', 0) + 1
+
+    for rel_path, old in previous.items():
+        _apply(totals, rel_path, old, -1)
+        summary['files_removed'] += 1
+
+    summary.update(walk_stats)
+    if manifest is not None:
+        manifest.files = current
+        manifest.totals = totals
+        manifest.save()
+
+    return totals, summary
+
+
+def digest_other_files(project_root: Path, digest_file: Path,
+                       roots: Optional[List[str]] = None,
+                       ignore_patterns: Optional[List[str]] = None,
+                       discovery: str = 'auto') -> Dict[str, str]:
+    """Get a content digest for every non-source file under `roots`.
+
+    These are the inputs a test run reads besides source files: snapshots,
+    JSON fixtures, asset mocks and the like. Only the project-relative
+    directories in `roots` are listed; the whole project when empty, which
+    stats every document and asset on each call. Digests are kept in
+    `digest_file` keyed by size, mtime and inode, so only new or changed
+    files are read.
+    """
+    scan_started_ns = time.time_ns()
+    try:
+        with open(digest_file, 'r') as f:
+            previous = json.load(f)
+    except (json.JSONDecodeError, IOError):
+        previous = {}
+    current: Dict[str, List[Any]] = {}
+
+    for rel_path, file_stat in iter_source_files(project_root, build_ignore_rules(ignore_patterns),
+                                                 discovery=select_discovery(project_root, discovery),
+                                                 suffixes=None, roots=roots):
+        if rel_path.endswith(SOURCE_EXTENSIONS):
+            continue
+        key = [file_stat.st_size, file_stat.st_mtime_ns, file_stat.st_ino]
+        old = previous.get(rel_path)
+        if old is not None and old[:3] == key:
+            current[rel_path] = old
+            continue
+        digest = hashlib.blake2b(digest_size=16)
+        try:
+            with open(project_root / rel_path, 'rb') as f:
+                for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                    digest.update(chunk)
+        except OSError:
+            continue
+        if key[1] >= scan_started_ns - RACY_WINDOW_NS:
+            key[1] = -1
+        current[rel_path] = key + [digest.hexdigest()]
+
+    if current != previous:
+        tmp_file = digest_file.with_suffix('.tmp')
+        with open(tmp_file, 'w') as f:
+            json.dump(current, f, separators=(',', ':'))
+        os.replace(tmp_file, digest_file)
+    return {rel_path: entry[3] for rel_path, entry in current.items()}
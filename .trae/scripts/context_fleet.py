@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+TDD Context Management Script - Context Fleet
+
+Checks the development context of many repositories at once. Each repository
+is checked as check_context.py --validate would, in a bounded process pool;
+results are written as one JSON line per repository as they finish, followed
+by a summary line with critical issue counts per gate and the repositories
+whose context is stale or missing.
+
+Usage:
+    python context_fleet.py <root|glob|-> [...] [--gate <gate>] [--workers N]
+
+Globs are expanded here (quote them), and '-' reads roots from stdin, one per
+line. Exits with status 1 if any repository has critical issues.
+"""
+
+import io
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+import contextlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Any, Optional, Iterable, TextIO
+
+from check_context import ContextChecker
+
+SEVERITIES = ('CRITICAL', 'HIGH', 'MEDIUM', 'LOW')
+
+
+def expand_roots(patterns: Iterable[str], stdin: Optional[TextIO] = None) -> List[str]:
+    """Turn root paths, globs and '-' (roots on stdin) into unique directories."""
+    roots: List[str] = []
+    seen = set()
+    for pattern in patterns:
+        if pattern == '-':
+            candidates = [line.strip() for line in (stdin or sys.stdin) if line.strip()]
+        elif glob.has_magic(pattern):
+            candidates = sorted(glob.glob(os.path.expanduser(pattern)))
+        else:
+            candidates = [os.path.expanduser(pattern)]
+        for candidate in candidates:
+            root = os.path.abspath(candidate)
+            if root not in seen and os.path.isdir(root):
+                seen.add(root)
+                roots.append(root)
+    return roots
+
+
+def check_repository(root: str, target_gate: Optional[str] = None) -> Dict[str, Any]:
+    """Check one repository's context; runs in a pool worker.
+
+    Anything the checker prints (config warnings, load errors) is captured so
+    it cannot interleave with the JSON lines written by the parent.
+    """
+    started = time.perf_counter()
+    result: Dict[str, Any] = {'root': root}
+    output = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(output):
+            checker = ContextChecker(root)
+            context = checker.load_context()
+            if context is None:
+                # load_context reports a context file it could not parse
+                result['status'] = 'error' if checker.context_file.exists() else 'no_context'
+            else:
+                is_fresh, freshness_msg = checker.check_context_freshness(context)
+                issues = checker.validate_tdd_compliance(context)
+                issues.extend(checker.validate_prohibited_patterns(context))
+                issues.extend(checker.validate_quality_gates(context, target_gate))
+                checker.store.close()
+                result.update({
+                    'status': 'checked',
+                    'gate': context.get('current_gate'),
+                    'cycle': context.get('tdd_cycle', {}).get('current_cycle'),
+                    'last_updated': context.get('project_info', {}).get('last_updated'),
+                    'fresh': is_fresh,
+                    'freshness': freshness_msg,
+                    'counts': {severity: sum(1 for issue in issues if issue['severity'] == severity)
+                               for severity in SEVERITIES},
+                    'issues': issues
+                })
+    except Exception as e:
+        result['status'] = 'error'
+        result['error'] = f'{type(e).__name__}: {e}'
+    if output.getvalue().strip():
+        result['error' if result['status'] == 'error' and 'error' not in result
+               else 'output'] = output.getvalue().strip()
+    result['seconds'] = round(time.perf_counter() - started, 3)
+    return result
+
+
+def summarize_fleet(results: List[Dict[str, Any]], seconds: float) -> Dict[str, Any]:
+    """Aggregate per-repository results into the fleet summary."""
+    checked = [r for r in results if r['status'] == 'checked']
+    critical_by_gate: Dict[str, int] = {}
+    for result in checked:
+        if result['counts']['CRITICAL']:
+            gate = result.get('gate') or 'unknown'
+            critical_by_gate[gate] = critical_by_gate.get(gate, 0) + result['counts']['CRITICAL']
+    return {
+        'repositories': len(results),
+        'checked': len(checked),
+        'with_critical': sorted(r['root'] for r in checked if r['counts']['CRITICAL']),
+        'critical_by_gate': dict(sorted(critical_by_gate.items())),
+        'issues_by_severity': {severity: sum(r['counts'][severity] for r in checked)
+                               for severity in SEVERITIES},
+        'stale': sorted(r['root'] for r in checked if not r['fresh']),
+        'no_context': sorted(r['root'] for r in results if r['status'] == 'no_context'),
+        'errors': sorted(r['root'] for r in results if r['status'] == 'error'),
+        'seconds': round(seconds, 3)
+    }
+
+
+def run_fleet(roots: List[str], out: TextIO, target_gate: Optional[str] = None,
+              workers: Optional[int] = None) -> Dict[str, Any]:
+    """Check every root in a process pool, streaming one JSON line per result.
+
+    Returns the summary, which is also written as the last line.
+    """
+    started = time.perf_counter()
+    results: List[Dict[str, Any]] = []
+    workers = max(1, min(workers or os.cpu_count() or 1, len(roots) or 1))
+
+    def emit(record: Dict[str, Any]):
+        out.write(json.dumps(record, separators=(',', ':')) + '\n')
+        out.flush()
+
+    if workers == 1:
+        for root in roots:
+            results.append(check_repository(root, target_gate))
+            emit(results[-1])
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(check_repository, root, target_gate) for root in roots]
+            for future in as_completed(futures):
+                results.append(future.result())
+                emit(results[-1])
+
+    summary = summarize_fleet(results, time.perf_counter() - started)
+    emit({'summary': summary})
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check TDD development contexts across many repositories')
+    parser.add_argument('roots', nargs='+',
+                        help="Repository roots or globs ('-' reads roots from stdin)")
+    parser.add_argument('--gate', help='Also validate moving each repository to this gate')
+    parser.add_argument('--workers', type=int, help='Worker processes (default: CPU count)')
+
+    args = parser.parse_args()
+
+    roots = expand_roots(args.roots)
+    if not roots:
+        print("Error: No repository directories matched", file=sys.stderr)
+        sys.exit(2)
+
+    summary = run_fleet(roots, sys.stdout, args.gate, args.workers)
+    if summary['with_critical']:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+TDD Context Management - Context Store
+
+Keeps a summary of each development context written by update_context.py as
+a row in a local SQLite database, so checks can look at trends across runs
+rather than only the latest state. Rows past the configured retention
+(context_history.max_entries / max_age_days) are pruned as new ones arrive.
+development_context.json remains the full export of the latest update for
+tools that read it directly.
+"""
+
+import json
+import sqlite3
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+SCHEMA_VERSION = 2
+
+# The parts of test_status and code_metrics kept with each row
+TEST_STATUS_FIELDS = ('commit', 'run_mode', 'total_tests', 'passing_tests', 'failing_tests',
+                      'pending_tests', 'coverage_percentage')
+CODE_METRICS_FIELDS = ('total_files', 'total_lines', 'typescript_files', 'component_files')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS updates (
+    id INTEGER PRIMARY KEY,
+    recorded_at TEXT NOT NULL,
+    phase TEXT,
+    gate TEXT,
+    tdd_cycle TEXT,
+    git_commit TEXT,
+    run_mode TEXT,
+    total_tests INTEGER,
+    passing_tests INTEGER,
+    failing_tests INTEGER,
+    pending_tests INTEGER,
+    coverage_percentage REAL,
+    total_files INTEGER,
+    total_lines INTEGER,
+    typescript_files INTEGER,
+    component_files INTEGER,
+    update_seconds REAL,
+    context TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS updates_recorded_at ON updates (recorded_at);
+
+CREATE TABLE IF NOT EXISTS stage_timings (
+    update_id INTEGER NOT NULL REFERENCES updates (id) ON DELETE CASCADE,
+    stage TEXT NOT NULL,
+    seconds REAL NOT NULL,
+    PRIMARY KEY (update_id, stage)
+);
+
+CREATE TABLE IF NOT EXISTS gate_states (
+    update_id INTEGER NOT NULL REFERENCES updates (id) ON DELETE CASCADE,
+    gate TEXT NOT NULL,
+    status TEXT,
+    PRIMARY KEY (update_id, gate)
+);
+CREATE INDEX IF NOT EXISTS gate_states_gate ON gate_states (gate, update_id);
+"""
+
+
+def summarize_context(context: Dict[str, Any]) -> Dict[str, Any]:
+    """The fields of a context the history keeps: what the guardrails rules
+    and the history reports read, without file lists, test names or errors."""
+    test_status = context.get('test_status', {})
+    metrics = context.get('code_metrics', {})
+    summary = {
+        'project_info': {'last_updated': context.get('project_info', {}).get('last_updated')},
+        'current_phase': context.get('current_phase'),
+        'current_gate': context.get('current_gate'),
+        'tdd_cycle': {'current_cycle': context.get('tdd_cycle', {}).get('current_cycle')},
+        'quality_gates': context.get('quality_gates', {}),
+        'test_status': {field: test_status[field] for field in TEST_STATUS_FIELDS
+                        if field in test_status},
+        'code_metrics': {field: metrics[field] for field in CODE_METRICS_FIELDS
+                         if field in metrics},
+    }
+    return {key: value for key, value in summary.items() if value is not None}
+
+
+class ContextStore:
+    """SQLite history of development context summaries, one row per update.
+
+    Keeps at most `max_entries` rows and none older than `max_age_days`;
+    either limit is off when None.
+    """
+
+    def __init__(self, db_file: Path, max_entries: Optional[int] = 1000,
+                 max_age_days: Optional[float] = 90):
+        self.db_file = Path(db_file)
+        self.max_entries = max_entries
+        self.max_age_days = max_age_days
+        self._conn: Optional[sqlite3.Connection] = None
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.db_file.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.db_file)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA foreign_keys=ON')
+            version = conn.execute('PRAGMA user_version').fetchone()[0]
+            if version < SCHEMA_VERSION:
+                conn.executescript(SCHEMA)
+                if version == 1:
+                    # Version 1 rows held the whole context
+                    with conn:
+                        conn.executemany(
+                            'UPDATE updates SET context = ? WHERE id = ?',
+                            [(json.dumps(summarize_context(json.loads(context)), separators=(',', ':')),
+                              update_id)
+                             for update_id, context in conn.execute('SELECT id, context FROM updates')])
+                conn.execute(f'PRAGMA user_version={SCHEMA_VERSION}')
+            self._conn = conn
+        return self._conn
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def exists(self) -> bool:
+        return self.db_file.exists()
+
+    def record(self, context: Dict[str, Any]) -> int:
+        """Store a context summary as a new row and prune past the retention
+        limits; returns its id."""
+        test_status = context.get('test_status', {})
+        metrics = context.get('code_metrics', {})
+        performance = context.get('performance', {})
+        with self.conn:
+            cursor = self.conn.execute(
+                """INSERT INTO updates (recorded_at, phase, gate, tdd_cycle, git_commit, run_mode,
+                       total_tests, passing_tests, failing_tests, pending_tests, coverage_percentage,
+                       total_files, total_lines, typescript_files, component_files,
+                       update_seconds, context)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (context.get('project_info', {}).get('last_updated'),
+                 context.get('current_phase'),
+                 context.get('current_gate'),
+                 context.get('tdd_cycle', {}).get('current_cycle'),
+                 test_status.get('commit'),
+                 test_status.get('run_mode'),
+                 test_status.get('total_tests'),
+                 test_status.get('passing_tests'),
+                 test_status.get('failing_tests'),
+                 test_status.get('pending_tests'),
+                 test_status.get('coverage_percentage'),
+                 metrics.get('total_files'),
+                 metrics.get('total_lines'),
+                 metrics.get('typescript_files'),
+                 metrics.get('component_files'),
+                 performance.get('update_seconds'),
+                 json.dumps(summarize_context(context), separators=(',', ':'))))
+            update_id = cursor.lastrowid
+            self.conn.executemany(
+                'INSERT INTO stage_timings (update_id, stage, seconds) VALUES (?, ?, ?)',
+                [(update_id, stage, seconds)
+                 for stage, seconds in performance.get('stages', {}).items()])
+            self.conn.executemany(
+                'INSERT INTO gate_states (update_id, gate, status) VALUES (?, ?, ?)',
+                [(update_id, gate, state.get('status'))
+                 for gate, state in context.get('quality_gates', {}).items()])
+            self._prune(update_id)
+        return update_id
+
+    def _prune(self, latest_id: int):
+        """Drop rows older than max_age_days, then all but the newest
+        max_entries; their timings and gate states go with them."""
+        if self.max_age_days is not None:
+            cutoff = (datetime.now() - timedelta(days=self.max_age_days)).isoformat()
+            self.conn.execute('DELETE FROM updates WHERE recorded_at < ? AND id < ?',
+                              (cutoff, latest_id))
+        if self.max_entries is not None:
+            self.conn.execute('DELETE FROM updates WHERE id <= ?',
+                              (latest_id - max(self.max_entries, 1),))
+
+    def recent(self, runs: int) -> List[Dict[str, Any]]:
+        """Summary columns of the last `runs` updates, newest first."""
+        rows = self.conn.execute(
+            """SELECT id, recorded_at, phase, gate, tdd_cycle, git_commit, run_mode,
+                      total_tests, passing_tests, failing_tests, pending_tests,
+                      coverage_percentage, total_files, total_lines, update_seconds
+               FROM updates ORDER BY id DESC LIMIT ?""", (runs,))
+        return [dict(row) for row in rows]
+
+    def previous_coverage(self, runs: int, before: Optional[str]) -> List[Optional[float]]:
+        """Coverage of the `runs` updates recorded before `before` (a
+        last_updated timestamp), newest first; all updates when it is None.
+
+        Runs without coverage are included as None, so `runs` counts runs.
+        """
+        if before is None:
+            rows = self.conn.execute(
+                'SELECT coverage_percentage FROM updates ORDER BY recorded_at DESC, id DESC LIMIT ?',
+                (runs,))
+        else:
+            rows = self.conn.execute(
+                """SELECT coverage_percentage FROM updates WHERE recorded_at < ?
+                   ORDER BY recorded_at DESC, id DESC LIMIT ?""", (before, runs))
+        return [row['coverage_percentage'] for row in rows]
+
+    def contexts(self, runs: int) -> List[Dict[str, Any]]:
+        """The context summaries of the last `runs` updates, oldest first."""
+        rows = self.conn.execute(
+            """SELECT id, recorded_at, context FROM
+                   (SELECT id, recorded_at, context FROM updates ORDER BY id DESC LIMIT ?)
+               ORDER BY id""", (runs,))
+        return [{'id': row['id'], 'recorded_at': row['recorded_at'],
+                 'context': json.loads(row['context'])} for row in rows]
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+TDD Context Management - Context Trace
+
+Timing spans for the phases of a context update. Each span records when it
+started relative to the update, how long it took, the thread it ran on and
+the files and bytes it handled. The spans are kept under the context's
+`performance` section and can be exported as a Chrome trace-event file
+(chrome://tracing, Perfetto) or as OpenMetrics text for the node-exporter
+textfile collector.
+"""
+
+import os
+import json
+import time
+import threading
+import contextlib
+from pathlib import Path
+from typing import Dict, Iterator, List, Any, Optional
+
+METRIC_PREFIX = 'tdd_context'
+
+
+class SpanRecorder:
+    """Collects spans for one update; safe to use from worker threads."""
+
+    def __init__(self):
+        self.started_at = time.time()
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+        self.spans: List[Dict[str, Any]] = []
+
+    @contextlib.contextmanager
+    def span(self, name: str, **counts: int) -> Iterator[Dict[str, Any]]:
+        """Time the enclosed block as a span called `name`.
+
+        The yielded record can be given 'files' and 'bytes' counts once
+        they are known; a span still records its duration when the block
+        raises.
+        """
+        record: Dict[str, Any] = {'name': name, 'thread': threading.current_thread().name}
+        record.update(counts)
+        started = time.perf_counter()
+        try:
+            yield record
+        finally:
+            finished = time.perf_counter()
+            record['start'] = round(started - self._origin, 6)
+            record['seconds'] = round(finished - started, 6)
+            with self._lock:
+                self.spans.append(record)
+
+    def performance(self) -> Dict[str, Any]:
+        """The `performance` section: spans in start order and per-stage seconds."""
+        spans = sorted(self.spans, key=lambda span: span['start'])
+        return {
+            'started_at': self.started_at,
+            'stages': dict(sorted((span['name'], round(span['seconds'], 3)) for span in spans)),
+            'spans': [{key: span[key] for key in ('name', 'start', 'seconds', 'thread', 'files', 'bytes')
+                       if key in span} for span in spans],
+            'update_seconds': round(time.perf_counter() - self._origin, 3)
+        }
+
+
+def chrome_trace(performance: Dict[str, Any], process_name: str = 'update_context',
+                 category: str = 'context') -> Dict[str, Any]:
+    """Convert a performance section to Chrome trace-event JSON (complete events)."""
+    origin_us = performance.get('started_at', 0) * 1e6
+    # Spans on the main thread nest inside the whole update
+    threads: Dict[str, int] = {threading.main_thread().name: 1}
+    events: List[Dict[str, Any]] = [
+        {'name': 'process_name', 'ph': 'M', 'pid': 1, 'tid': 0, 'args': {'name': process_name}},
+        {'name': process_name, 'cat': category, 'ph': 'X', 'ts': round(origin_us, 3),
+         'dur': round(performance.get('update_seconds', 0) * 1e6, 3), 'pid': 1, 'tid': 1, 'args': {}}
+    ]
+    for span in performance.get('spans', []):
+        tid = threads.setdefault(span.get('thread', 'main'), len(threads) + 1)
+        events.append({
+            'name': span['name'],
+            'cat': category,
+            'ph': 'X',
+            'ts': round(origin_us + span['start'] * 1e6, 3),
+            'dur': round(span['seconds'] * 1e6, 3),
+            'pid': 1,
+            'tid': tid,
+            'args': {key: span[key] for key in ('files', 'bytes') if key in span}
+        })
+    events.extend({'name': 'thread_name', 'ph': 'M', 'pid': 1, 'tid': tid, 'args': {'name': name}}
+                  for name, tid in threads.items())
+    return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+
+def _label_value(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def openmetrics(performance: Dict[str, Any], labels: Optional[Dict[str, str]] = None,
+                prefix: str = METRIC_PREFIX) -> str:
+    """Render a performance section as OpenMetrics text (gauges, `# EOF` terminated)."""
+    base = ''.join(f'{key}="{_label_value(str(value))}",' for key, value in sorted((labels or {}).items()))
+    spans = performance.get('spans', [])
+    families = [
+        ('phase_duration_seconds', 'Duration of each context update phase', 'seconds', 'seconds'),
+        ('phase_files', 'Files handled by each context update phase', None, 'files'),
+        ('phase_bytes', 'Bytes read or written by each context update phase', 'bytes', 'bytes'),
+    ]
+    lines = []
+    for suffix, help_text, unit, key in families:
+        samples = [span for span in spans if key in span]
+        if not samples:
+            continue
+        name = f'{prefix}_{suffix}'
+        lines.append(f'# TYPE {name} gauge')
+        if unit:
+            lines.append(f'# UNIT {name} {unit}')
+        lines.append(f'# HELP {name} {help_text}.')
+        lines.extend(f'{name}{{{base}phase="{_label_value(span["name"])}"}} {span[key]}'
+                     for span in samples)
+    for suffix, help_text, unit, value in (
+            ('update_duration_seconds', 'Duration of the last context update', 'seconds',
+             performance.get('update_seconds')),
+            ('last_update_timestamp_seconds', 'When the last context update started', 'seconds',
+             performance.get('started_at'))):
+        if value is None:
+            continue
+        name = f'{prefix}_{suffix}'
+        lines.append(f'# TYPE {name} gauge')
+        lines.append(f'# UNIT {name} {unit}')
+        lines.append(f'# HELP {name} {help_text}.')
+        lines.append(f'{name}{{{base.rstrip(",")}}} {value}' if base else f'{name} {value}')
+    lines.append('# EOF')
+    return '\n'.join(lines) + '\n'
+
+
+def _write_atomic(path: Path, text: str):
+    # The textfile collector may read at any moment, so never expose a partial file
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = path.with_name(f'.{path.name}.{os.getpid()}.tmp')
+    with open(tmp_file, 'w') as f:
+        f.write(text)
+    os.replace(tmp_file, path)
+
+
+def write_chrome_trace(path: Path, performance: Dict[str, Any], process_name: str = 'update_context'):
+    _write_atomic(path, json.dumps(chrome_trace(performance, process_name)))
+
+
+def write_openmetrics(path: Path, performance: Dict[str, Any], labels: Optional[Dict[str, str]] = None):
+    _write_atomic(path, openmetrics(performance, labels))
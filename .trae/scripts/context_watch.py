@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+TDD Context Management - Context Watch
+
+Keeps development_context.json current while files are being edited. Changed
+paths come from inotify on Linux (every directory the code scan would enter
+is watched) and from periodic stat polling elsewhere. Bursts of saves are
+debounced into one update, which re-scans only the changed files and runs
+only the tests related to them.
+
+While a watcher is running it records itself in watch.json next to the
+context file, so check_context.py can treat the context as fresh.
+"""
+
+import os
+import json
+import time
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Callable, Set, Tuple
+
+from codebase_scan import IgnoreRules, build_ignore_rules, is_path_ignored, walk_files
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+              | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+EVENT_HEADER = struct.Struct('iIII')
+
+WATCH_BACKENDS = ('auto', 'inotify', 'poll')
+
+
+class InotifyWatcher:
+    """Changed paths under the project from Linux inotify."""
+
+    name = 'inotify'
+
+    def __init__(self, project_root: Path, ignore_rules: Optional[IgnoreRules] = None):
+        self.project_root = project_root
+        self.ignore_rules = ignore_rules or build_ignore_rules()
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        # watch descriptor -> directory relative to the project root
+        self.dirs: Dict[int, str] = {}
+        self.add_watches()
+
+    @classmethod
+    def available(cls) -> bool:
+        try:
+            return hasattr(ctypes.CDLL(ctypes.util.find_library('c')), 'inotify_init1')
+        except OSError:
+            return False
+
+    def add_watches(self):
+        """Watch every directory the code scan would enter.
+
+        Directories already watched keep their watch descriptor, so this is
+        also how directories created later are picked up.
+        """
+        dirs: List[str] = []
+        for _ in walk_files(self.project_root, self.ignore_rules, suffixes=(), dirs=dirs):
+            pass
+        for rel_dir in dirs:
+            wd = self._add_watch(self.fd, os.fsencode(self.project_root / rel_dir), WATCH_MASK)
+            if wd < 0:
+                err = ctypes.get_errno()
+                if err == errno.ENOSPC:
+                    self.close()
+                    raise OSError(err, 'inotify watch limit reached '
+                                       '(raise fs.inotify.max_user_watches)')
+                continue
+            self.dirs[wd] = rel_dir
+
+    def read(self, timeout: Optional[float]) -> Tuple[Set[str], bool]:
+        """Wait up to `timeout` seconds for events.
+
+        Returns the changed relative paths and whether a full rescan is
+        needed (a directory came or went, or the kernel queue overflowed).
+        """
+        changed: Set[str] = set()
+        rescan = False
+        new_dirs = False
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return changed, rescan
+        while True:
+            try:
+                data = os.read(self.fd, 65536)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+                offset += length
+                if mask & IN_Q_OVERFLOW:
+                    rescan = True
+                    continue
+                rel_dir = self.dirs.get(wd)
+                if rel_dir is None:
+                    continue
+                if mask & IN_IGNORED:
+                    del self.dirs[wd]
+                    continue
+                if mask & (IN_DELETE_SELF | IN_MOVE_SELF) or not name:
+                    continue
+                rel_path = f'{rel_dir}/{name}' if rel_dir else name
+                if mask & IN_ISDIR:
+                    # A directory appearing or leaving changes an unknown set of files
+                    new_dirs = new_dirs or bool(mask & (IN_CREATE | IN_MOVED_TO))
+                    rescan = True
+                elif not is_path_ignored(self.project_root, rel_path, self.ignore_rules):
+                    changed.add(rel_path)
+            if len(data) < 65536:
+                break
+        if new_dirs:
+            self.add_watches()
+        return changed, rescan
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """Changed paths found by re-walking the tree and comparing stat results."""
+
+    name = 'poll'
+
+    def __init__(self, project_root: Path, ignore_rules: Optional[IgnoreRules] = None,
+                 interval: float = 2.0):
+        self.project_root = project_root
+        self.ignore_rules = ignore_rules or build_ignore_rules()
+        self.interval = interval
+        self.files = self._snapshot()
+
+    def _snapshot(self) -> Dict[str, Tuple[int, int]]:
+        files = {}
+        for rel_path, entry in walk_files(self.project_root, self.ignore_rules):
+            try:
+                file_stat = entry.stat()
+            except OSError:
+                continue
+            files[rel_path] = (file_stat.st_size, file_stat.st_mtime_ns)
+        return files
+
+    def read(self, timeout: Optional[float]) -> Tuple[Set[str], bool]:
+        time.sleep(self.interval if timeout is None else min(timeout, self.interval))
+        files = self._snapshot()
+        changed = {path for path, key in files.items() if self.files.get(path) != key}
+        changed.update(path for path in self.files if path not in files)
+        self.files = files
+        return changed, False
+
+    def close(self):
+        pass
+
+
+def open_watcher(project_root: Path, backend: str = 'auto',
+                 ignore_patterns: Optional[List[str]] = None,
+                 poll_interval: float = 2.0):
+    """Get a watcher for the project; 'auto' prefers inotify."""
+    ignore_rules = build_ignore_rules(ignore_patterns)
+    if backend in ('auto', 'inotify') and InotifyWatcher.available():
+        try:
+            return InotifyWatcher(project_root, ignore_rules)
+        except OSError:
+            if backend == 'inotify':
+                raise
+    elif backend == 'inotify':
+        raise OSError('inotify is not available on this system')
+    return PollingWatcher(project_root, ignore_rules, poll_interval)
+
+
+def watch_state_file(context_dir: Path) -> Path:
+    return context_dir / 'watch.json'
+
+
+def read_watch_state(context_dir: Path) -> Optional[Dict[str, Any]]:
+    """Get the running watcher's state, or None if no watcher is alive."""
+    try:
+        with open(watch_state_file(context_dir), 'r') as f:
+            state = json.load(f)
+        os.kill(state['pid'], 0)
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    return state
+
+
+def watch_context(updater, backend: str = 'auto', debounce: float = 0.3,
+                  max_delay: float = 5.0, poll_interval: float = 2.0,
+                  ignore_patterns: Optional[List[str]] = None,
+                  on_update: Optional[Callable[[Dict[str, Any], Optional[List[str]]], None]] = None,
+                  stop: Optional[threading.Event] = None):
+    """Update the context whenever files change, until `stop` is set.
+
+    Events are collected until none arrive for `debounce` seconds, or for
+    at most `max_delay` seconds during a steady stream of saves. Each batch
+    becomes one updater.update_context call limited to the changed paths;
+    on_update gets the new context and those paths (None after a rescan).
+    """
+    stop = stop or threading.Event()
+    context_dir = updater.context_file.parent
+    watcher = open_watcher(updater.project_root, backend, ignore_patterns, poll_interval)
+    state_file = watch_state_file(context_dir)
+    with open(state_file, 'w') as f:
+        json.dump({
+            'pid': os.getpid(),
+            'backend': watcher.name,
+            'started_at': datetime.now().isoformat(),
+            'debounce_seconds': debounce
+        }, f, indent=2)
+
+    try:
+        # Catch up on anything changed while no watcher was running
+        context = updater.update_context(changed=True)
+        if on_update:
+            on_update(context, None)
+        pending: Set[str] = set()
+        rescan = False
+        first_event = 0.0
+        while not stop.is_set():
+            timeout = debounce if pending or rescan else 1.0
+            changed, overflow = watcher.read(timeout)
+            if changed or overflow:
+                if not pending and not rescan:
+                    first_event = time.monotonic()
+                pending |= changed
+                rescan = rescan or overflow
+                if time.monotonic() - first_event < max_delay:
+                    continue
+            if not pending and not rescan:
+                continue
+            paths = None if rescan else sorted(pending)
+            pending, rescan = set(), False
+            try:
+                context = updater.update_context(changed=True, paths=paths)
+            except Exception as e:
+                print(f"Error updating context: {e}", flush=True)
+                continue
+            if on_update:
+                on_update(context, paths)
+    finally:
+        watcher.close()
+        try:
+            state_file.unlink()
+        except OSError:
+            pass
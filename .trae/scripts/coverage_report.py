@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+TDD Context Management - Coverage Report
+
+Reads Istanbul coverage-final.json reports (as written by Jest's json
+coverage reporter) into per-file and overall line, statement, function and
+branch coverage. The report is read one file entry at a time, so memory
+use is bounded by the largest single entry rather than the whole report,
+and per-file summaries are cached by a hash of each entry's raw text so an
+unchanged file is neither decoded nor re-aggregated.
+"""
+
+import os
+import re
+import json
+import hashlib
+from pathlib import Path
+from typing import Dict, Iterator, List, Any, Optional, Tuple
+
+CHUNK_SIZE = 1 << 20
+COVERAGE_KINDS = ('lines', 'statements', 'functions', 'branches')
+DEFAULT_REPORT = 'coverage/coverage-final.json'
+
+# Istanbul writes each entry as "<path>": {"path": "<path>", ...}, so an entry
+# ends at the "}" before the next key whose object starts by repeating it
+# (plain quantifiers: possessive ones only compile on Python 3.11+)
+ENTRY_START = re.compile(r'\s*"((?:[^"\\]|\\.)*)"\s*:\s*(\{)\s*"path"\s*:\s*"\1"')
+PATH_VALUE = re.compile(r'"path"\s*:\s*("(?:[^"\\]|\\.)*")')
+JSON_WHITESPACE = ' \t\r\n'
+# Longest entry start (key and repeated path) that can straddle a read boundary
+MAX_BOUNDARY = 2 * 4096 + 64
+
+
+def iter_report_entries(report_file: Path,
+                        chunk_size: int = CHUNK_SIZE) -> Iterator[Tuple[str, str, Any]]:
+    """Yield (file path, raw JSON text, decoded entry) for each file in a report.
+
+    Entries are decoded with JSONDecoder.raw_decode from a sliding buffer.
+    When an entry does not fit yet, at least as much data as is pending is
+    read again, so the retries cost no more than a constant factor.
+    """
+    decoder = json.JSONDecoder()
+    with open(report_file, 'r', encoding='utf-8') as f:
+        buf = ''
+        pos = 0
+        eof = False
+
+        def fill() -> bool:
+            nonlocal buf, pos, eof
+            chunk = f.read(max(chunk_size, len(buf) - pos))
+            buf = buf[pos:] + chunk
+            pos = 0
+            eof = not chunk
+            return bool(chunk)
+
+        def peek() -> str:
+            nonlocal pos
+            while True:
+                while pos < len(buf) and buf[pos] in ' \t\r\n':
+                    pos += 1
+                if pos < len(buf):
+                    return buf[pos]
+                if not fill():
+                    return ''
+
+        def decode() -> Tuple[Any, int, int]:
+            nonlocal pos
+            while True:
+                peek()
+                try:
+                    value, end = decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    if eof or not fill():
+                        raise
+                    continue
+                start = pos
+                pos = end
+                return value, start, end
+
+        if peek() != '{':
+            raise ValueError(f'{report_file} is not a coverage-final.json object')
+        pos += 1
+        while True:
+            token = peek()
+            if token == ',':
+                pos += 1
+                continue
+            if token == '}' or token == '':
+                return
+            key, _, _ = decode()
+            if peek() != ':':
+                raise ValueError(f'{report_file}: expected ":" after {key!r}')
+            pos += 1
+            entry, start, end = decode()
+            yield key, buf[start:end], entry
+
+
+def _skip_back(buf: str, pos: int) -> int:
+    while pos > 0 and buf[pos - 1] in JSON_WHITESPACE:
+        pos -= 1
+    return pos
+
+
+def find_next_entry(buf: str, pos: int) -> Optional[Tuple[int, int]]:
+    """Find the next entry start after `pos` that ENTRY_START would match.
+
+    Returns the offsets of the "}" closing the entry before it and of the
+    quote opening its key. Candidates are found by searching for the
+    "path" key and checking the text before it, which is much faster than
+    trying every "}" in the buffer.
+    """
+    while True:
+        hit = buf.find('"path"', pos)
+        if hit == -1:
+            return None
+        pos = hit + 1
+        value = PATH_VALUE.match(buf, hit)
+        brace = _skip_back(buf, hit) - 1
+        if value is None or brace < 0 or buf[brace] != '{':
+            continue
+        colon = _skip_back(buf, brace) - 1
+        key = value.group(1)
+        key_start = _skip_back(buf, colon) - len(key)
+        if colon < 0 or buf[colon] != ':' or not buf.startswith(key, key_start):
+            continue
+        comma = _skip_back(buf, key_start) - 1
+        close = _skip_back(buf, comma) - 1
+        if comma >= 0 and buf[comma] == ',' and close >= 0 and buf[close] == '}':
+            return close, key_start
+
+
+def iter_report_spans(report_file: Path,
+                      chunk_size: int = CHUNK_SIZE) -> Iterator[Tuple[str, str]]:
+    """Yield (file path, raw JSON text) for each file in a report without decoding it.
+
+    Entry boundaries are found by the repeated path at the start of each
+    entry (see ENTRY_START and find_next_entry). Reports not laid out
+    that way are decoded with iter_report_entries instead.
+    """
+    with open(report_file, 'r', encoding='utf-8') as f:
+        buf = ''
+        eof = False
+
+        def fill(keep: int) -> int:
+            """Read more, dropping buf[:keep]; returns how far offsets moved."""
+            nonlocal buf, eof
+            chunk = f.read(max(chunk_size, len(buf) - keep))
+            buf = buf[keep:] + chunk
+            eof = not chunk
+            return keep
+
+        while not buf.strip() and not eof:
+            fill(len(buf))
+        pos = len(buf) - len(buf.lstrip())
+        if buf[pos:pos + 1] != '{':
+            raise ValueError(f'{report_file} is not a coverage-final.json object')
+        pos += 1
+        first = True
+        while True:
+            match = ENTRY_START.match(buf, pos)
+            while match is None and not eof and len(buf) - pos < MAX_BOUNDARY:
+                pos -= fill(pos)
+                match = ENTRY_START.match(buf, pos)
+            if match is None:
+                break
+            first = False
+            path = json.loads(f'"{match.group(1)}"')
+            start, search_from = match.start(2), match.end()
+            while True:
+                following = find_next_entry(buf, search_from)
+                if following is not None or eof:
+                    break
+                search_from = max(search_from, len(buf) - MAX_BOUNDARY)
+                moved = fill(start)
+                start -= moved
+                search_from -= moved
+            if following is None:
+                end = buf.rstrip().rfind('}')
+                yield path, buf[start:end].rstrip()
+                return
+            yield path, buf[start:following[0] + 1]
+            pos = following[1]
+        rest = buf[pos:].strip()
+
+    if not first:
+        raise ValueError(f'{report_file}: unexpected coverage entry layout')
+    if rest != '}':
+        for path, raw, _ in iter_report_entries(report_file, chunk_size):
+            yield path, raw
+
+
+def summarize_entry(entry: Dict[str, Any]) -> Dict[str, List[int]]:
+    """Compute [covered, total] per coverage kind for one file entry.
+
+    Line coverage follows Istanbul: a line's count is the highest count of
+    the statements starting on it.
+    """
+    statement_map = entry.get('statementMap', {})
+    statement_counts = entry.get('s', {})
+    line_counts: Dict[int, int] = {}
+    for statement_id, count in statement_counts.items():
+        location = statement_map.get(statement_id)
+        if location is None:
+            continue
+        line = location['start']['line']
+        if line_counts.get(line, -1) < count:
+            line_counts[line] = count
+
+    function_counts = entry.get('f', {}).values()
+    branch_counts = [count for counts in entry.get('b', {}).values() for count in counts]
+    return {
+        'lines': [sum(1 for c in line_counts.values() if c > 0), len(line_counts)],
+        'statements': [sum(1 for c in statement_counts.values() if c > 0), len(statement_counts)],
+        'functions': [sum(1 for c in function_counts if c > 0), len(function_counts)],
+        'branches': [sum(1 for c in branch_counts if c > 0), len(branch_counts)]
+    }
+
+
+def percentage(covered: int, total: int) -> float:
+    # Istanbul reports an empty set as fully covered
+    return round(covered / total * 100, 2) if total else 100.0
+
+
+class CoverageCache:
+    """Per-file coverage summaries keyed by a hash of each report entry."""
+
+    VERSION = 1
+
+    def __init__(self, cache_file: Path):
+        self.cache_file = cache_file
+        self.files: Dict[str, List[Any]] = {}
+
+    def load(self):
+        try:
+            with open(self.cache_file, 'r') as f:
+                data = json.load(f)
+        except (json.JSONDecodeError, IOError):
+            return
+        if data.get('version') == self.VERSION:
+            self.files = data.get('files', {})
+
+    def save(self):
+        self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.cache_file.with_suffix('.tmp')
+        with open(tmp_file, 'w') as f:
+            json.dump({'version': self.VERSION, 'files': self.files}, f, separators=(',', ':'))
+        os.replace(tmp_file, self.cache_file)
+
+
+def find_report(project_root: Path, report: Optional[str] = None) -> Optional[Path]:
+    """Locate the coverage-final.json report, if one has been written."""
+    path = project_root / (report or DEFAULT_REPORT)
+    return path if path.is_file() else None
+
+
+def read_coverage(project_root: Path, report_file: Path,
+                  cache: Optional[CoverageCache] = None) -> Dict[str, Any]:
+    """Aggregate a coverage-final.json report into overall and per-file coverage.
+
+    Returns {'report', 'generated_at', 'overall', 'files', 'files_reused',
+    'files_aggregated'}; overall maps each kind to {'covered', 'total',
+    'pct'} and files maps each relative path to [covered, total] per kind.
+    """
+    root = project_root.resolve()
+    previous = cache.files if cache is not None else {}
+    cached_files: Dict[str, List[Any]] = {}
+    files: Dict[str, Dict[str, List[int]]] = {}
+    reused = 0
+
+    for path, raw in iter_report_spans(report_file):
+        try:
+            rel_path = Path(path).resolve().relative_to(root).as_posix()
+        except ValueError:
+            rel_path = path
+        digest = hashlib.blake2b(raw.encode('utf-8'), digest_size=16).hexdigest()
+        hit = previous.get(rel_path)
+        if hit is not None and hit[0] == digest:
+            summary = hit[1]
+            reused += 1
+        else:
+            summary = summarize_entry(json.loads(raw))
+        files[rel_path] = summary
+        cached_files[rel_path] = [digest, summary]
+
+    if cache is not None:
+        cache.files = cached_files
+        cache.save()
+
+    overall = {}
+    for kind in COVERAGE_KINDS:
+        covered = sum(summary[kind][0] for summary in files.values())
+        total = sum(summary[kind][1] for summary in files.values())
+        overall[kind] = {'covered': covered, 'total': total, 'pct': percentage(covered, total)}
+
+    try:
+        report_name = report_file.resolve().relative_to(root).as_posix()
+    except ValueError:
+        report_name = str(report_file)
+    return {
+        'report': report_name,
+        'generated_at': os.path.getmtime(report_file),
+        'overall': overall,
+        'files': dict(sorted(files.items())),
+        'files_reused': reused,
+        'files_aggregated': len(files) - reused
+    }
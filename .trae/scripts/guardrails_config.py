@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+TDD Context Management - Guardrails Configuration
+
+Loads .trae/guardrails/config.yml for the context scripts. PyYAML is optional:
+without it the scripts fall back to their built-in defaults. A loaded config
+is reused while the file's size and mtime are unchanged, so long-running
+callers such as --watch pick up edits.
+"""
+
+import os
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+# path -> ((size, mtime_ns) or None when missing, config)
+_config_cache: Dict[Path, Tuple[Optional[Tuple[int, int]], Dict[str, Any]]] = {}
+
+
+def config_path(project_root: Path) -> Path:
+    """Get the location of the guardrails config for a project."""
+    return Path(project_root) / '.trae' / 'guardrails' / 'config.yml'
+
+
+def parse_guardrails_config(text: str, path: Path) -> Dict[str, Any]:
+    """Parse config.yml text, returning an empty dict if unavailable."""
+    if yaml is None:
+        return {}
+    try:
+        return yaml.safe_load(text) or {}
+    except yaml.YAMLError as e:
+        print(f"Warning: could not load guardrails config {path}: {e}")
+        return {}
+
+
+def load_guardrails_config(project_root: Path) -> Dict[str, Any]:
+    """Load the guardrails config, returning an empty dict if unavailable."""
+    path = config_path(project_root)
+    try:
+        stat = os.stat(path)
+        version: Optional[Tuple[int, int]] = (stat.st_size, stat.st_mtime_ns)
+    except OSError:
+        version = None
+    cached = _config_cache.get(path)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    config: Dict[str, Any] = {}
+    if yaml is not None and version is not None:
+        try:
+            with open(path, 'r') as f:
+                config = parse_guardrails_config(f.read(), path)
+        except IOError as e:
+            print(f"Warning: could not load guardrails config {path}: {e}")
+            config = {}
+
+    _config_cache[path] = (version, config)
+    return config
@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+TDD Context Management - Guardrails Rules
+
+Compiles the stopping points, quality gate criteria and thresholds, and
+monitoring alerts in .trae/guardrails/config.yml into predicates over a
+development context. A compiled rule set is cached by the config file's
+hash, groups its rules by the TDD cycle and gate they apply to, and checks
+a context in one pass over the rules that can apply to it. It can also be
+run over a sequence of contexts, such as the rows of the context history.
+
+Conditions and criteria this module cannot measure from a context (for
+example stakeholder_approval) are left to manual review and not compiled.
+"""
+
+import string
+import hashlib
+from collections import deque
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Callable, Iterable, Iterator, Tuple
+
+from guardrails_config import config_path, parse_guardrails_config, yaml
+
+Facts = Dict[str, Any]
+Predicate = Callable[[Facts], bool]
+
+# Used for any section missing from config.yml (or when PyYAML is unavailable)
+DEFAULT_CONFIG: Dict[str, Any] = {
+    'tdd_framework': {
+        'stopping_points': [
+            {'phase': 'RED', 'condition': 'no_failing_tests', 'action': 'block_progression',
+             'message': 'In RED phase but no failing tests found. Write failing tests first.'},
+            {'phase': 'GREEN', 'condition': 'failing_tests_exist', 'action': 'block_progression',
+             'message': 'In GREEN phase but failing tests exist. Fix failing tests before proceeding.'},
+            {'phase': 'REFACTOR', 'condition': 'failing_tests_exist', 'action': 'block_progression',
+             'severity': 'CRITICAL',
+             'message': 'In REFACTOR phase but failing tests exist. All tests must pass before refactoring.'},
+            {'phase': 'any', 'condition': 'coverage_below_threshold', 'threshold': 80, 'action': 'warn',
+             'message': 'Test coverage is {coverage}%. Target is {threshold}% minimum.'}
+        ]
+    },
+    'quality_gates': {
+        'G1': {'criteria': ['requirements_documented']},
+        'G2': {'criteria': ['architecture_documented']},
+        'G3': {'criteria': ['core_features_implemented']},
+        'G4': {'criteria': ['all_tests_passing']},
+        'G5': {'criteria': ['production_environment_ready']}
+    },
+    'monitoring': {
+        'alerts': [{'condition': 'test_coverage_drop', 'threshold': 5, 'window': 10}]
+    }
+}
+
+ACTION_SEVERITY = {
+    'block_progression': 'HIGH',
+    'block_merge': 'HIGH',
+    'block_deployment': 'CRITICAL',
+    'warn': 'MEDIUM'
+}
+
+# condition -> (issue type, predicate factory taking the config entry)
+STOPPING_CONDITIONS: Dict[str, Tuple[str, Callable[[Dict[str, Any]], Predicate]]] = {
+    'no_failing_tests': ('TDD_VIOLATION', lambda entry: lambda facts: facts['failing_tests'] == 0),
+    'failing_tests_exist': ('TDD_VIOLATION', lambda entry: lambda facts: facts['failing_tests'] > 0),
+    'coverage_below_threshold': ('COVERAGE_LOW', lambda entry: (
+        lambda facts, threshold=entry.get('threshold', 80): facts['coverage'] < threshold))
+}
+
+
+def _gate_flag(gate: str, flag: str) -> Callable[[Dict[str, Any]], Predicate]:
+    return lambda gate_config: lambda facts: not facts['gates'].get(gate, {}).get(flag, False)
+
+
+# criterion -> list of (predicate factory taking the gate config, severity, message);
+# a criterion's checks are tried in order and only the first failing one is reported
+GATE_CRITERIA: Dict[str, List[Tuple[Callable[[Dict[str, Any]], Predicate], str, str]]] = {
+    'requirements_documented': [
+        (_gate_flag('G1', 'requirements_validated'), 'HIGH',
+         '{gate}: Requirements not validated. Complete requirements analysis.')
+    ],
+    'architecture_documented': [
+        (_gate_flag('G2', 'architecture_approved'), 'HIGH',
+         '{gate}: Architecture not approved. Complete architecture design and review.')
+    ],
+    'core_features_implemented': [
+        (lambda gate_config: lambda facts: facts['total_files'] == 0, 'HIGH',
+         '{gate}: No implementation files found. Begin implementation.')
+    ],
+    'unit_tests_passing': [
+        (lambda gate_config: lambda facts: facts['failing_tests'] > 0, 'HIGH',
+         '{gate}: Failing tests exist. Unit tests must pass for {gate} completion.')
+    ],
+    'all_tests_passing': [
+        (lambda gate_config: lambda facts: facts['total_tests'] == 0, 'CRITICAL',
+         '{gate}: No tests found. Implement comprehensive test suite.'),
+        (lambda gate_config: lambda facts: facts['failing_tests'] > 0, 'CRITICAL',
+         '{gate}: Failing tests exist. All tests must pass for {gate} completion.')
+    ],
+    'test_coverage_minimum': [
+        (lambda gate_config: (
+            lambda facts, threshold=gate_config.get('thresholds', {}).get('test_coverage', 80):
+            facts['coverage'] < threshold), 'HIGH',
+         '{gate}: Test coverage is {coverage}%, below the {threshold}% gate minimum.')
+    ],
+    'production_environment_ready': [
+        (_gate_flag('G5', 'deployment_ready'), 'HIGH',
+         '{gate}: Deployment not ready. Complete deployment preparation.')
+    ]
+}
+
+
+def coverage_trend(facts: Facts, window: int) -> Dict[str, Any]:
+    """Compare coverage with the best of the `window` runs before it."""
+    previous = [c for c in facts['previous_coverage'][:window] if c is not None]
+    if not previous or facts['coverage'] is None:
+        return {'coverage_drop': None, 'coverage_baseline': None, 'runs': 0}
+    baseline = max(previous)
+    return {'coverage_drop': round(baseline - facts['coverage'], 2),
+            'coverage_baseline': baseline, 'runs': len(previous)}
+
+
+# condition -> (issue type, predicate factory, message, message details factory)
+ALERT_CONDITIONS: Dict[str, Tuple[str, Callable[..., Predicate], str, Optional[Callable[..., Any]]]] = {
+    'test_coverage_drop': (
+        'COVERAGE_DROP',
+        lambda entry, covered: (
+            lambda facts, threshold=entry.get('threshold', 5), window=entry.get('window', 10):
+            (coverage_trend(facts, window)['coverage_drop'] or 0) >= threshold),
+        'Test coverage dropped {coverage_drop} points to {coverage}% '
+        '(best of last {runs} runs: {coverage_baseline}%).',
+        lambda entry: lambda facts: coverage_trend(facts, entry.get('window', 10))),
+    # Not raised in RED, where failing tests are expected, or in cycles whose
+    # stopping points already report failing tests
+    'failing_tests': (
+        'FAILING_TESTS',
+        lambda entry, covered: (
+            lambda facts, threshold=entry.get('threshold', 1):
+            facts['cycle'] not in covered and facts['failing_tests'] >= threshold),
+        '{failing_tests} failing test(s) block merging.',
+        None)
+}
+
+
+class MessageFormatter(string.Formatter):
+    """Formats rule messages, leaving fields it can't fill as written."""
+
+    def get_field(self, field_name, args, kwargs):
+        try:
+            return super().get_field(field_name, args, kwargs)
+        except (KeyError, IndexError, AttributeError, TypeError):
+            return f'{{{field_name}}}', field_name
+
+    def format_field(self, value, format_spec):
+        try:
+            return super().format_field(value, format_spec)
+        except (ValueError, TypeError):
+            # e.g. a None coverage value under {coverage:.1f}
+            return str(value)
+
+
+def format_message(message: str, values: Dict[str, Any]) -> str:
+    """Fill a configured message template; a malformed one is used as is."""
+    try:
+        return MessageFormatter().vformat(message, (), values)
+    except (ValueError, IndexError):
+        return message
+
+
+class Rule:
+    """One compiled check: a predicate plus the issue it raises."""
+
+    def __init__(self, name: str, issue_type: str, severity: str,
+                 predicate: Predicate, message: str, params: Optional[Dict[str, Any]] = None,
+                 details: Optional[Callable[[Facts], Dict[str, Any]]] = None):
+        self.name = name
+        self.issue_type = issue_type
+        self.severity = severity
+        self.predicate = predicate
+        self.message = message
+        self.params = params or {}
+        # Extra message values, computed only when the rule fires
+        self.details = details
+
+    def issue(self, facts: Facts) -> Dict[str, str]:
+        values = dict(facts)
+        values.update(self.params)
+        if self.details is not None:
+            values.update(self.details(facts))
+        return {
+            'type': self.issue_type,
+            'severity': self.severity,
+            'message': format_message(self.message, values),
+            'rule': self.name
+        }
+
+
+class RuleSet:
+    """Compiled rules, indexed by the cycle or gate they are scoped to."""
+
+    def __init__(self, digest: str, gate_order: List[str], history_window: int):
+        self.digest = digest
+        self.gate_order = gate_order
+        # How many previous coverage values history-based alerts look at
+        self.history_window = history_window
+        # (scope kind, value) -> rules; ('any', '') applies to every context
+        self.scoped: Dict[Tuple[str, str], List[Any]] = {}
+        self.count = 0
+
+    def add(self, scope: Tuple[str, str], rule: Any):
+        self.scoped.setdefault(scope, []).append(rule)
+        self.count += 1
+
+    def evaluate(self, context: Dict[str, Any],
+                 previous_coverage: Optional[List[Optional[float]]] = None) -> List[Dict[str, str]]:
+        """Check a context; previous_coverage lists earlier runs, newest first."""
+        facts = context_facts(context, previous_coverage)
+        issues = []
+        for scope in (('any', ''), ('cycle', facts['cycle']), ('gate', facts['gate'])):
+            for rule in self.scoped.get(scope, ()):
+                # A criterion is a group of rules of which the first failing one counts
+                for check in (rule if isinstance(rule, list) else [rule]):
+                    if check.predicate(facts):
+                        issues.append(check.issue(facts))
+                        break
+        return issues
+
+    def evaluate_many(self, contexts: Iterable[Dict[str, Any]]) -> Iterator[List[Dict[str, str]]]:
+        """Check contexts in recorded order, feeding each the coverage of the ones before it."""
+        previous: deque = deque(maxlen=self.history_window)
+        for context in contexts:
+            yield self.evaluate(context, list(previous))
+            previous.appendleft(context.get('test_status', {}).get('coverage_percentage'))
+
+
+def context_facts(context: Dict[str, Any],
+                  previous_coverage: Optional[List[Optional[float]]] = None) -> Facts:
+    """Flatten the parts of a context the rules look at."""
+    test_status = context.get('test_status', {})
+    return {
+        'cycle': context.get('tdd_cycle', {}).get('current_cycle', 'UNKNOWN'),
+        'gate': context.get('current_gate', 'G1'),
+        'gates': context.get('quality_gates', {}),
+        'total_tests': test_status.get('total_tests', 0),
+        'passing_tests': test_status.get('passing_tests', 0),
+        'failing_tests': test_status.get('failing_tests', 0),
+        'coverage': test_status.get('coverage_percentage', 0),
+        'total_files': context.get('code_metrics', {}).get('total_files', 0),
+        'previous_coverage': previous_coverage or []
+    }
+
+
+def compile_rules(config: Dict[str, Any], digest: str = '') -> RuleSet:
+    """Compile the rule-bearing sections of a guardrails config."""
+    stopping_points = (config.get('tdd_framework') or {}).get(
+        'stopping_points', DEFAULT_CONFIG['tdd_framework']['stopping_points'])
+    gates_config = config.get('quality_gates') or DEFAULT_CONFIG['quality_gates']
+    alerts = (config.get('monitoring') or {}).get('alerts', DEFAULT_CONFIG['monitoring']['alerts'])
+
+    gate_order = [name for name, gate in gates_config.items() if isinstance(gate, dict)]
+    windows = [alert.get('window', 10) for alert in alerts if alert.get('condition') == 'test_coverage_drop']
+    rules = RuleSet(digest, gate_order, max(windows, default=0))
+
+    for index, entry in enumerate(stopping_points):
+        condition = STOPPING_CONDITIONS.get(entry.get('condition'))
+        if condition is None:
+            continue
+        issue_type, factory = condition
+        phase = entry.get('phase', 'any')
+        severity = entry.get('severity') or ACTION_SEVERITY.get(entry.get('action'), 'MEDIUM')
+        rule = Rule(f'stopping_points[{index}].{entry["condition"]}', issue_type, severity,
+                    factory(entry), entry.get('message', entry['condition']),
+                    {'threshold': entry.get('threshold')})
+        rules.add(('any', '') if phase == 'any' else ('cycle', phase), rule)
+
+    for gate in gate_order:
+        gate_config = gates_config[gate]
+        for criterion in gate_config.get('criteria', []):
+            checks = GATE_CRITERIA.get(criterion)
+            if checks is None:
+                continue
+            threshold = gate_config.get('thresholds', {}).get('test_coverage', 80)
+            rules.add(('gate', gate), [
+                Rule(f'quality_gates.{gate}.{criterion}', 'GATE_REQUIREMENT', severity,
+                     factory(gate_config), message, {'gate': gate, 'threshold': threshold})
+                for factory, severity, message in checks])
+
+    failing_cycles = {'RED'} | {entry.get('phase', 'any') for entry in stopping_points
+                                if entry.get('condition') == 'failing_tests_exist'}
+    for entry in alerts:
+        condition = ALERT_CONDITIONS.get(entry.get('condition'))
+        if condition is None:
+            continue
+        issue_type, factory, message, details = condition
+        if entry['condition'] == 'failing_tests' and 'any' in failing_cycles:
+            continue
+        rules.add(('any', ''), Rule(f'monitoring.alerts.{entry["condition"]}', issue_type,
+                                    ACTION_SEVERITY.get(entry.get('action'), 'HIGH'),
+                                    factory(entry, failing_cycles), message,
+                                    {'threshold': entry.get('threshold')},
+                                    details(entry) if details else None))
+    return rules
+
+
+_rules_cache: Dict[str, RuleSet] = {}
+
+
+def load_rules(project_root: Path) -> RuleSet:
+    """Get the compiled rules for a project, compiling only when config.yml changed."""
+    path = config_path(project_root)
+    try:
+        raw = path.read_bytes()
+    except OSError:
+        raw = b''
+    # Without PyYAML the same file compiles to the defaults
+    digest = hashlib.blake2b(raw + (b'' if yaml is not None else b'\0no-yaml'),
+                             digest_size=16).hexdigest()
+    if digest not in _rules_cache:
+        config = parse_guardrails_config(raw.decode('utf-8', errors='replace'), path) if raw else {}
+        _rules_cache[digest] = compile_rules(config, digest)
+    return _rules_cache[digest]
@@ -0,0 +1,128 @@
+/**
+ * Warm Jest daemon used by .trae/scripts/update_context.py --daemon.
+ *
+ * Keeps Jest (and its transformers) loaded in one long-lived process and runs
+ * tests on request over a Unix socket, streaming results back in the same
+ * marked-line format as jest_stream_reporter.cjs, followed by an exit line
+ * carrying the status `jest` would exit with. Requests are run one at a time,
+ * each with Jest's usual worker processes. The daemon exits after an idle
+ * timeout or when asked to shut down, and does not start if another daemon
+ * is already listening on the socket.
+ *
+ * Usage: node jest_daemon.cjs <project_root> <socket_path> <idle_seconds>
+ */
+
+const fs = require('fs');
+const net = require('net');
+const path = require('path');
+
+const { MARKER } = require('./jest_stream_reporter.cjs');
+
+const [projectRoot, socketPath, idleSeconds] = process.argv.slice(2);
+const idleMs = Number(idleSeconds || 900) * 1000;
+const reporterPath = path.join(__dirname, 'jest_stream_reporter.cjs');
+
+const { runCLI } = require(require.resolve('jest', { paths: [projectRoot] }));
+
+let queue = Promise.resolve();
+let idleTimer = null;
+
+function resetIdleTimer() {
+  clearTimeout(idleTimer);
+  idleTimer = setTimeout(shutdown, idleMs);
+}
+
+function shutdown() {
+  server.close();
+  try {
+    fs.unlinkSync(socketPath);
+  } catch (error) {
+    // Already removed
+  }
+  process.exit(0);
+}
+
+async function runTests(request, socket) {
+  clearTimeout(idleTimer);
+  const argv = {
+    $0: 'jest',
+    _: request.files || [],
+    findRelatedTests: Boolean(request.findRelatedTests),
+    passWithNoTests: Boolean(request.passWithNoTests),
+    silent: true,
+    reporters: [reporterPath]
+  };
+  if (request.config) {
+    argv.config = request.config;
+  }
+  if (request.bail) {
+    argv.bail = 1;
+  }
+
+  global.__traeJestSink = (line) => {
+    if (!socket.destroyed) {
+      socket.write(line);
+    }
+  };
+  try {
+    const { results } = await runCLI(argv, [projectRoot]);
+    if (!socket.destroyed) {
+      socket.write(MARKER + JSON.stringify({ type: 'exit', code: results.success ? 0 : 1 }) + '\n');
+    }
+  } catch (error) {
+    const message = error && error.message ? error.message : String(error);
+    if (!socket.destroyed) {
+      socket.write(MARKER + JSON.stringify({ type: 'error', message }) + '\n');
+    }
+  } finally {
+    global.__traeJestSink = null;
+    socket.end();
+  }
+}
+
+const server = net.createServer((socket) => {
+  let buffer = '';
+  socket.setEncoding('utf8');
+  socket.on('error', () => {});
+  socket.on('data', (chunk) => {
+    buffer += chunk;
+    const newline = buffer.indexOf('\n');
+    if (newline === -1) {
+      return;
+    }
+    let request;
+    try {
+      request = JSON.parse(buffer.slice(0, newline));
+    } catch (error) {
+      socket.end();
+      return;
+    }
+    buffer = '';
+
+    if (request.type === 'ping') {
+      socket.end(JSON.stringify({ type: 'pong', pid: process.pid }) + '\n');
+    } else if (request.type === 'shutdown') {
+      socket.end();
+      shutdown();
+    } else {
+      queue = queue.then(() => runTests(request, socket)).then(resetIdleTimer);
+    }
+  });
+});
+
+// Only a socket nobody answers on is stale and may be replaced
+const probe = net.connect(socketPath);
+probe.on('connect', () => {
+  probe.destroy();
+  console.error(`A Jest daemon is already listening on ${socketPath}`);
+  process.exit(0);
+});
+probe.on('error', () => {
+  try {
+    fs.unlinkSync(socketPath);
+  } catch (error) {
+    // No stale socket
+  }
+  server.listen(socketPath, resetIdleTimer);
+  process.on('SIGTERM', shutdown);
+});
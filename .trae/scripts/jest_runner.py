@@ -0,0 +1,651 @@
+#!/usr/bin/env python3
+"""
+TDD Context Management - Jest Runner
+
+Runs the project's Jest suite for update_context.py, streaming results from a
+custom reporter as each test file finishes, and keeps them per test file
+under test_status['suites'] so a run covering only some test files can be
+merged into the previous results. Tests can also run split into parallel
+Jest shards, or in a warm, long-lived Jest daemon (jest_daemon.cjs) reached
+over a Unix socket.
+
+Results are also cached under a key derived from the content of every file
+under the test roots (sources, tests, snapshots, fixtures and mocks) plus the
+package, lockfile, Jest config and .env files, so an update with no relevant
+changes reuses the previous results instead of running Jest.
+"""
+
+import os
+import json
+import time
+import shlex
+import signal
+import socket
+import hashlib
+import tempfile
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Callable
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+JEST_TIMEOUT = 300
+
+# A change to any of these can affect every test, so --changed runs the full suite.
+GLOBAL_TEST_INPUTS = {
+    'package.json',
+    'package-lock.json',
+    'pnpm-lock.yaml',
+    'yarn.lock',
+    'jest.config.cjs',
+    'jest.config.js',
+    'jest.config.ts',
+    'tsconfig.json',
+    'babel.config.js',
+    'babel.config.cjs',
+    '.babelrc',
+    '.env',
+    '.env.test',
+    '.env.local',
+    '.env.test.local',
+}
+
+# Where tests read non-source files from (snapshots, fixtures, mocks, config)
+# when test_cache.roots is not set; the cache key digests only these.
+DEFAULT_TEST_INPUT_ROOTS = ['src', 'test', 'tests', '__tests__', '__mocks__', '__fixtures__',
+                            'fixtures', 'config']
+
+
+def _git(project_root: Path, args: List[str]) -> Optional[bytes]:
+    try:
+        result = subprocess.run(['git'] + args, cwd=project_root, capture_output=True)
+    except OSError:
+        return None
+    return result.stdout if result.returncode == 0 else None
+
+
+def git_head(project_root: Path) -> Optional[str]:
+    """Get the commit checked out in project_root, if it is a git checkout."""
+    output = _git(project_root, ['rev-parse', 'HEAD'])
+    return output.decode().strip() if output else None
+
+
+def changed_files_since(project_root: Path, commit: str) -> Optional[List[str]]:
+    """List files changed since `commit`, including uncommitted and untracked ones.
+
+    Paths are relative to project_root. Returns None if git cannot tell.
+    """
+    diff = _git(project_root, ['diff', '--name-only', '-z', '--relative', commit])
+    untracked = _git(project_root, ['ls-files', '-z', '--others', '--exclude-standard'])
+    if diff is None or untracked is None:
+        return None
+    paths = {os.fsdecode(p) for p in (diff + untracked).split(b'\0') if p}
+    return sorted(paths)
+
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+REPORTER_FILE = SCRIPTS_DIR / 'jest_stream_reporter.cjs'
+DAEMON_FILE = SCRIPTS_DIR / 'jest_daemon.cjs'
+REPORTER_MARKER = '@@trae-jest@@ '
+
+
+def _relative_test_path(name: str, project_root: Path) -> str:
+    try:
+        return Path(name).resolve().relative_to(project_root.resolve()).as_posix()
+    except ValueError:
+        return name
+
+
+def _pid_alive(pid: Any) -> bool:
+    if not isinstance(pid, int) or pid <= 0:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+
+def _kill_process_group(process: subprocess.Popen):
+    try:
+        if os.name == 'posix':
+            os.killpg(process.pid, signal.SIGTERM)
+        else:
+            process.kill()
+    except OSError:
+        pass
+
+
+class _Watchdog:
+    """Calls `stop` when the timeout passes or the `cancel` event is set."""
+
+    def __init__(self, timeout: float, cancel: Optional[threading.Event],
+                 stop: Callable[[], None]):
+        self.timed_out = False
+        self.cancelled = False
+        self._cancel = cancel
+        self._finished = threading.Event()
+        self._thread = threading.Thread(target=self._watch, args=(timeout, stop), daemon=True)
+        self._thread.start()
+
+    def _watch(self, timeout: float, stop: Callable[[], None]):
+        deadline = time.monotonic() + timeout
+        while not self._finished.wait(0.05):
+            if self._cancel is not None and self._cancel.is_set():
+                self.cancelled = True
+            elif time.monotonic() >= deadline:
+                self.timed_out = True
+            else:
+                continue
+            stop()
+            return
+
+    def finish(self):
+        self._finished.set()
+        self._thread.join()
+
+
+class _EventIngester:
+    """Accumulates per-suite results from the reporter's marked lines."""
+
+    def __init__(self, project_root: Path, stop_on_failure: bool,
+                 on_progress: Optional[Callable[[Dict[str, int]], None]]):
+        self.project_root = project_root
+        self.stop_on_failure = stop_on_failure
+        self.on_progress = on_progress
+        self.suites: Dict[str, Dict[str, Any]] = {}
+        self.reported = False
+        self.complete = False
+        self.stopped_early = False
+        self.error: Optional[str] = None
+        # Only the daemon reports one; a process's exit status is used otherwise
+        self.exit_code: Optional[int] = None
+
+    def feed(self, line: str) -> bool:
+        """Handle one output line; return False once the run should stop."""
+        if not line.startswith(REPORTER_MARKER):
+            return True
+        try:
+            event = json.loads(line[len(REPORTER_MARKER):])
+        except json.JSONDecodeError:
+            return True
+        self.reported = True
+
+        if event.get('type') == 'case':
+            if self.stop_on_failure and event.get('status') == 'failed':
+                rel_path = _relative_test_path(event.get('file', ''), self.project_root)
+                suite = self.suites.setdefault(rel_path, {'status': 'failed', 'tests': {}})
+                suite['status'] = 'failed'
+                suite['tests'][event.get('fullName', '')] = 'failed'
+                self.stopped_early = True
+                return False
+        elif event.get('type') == 'suite':
+            rel_path = _relative_test_path(event.get('file', ''), self.project_root)
+            self.suites[rel_path] = {
+                'status': event.get('status', 'failed'),
+                'tests': {t.get('fullName', ''): t.get('status', 'failed')
+                          for t in event.get('tests', [])}
+            }
+            if self.on_progress is not None:
+                self.on_progress(dict(summarize_suites(self.suites), suites_finished=len(self.suites)))
+            if self.stop_on_failure and event.get('status') == 'failed':
+                self.stopped_early = True
+                return False
+        elif event.get('type') == 'complete':
+            self.complete = True
+        elif event.get('type') == 'exit':
+            self.exit_code = event.get('code')
+        elif event.get('type') == 'error':
+            self.error = event.get('message', 'unknown error')
+        return True
+
+    def result(self, returncode: int, stderr: str, cancelled: bool = False) -> Dict[str, Any]:
+        return {
+            'returncode': returncode,
+            'stderr': stderr if self.error is None else f'{stderr}{self.error}',
+            'suites': self.suites if self.reported and self.error is None else None,
+            'complete': self.complete and not cancelled,
+            'stopped_early': self.stopped_early,
+            'cancelled': cancelled
+        }
+
+
+def run_jest(project_root: Path, jest_args: Optional[List[str]] = None,
+             timeout: int = JEST_TIMEOUT, stop_on_failure: bool = False,
+             on_progress: Optional[Callable[[Dict[str, int]], None]] = None,
+             cancel: Optional[threading.Event] = None) -> Dict[str, Any]:
+    """Run `npm test` and ingest results as each test file finishes.
+
+    A small reporter (jest_stream_reporter.cjs) writes one marked JSON line
+    per finished test case and file; these are parsed while Jest is running
+    and `on_progress` is called with running totals after every file. With
+    stop_on_failure, the run is killed at the first failing test. Setting
+    `cancel` from another thread kills the run as well.
+
+    Returns {'returncode', 'stderr', 'suites', 'complete', 'stopped_early',
+    'cancelled'}; suites is None when no results were reported. Raises
+    subprocess.TimeoutExpired on timeout.
+    """
+    stderr_file = tempfile.TemporaryFile(mode='w+')
+    process = subprocess.Popen(
+        ['npm', 'test', '--', f'--reporters={REPORTER_FILE}'] + list(jest_args or []),
+        cwd=project_root,
+        stdout=subprocess.PIPE,
+        stderr=stderr_file,
+        text=True,
+        start_new_session=True
+    )
+    watchdog = _Watchdog(timeout, cancel, lambda: _kill_process_group(process))
+
+    ingester = _EventIngester(project_root, stop_on_failure, on_progress)
+    try:
+        for line in process.stdout:
+            if not ingester.feed(line):
+                _kill_process_group(process)
+                break
+    finally:
+        process.stdout.close()
+        returncode = process.wait()
+        watchdog.finish()
+
+    if watchdog.timed_out:
+        raise subprocess.TimeoutExpired(process.args, timeout)
+
+    stderr_file.seek(0)
+    stderr = stderr_file.read()
+    stderr_file.close()
+    return ingester.result(returncode, stderr, watchdog.cancelled)
+
+
+def _shard_status(run: Dict[str, Any], timed_out: bool, stopped: bool) -> str:
+    if timed_out:
+        return 'timed_out'
+    if run['stopped_early']:
+        return 'stopped_early'
+    if run['cancelled']:
+        return 'stopped' if stopped else 'cancelled'
+    if run['suites'] is None or not run['complete']:
+        return 'crashed'
+    failed = any(suite['status'] == 'failed' for suite in run['suites'].values())
+    return 'failed' if failed else 'passed'
+
+
+def run_jest_sharded(project_root: Path, jest_args: Optional[List[str]] = None,
+                     shards: Optional[int] = None, timeout: int = JEST_TIMEOUT,
+                     stop_on_failure: bool = False,
+                     on_progress: Optional[Callable[[Dict[str, int]], None]] = None,
+                     cancel: Optional[threading.Event] = None) -> Dict[str, Any]:
+    """Run `npm test` as parallel processes, each taking one Jest --shard.
+
+    `shards` defaults to the CPU count, and Jest's own workers are split
+    between the shards so the machine is not oversubscribed. `on_progress`
+    gets totals summed across shards. With stop_on_failure, a failing test
+    in any shard stops all of them.
+
+    Returns the same keys as run_jest, with suites merged from every shard
+    that reported, plus 'shards': one entry per shard with its status
+    ('passed', 'failed', 'stopped_early', 'stopped', 'cancelled',
+    'timed_out' or 'crashed'). A shard that times out or crashes leaves the
+    run incomplete rather than raising, so the other shards' results are
+    kept; TimeoutExpired is only raised if every shard timed out.
+    """
+    cpus = os.cpu_count() or 1
+    shards = max(1, shards or cpus)
+    shard_args = ['--passWithNoTests', f'--maxWorkers={max(1, cpus // shards)}']
+
+    # Set when the caller cancels or, with stop_on_failure, a shard fails
+    stop = threading.Event()
+    relay = _Watchdog(float('inf'), cancel, stop.set)
+    progress_lock = threading.Lock()
+    shard_progress: Dict[int, Dict[str, int]] = {}
+
+    def shard_progress_callback(index: int) -> Optional[Callable[[Dict[str, int]], None]]:
+        if on_progress is None:
+            return None
+
+        def report(totals: Dict[str, int]):
+            with progress_lock:
+                shard_progress[index] = totals
+                combined: Dict[str, int] = {}
+                for shard_totals in shard_progress.values():
+                    for name, value in shard_totals.items():
+                        combined[name] = combined.get(name, 0) + value
+                on_progress(combined)
+        return report
+
+    def run_shard(index: int) -> Dict[str, Any]:
+        shard = f'{index}/{shards}'
+        started = time.monotonic()
+        run, timed_out, error = None, False, None
+        try:
+            run = run_jest(project_root, list(jest_args or []) + shard_args + [f'--shard={shard}'],
+                           timeout=timeout, stop_on_failure=stop_on_failure,
+                           on_progress=shard_progress_callback(index), cancel=stop)
+        except subprocess.TimeoutExpired:
+            timed_out = True
+            error = f'timed out after {timeout}s'
+        except OSError as e:
+            error = f'could not start: {e}'
+        if run is None:
+            run = {'returncode': None, 'stderr': '', 'suites': None, 'complete': False,
+                   'stopped_early': False, 'cancelled': False}
+        elif run['stopped_early']:
+            stop.set()
+        run['shard'] = {
+            'shard': shard,
+            'status': _shard_status(run, timed_out, stop.is_set()),
+            'returncode': run['returncode'],
+            'suites': len(run['suites'] or {}),
+            'seconds': round(time.monotonic() - started, 3)
+        }
+        if error is None and run['shard']['status'] == 'crashed':
+            error = f'exited with code {run["returncode"]} before finishing'
+        if error is not None:
+            run['shard']['error'] = error
+        return run
+
+    with ThreadPoolExecutor(max_workers=shards) as pool:
+        runs = list(pool.map(run_shard, range(1, shards + 1)))
+    relay.finish()
+
+    if all(run['shard']['status'] == 'timed_out' for run in runs):
+        raise subprocess.TimeoutExpired(['npm', 'test'], timeout)
+    return merge_shard_runs(runs, relay.cancelled)
+
+
+def merge_shard_runs(runs: List[Dict[str, Any]], cancelled: bool = False) -> Dict[str, Any]:
+    """Combine the run_jest results of every shard, each with its 'shard' entry.
+
+    Suites are merged from the shards that reported; the run is complete
+    only if every shard finished, and its return code is the worst one.
+    """
+    reported = [run['suites'] for run in runs if run['suites'] is not None]
+    suites: Optional[Dict[str, Dict[str, Any]]] = None
+    if reported:
+        suites = {}
+        for shard_suites in reported:
+            suites.update(shard_suites)
+    stderr = ''.join(f'[shard {run["shard"]["shard"]}]\n{run["stderr"]}'
+                     for run in runs if run['stderr'])
+    return {
+        'returncode': max((run['returncode'] for run in runs if run['returncode'] is not None),
+                          default=None),
+        'stderr': stderr,
+        'suites': suites,
+        'complete': all(run['complete'] for run in runs),
+        'stopped_early': any(run['stopped_early'] for run in runs),
+        'cancelled': cancelled,
+        'shards': [run['shard'] for run in runs]
+    }
+
+
+def jest_config_path(project_root: Path) -> Optional[str]:
+    """Get the --config passed by the package.json test script, if any."""
+    try:
+        with open(project_root / 'package.json', 'r') as f:
+            command = json.load(f).get('scripts', {}).get('test', '')
+        args = shlex.split(command)
+    except (json.JSONDecodeError, IOError, ValueError):
+        return None
+    for i, arg in enumerate(args):
+        if arg in ('--config', '-c') and i + 1 < len(args):
+            return str(project_root / args[i + 1])
+        if arg.startswith('--config='):
+            return str(project_root / arg.split('=', 1)[1])
+    return None
+
+
+class JestDaemon:
+    """Client for the warm Jest daemon in jest_daemon.cjs.
+
+    The daemon is started on first use and records its pid and a fingerprint
+    of the global test inputs in `info_file`. If the fingerprint no longer
+    matches (package, lockfile or Jest config changed) it is restarted. It
+    stops itself after `idle_timeout` seconds without requests.
+
+    Starting is serialized by a lock file, and a daemon whose pid is alive
+    but does not answer is left alone rather than replaced, so a second
+    daemon never takes over a live one's socket. When no daemon can be used
+    (node missing, Jest not installed, daemon busy) ensure_running returns
+    False and the tests run through npm instead.
+    """
+
+    START_TIMEOUT = 30
+
+    def __init__(self, project_root: Path, state_dir: Path, idle_timeout: int = 900):
+        self.project_root = project_root
+        self.info_file = state_dir / 'jest_daemon.json'
+        self.log_file = state_dir / 'jest_daemon.log'
+        self.lock_file = state_dir / 'jest_daemon.lock'
+        self.idle_timeout = idle_timeout
+        # Unix socket paths are limited to ~100 bytes, so keep it out of the project
+        root_id = hashlib.blake2b(str(project_root.resolve()).encode(), digest_size=8).hexdigest()
+        self.socket_path = Path(tempfile.gettempdir()) / f'trae-jest-{root_id}.sock'
+
+    def fingerprint(self) -> str:
+        """Hash of everything that requires a fresh daemon when it changes."""
+        key = test_inputs_key(self.project_root, {})
+        return f'{key}:{DAEMON_FILE.stat().st_mtime_ns}:{REPORTER_FILE.stat().st_mtime_ns}'
+
+    def _connect(self, timeout: Optional[float] = None) -> socket.socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(timeout)
+        try:
+            sock.connect(str(self.socket_path))
+        except OSError:
+            sock.close()
+            raise
+        return sock
+
+    def _send(self, request: Dict[str, Any], timeout: float = 2) -> Optional[str]:
+        try:
+            with self._connect(timeout) as sock:
+                sock.sendall((json.dumps(request) + '\n').encode())
+                return sock.makefile('r').read()
+        except OSError:
+            return None
+
+    def is_running(self) -> bool:
+        return self._send({'type': 'ping'}) is not None
+
+    def _load_info(self) -> Dict[str, Any]:
+        try:
+            with open(self.info_file, 'r') as f:
+                return json.load(f)
+        except (json.JSONDecodeError, IOError):
+            return {}
+
+    def stop(self):
+        """Ask a running daemon to shut down."""
+        self._send({'type': 'shutdown'})
+        self.info_file.unlink(missing_ok=True)
+
+    def ensure_running(self) -> bool:
+        """Start the daemon if needed, restarting it if its inputs changed."""
+        with open(self.lock_file, 'w') as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            return self._ensure_running()
+
+    def _ensure_running(self) -> bool:
+        fingerprint = self.fingerprint()
+        if self.is_running():
+            if self._load_info().get('fingerprint') == fingerprint:
+                return True
+            self.stop()
+        elif self.socket_path.exists() and _pid_alive(self._load_info().get('pid')):
+            # Busy or hung: starting another would unlink its socket
+            return False
+
+        try:
+            with open(self.log_file, 'a') as log:
+                process = subprocess.Popen(
+                    ['node', str(DAEMON_FILE), str(self.project_root), str(self.socket_path),
+                     str(self.idle_timeout)],
+                    cwd=self.project_root,
+                    stdin=subprocess.DEVNULL,
+                    stdout=log,
+                    stderr=log,
+                    start_new_session=True
+                )
+        except OSError:
+            return False
+
+        deadline = time.monotonic() + self.START_TIMEOUT
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                return False
+            if self.is_running():
+                with open(self.info_file, 'w') as f:
+                    json.dump({'pid': process.pid, 'fingerprint': fingerprint,
+                               'socket': str(self.socket_path),
+                               'started': time.time()}, f, indent=2)
+                return True
+            time.sleep(0.05)
+        _kill_process_group(process)
+        return False
+
+    def run(self, jest_args: Optional[List[str]] = None, timeout: int = JEST_TIMEOUT,
+            stop_on_failure: bool = False,
+            on_progress: Optional[Callable[[Dict[str, int]], None]] = None,
+            cancel: Optional[threading.Event] = None) -> Dict[str, Any]:
+        """Run tests in the daemon; same arguments and result as run_jest.
+
+        Only the arguments run_tests builds are understood: --passWithNoTests
+        and --findRelatedTests followed by file paths.
+        """
+        args = list(jest_args or [])
+        request = {
+            'type': 'run',
+            'config': jest_config_path(self.project_root),
+            'passWithNoTests': '--passWithNoTests' in args,
+            'findRelatedTests': '--findRelatedTests' in args,
+            'files': [a for a in args if not a.startswith('--')],
+            'bail': stop_on_failure
+        }
+
+        ingester = _EventIngester(self.project_root, stop_on_failure, on_progress)
+        with self._connect() as sock:
+            def disconnect():
+                try:
+                    sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+
+            watchdog = _Watchdog(timeout, cancel, disconnect)
+            try:
+                sock.sendall((json.dumps(request) + '\n').encode())
+                for line in sock.makefile('r'):
+                    if not ingester.feed(line):
+                        break
+            except OSError:
+                pass
+            finally:
+                watchdog.finish()
+
+        if watchdog.timed_out:
+            raise subprocess.TimeoutExpired(['jest-daemon'], timeout)
+        returncode = ingester.exit_code
+        if returncode is None:
+            failed = any(suite['status'] == 'failed' for suite in ingester.suites.values())
+            returncode = 1 if failed or ingester.error is not None else 0
+        return ingester.result(returncode, '', watchdog.cancelled)
+
+
+def summarize_suites(suites: Dict[str, Dict[str, Any]]) -> Dict[str, int]:
+    """Compute whole-suite totals from per-suite results."""
+    totals = {
+        'total_tests': 0,
+        'passing_tests': 0,
+        'failing_tests': 0,
+        'pending_tests': 0,
+        'failing_suites': 0
+    }
+    for suite in suites.values():
+        if suite.get('status') == 'failed':
+            totals['failing_suites'] += 1
+        for status in suite.get('tests', {}).values():
+            totals['total_tests'] += 1
+            if status == 'passed':
+                totals['passing_tests'] += 1
+            elif status == 'failed':
+                totals['failing_tests'] += 1
+            else:
+                totals['pending_tests'] += 1
+    return totals
+
+
+def test_inputs_key(project_root: Path, source_digests: Dict[str, str]) -> str:
+    """Hash everything a test run depends on into a cache key.
+
+    `source_digests` maps each source, test and fixture file to a content
+    digest (as kept by the code scan manifest and digest_other_files). The
+    global test inputs are hashed here.
+    """
+    key = hashlib.blake2b(digest_size=20)
+    key.update(b'test-inputs-v2\0')
+    for name in sorted(GLOBAL_TEST_INPUTS):
+        path = project_root / name
+        if path.is_file():
+            key.update(f'{name}\0'.encode())
+            key.update(hashlib.blake2b(path.read_bytes(), digest_size=16).digest())
+    for rel_path in sorted(source_digests):
+        key.update(f'{rel_path}\0{source_digests[rel_path]}\n'.encode())
+    return key.hexdigest()
+
+
+class TestResultCache:
+    """Test results stored as one JSON file per inputs key, evicted LRU."""
+
+    def __init__(self, cache_dir: Path, max_entries: int = 20, max_age_days: float = 14):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_age_days = max_age_days
+
+    def _entry_file(self, key: str) -> Path:
+        return self.cache_dir / f'{key}.json'
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Get the cached test_status for a key, refreshing its LRU position."""
+        entry_file = self._entry_file(key)
+        try:
+            with open(entry_file, 'r') as f:
+                results = json.load(f)
+        except (json.JSONDecodeError, IOError):
+            return None
+        os.utime(entry_file)
+        return results
+
+    def put(self, key: str, results: Dict[str, Any]):
+        """Store test results for a key and apply the eviction limits."""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        entry_file = self._entry_file(key)
+        tmp_file = entry_file.with_suffix('.tmp')
+        with open(tmp_file, 'w') as f:
+            json.dump(results, f, separators=(',', ':'))
+        os.replace(tmp_file, entry_file)
+        self.evict()
+
+    def evict(self):
+        """Drop entries older than max_age_days, then the least recently used."""
+        entries = []
+        cutoff = time.time() - self.max_age_days * 86400
+        for entry_file in self.cache_dir.glob('*.json'):
+            try:
+                mtime = entry_file.stat().st_mtime
+            except OSError:
+                continue
+            if mtime < cutoff:
+                entry_file.unlink(missing_ok=True)
+            else:
+                entries.append((mtime, entry_file))
+        entries.sort(reverse=True)
+        for _, entry_file in entries[self.max_entries:]:
+            entry_file.unlink(missing_ok=True)
@@ -0,0 +1,55 @@
+/**
+ * Jest reporter used by .trae/scripts/update_context.py.
+ *
+ * Writes one JSON line per finished test case and test file to stdout,
+ * prefixed with a marker so the Python side can pick them out of npm's and
+ * the tests' own output while the run is still in progress. When running
+ * inside jest_daemon.cjs the lines go to the daemon's client socket instead.
+ */
+
+const MARKER = '@@trae-jest@@ ';
+
+function emit(event) {
+  const line = MARKER + JSON.stringify(event) + '\n';
+  if (typeof global.__traeJestSink === 'function') {
+    global.__traeJestSink(line);
+  } else {
+    process.stdout.write(line);
+  }
+}
+
+class TraeStreamReporter {
+  onTestCaseResult(test, testCaseResult) {
+    emit({
+      type: 'case',
+      file: test.path,
+      fullName: testCaseResult.fullName,
+      status: testCaseResult.status
+    });
+  }
+
+  onTestResult(test, testResult) {
+    const failed = testResult.numFailingTests > 0 || Boolean(testResult.testExecError);
+    emit({
+      type: 'suite',
+      file: testResult.testFilePath,
+      status: failed ? 'failed' : 'passed',
+      tests: testResult.testResults.map((result) => ({
+        fullName: result.fullName,
+        status: result.status
+      }))
+    });
+  }
+
+  onRunComplete(contexts, results) {
+    emit({
+      type: 'complete',
+      numTotalTests: results.numTotalTests,
+      numPassedTests: results.numPassedTests,
+      numFailedTests: results.numFailedTests
+    });
+  }
+}
+
+module.exports = TraeStreamReporter;
+module.exports.MARKER = MARKER;
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+TDD Context Management - Prohibited Patterns
+
+Enforces consistency_rules.prohibited_patterns from the guardrails config.
+Every configured pattern with a detector becomes one named group of a single
+combined bytes regex, which the codebase scan runs over the chunks it already
+reads to count lines, so each file is read and searched once. large_components
+needs no regex: it is checked against the line count of the same pass.
+
+Detectors only match within a line. A pattern entry may give its own `regex`
+(and `applies_to`: all, production, tests or components) to override or add
+a detector. Each regex is compiled on its own first; one that is invalid,
+matches empty text, or uses named groups or backreferences (which would
+clash in the combined regex) is skipped with a warning.
+
+Matches do not overlap: where two patterns match the same text, only the
+one listed first in the config is reported there.
+"""
+
+import re
+import json
+import hashlib
+from typing import Dict, List, Any, Optional, Pattern, Tuple
+
+from codebase_scan import file_contributions
+
+ENFORCEMENT_SEVERITY = {
+    'error': 'HIGH',
+    'warning': 'MEDIUM'
+}
+
+# Directories whose files are test code even without test/spec in the name
+TEST_DIRS = {'__tests__', '__mocks__', 'test', 'tests', 'fixtures'}
+
+# pattern -> (which files it applies to, regex source or None)
+DETECTORS: Dict[str, Tuple[str, Optional[str]]] = {
+    'large_components': ('components', None),
+    'skipped_tests': (
+        'tests',
+        # A comment on the same line counts as the justification for the skip
+        r'\b(?:(?:describe|it|test)\.(?:skip|todo)|x(?:describe|it|test))\s*\((?![^\n]*(?://|/\*))'
+    ),
+    'hardcoded_values': (
+        'production',
+        r'https?://(?:localhost|127\.0\.0\.1|0\.0\.0\.0|(?:\d{1,3}\.){3}\d{1,3})\b'
+        r'|\b(?i:api_?key|secret|password|passwd|access_?token|auth_?token)\b[\'"]?\s*[:=]\s*'
+        r'[\'"][^\'"\n]{6,}[\'"]'
+    ),
+    'mock_data_in_production': (
+        'production',
+        r'\b(?:from|require\()\s*[\'"](?:@faker-js/faker|faker|msw)[\'"]'
+        r'|\b(?:mock|fake|dummy)(?:Data|Users?|Items?|Responses?|Products?|Orders?)\b'
+    ),
+    'direct_database_access': (
+        'components',
+        r'\bsupabase\s*\.\s*(?:from|rpc)\s*\('
+        r'|\b(?:createClient|createPool|createConnection)\s*\('
+        r'|\bfrom\s+[\'"](?:pg|mysql2?|mongodb|mongoose|@prisma/client|knex|sqlite3)[\'"]'
+        r'|[\'"`]\s*(?:SELECT\s[^\'"`\n]*\sFROM|INSERT\s+INTO|UPDATE\s+\w+\s+SET|DELETE\s+FROM)\b'
+    )
+}
+
+APPLIES_TO = ('all', 'production', 'tests', 'components')
+
+# Group references that would point elsewhere once regexes are combined
+GROUP_REFERENCE = re.compile(r'\\\\|(\\[1-9]|\(\?\(\d|\(\?P=)')
+
+
+def check_regex(regex: Any) -> Optional[str]:
+    """Get why a pattern's regex can't join the combined matcher, or None if it can."""
+    if not isinstance(regex, str):
+        return 'regex must be a string'
+    try:
+        # Grouped as in the combined regex, where e.g. a global (?i) is an error
+        compiled = re.compile(f'(?:{regex})'.encode())
+    except re.error as e:
+        return f'invalid regex: {e}'
+    if compiled.groupindex or any(m.group(1) for m in GROUP_REFERENCE.finditer(regex)):
+        return 'named groups and backreferences are not supported; use (?:...)'
+    if compiled.search(b'') is not None:
+        return 'regex matches empty text'
+    return None
+
+
+def file_kinds(rel_path: str) -> Tuple[str, ...]:
+    """Which APPLIES_TO groups a source file belongs to."""
+    contributions = file_contributions(rel_path, 0)
+    parts = rel_path.split('/')[:-1]
+    if contributions['test_files'] or TEST_DIRS.intersection(parts):
+        return ('all', 'tests')
+    if contributions['component_files']:
+        return ('all', 'production', 'components')
+    return ('all', 'production')
+
+
+class PatternScanner:
+    """The prohibited patterns of one config, compiled into a single matcher."""
+
+    def __init__(self, entries: List[Dict[str, Any]]):
+        self.rules: Dict[str, Dict[str, Any]] = {}
+        sources = []
+        for entry in entries:
+            name = entry.get('pattern')
+            if not isinstance(name, str) or not name.isidentifier():
+                continue
+            applies_to, regex = DETECTORS.get(name, ('all', None))
+            applies_to = entry.get('applies_to', applies_to)
+            regex = entry.get('regex', regex)
+            threshold = entry.get('threshold') if name == 'large_components' else None
+            if (regex is None and threshold is None) or applies_to not in APPLIES_TO:
+                continue
+            problem = check_regex(regex) if regex is not None else None
+            if problem is not None:
+                print(f"Warning: skipping prohibited pattern {name!r}: {problem}")
+                continue
+            self.rules[name] = {
+                'description': entry.get('description', name),
+                'severity': entry.get('severity') or ENFORCEMENT_SEVERITY.get(entry.get('enforcement'), 'MEDIUM'),
+                'applies_to': applies_to,
+                'threshold': threshold
+            }
+            if regex is not None:
+                sources.append(f'(?P<{name}>{regex})')
+        self.regex: Optional[Pattern[bytes]] = re.compile('|'.join(sources).encode()) if sources else None
+        # Part of the scan manifest settings, so changed rules re-read every file
+        self.digest = hashlib.blake2b(json.dumps([self.rules, sources], sort_keys=True).encode(),
+                                      digest_size=8).hexdigest()
+
+    def findings(self, rel_path: str, lines: int, matches: List[Tuple[str, int]]) -> List[List[Any]]:
+        """Turn the raw matches of one file into [pattern, line] findings."""
+        kinds = file_kinds(rel_path)
+        found = [[name, line] for name, line in matches
+                 if name in self.rules and self.rules[name]['applies_to'] in kinds]
+        for name, rule in self.rules.items():
+            if rule['threshold'] is not None and rule['applies_to'] in kinds and lines > rule['threshold']:
+                # Reported at the first line past the limit
+                found.append([name, rule['threshold'] + 1])
+        return found
+
+
+def load_scanner(config: Dict[str, Any]) -> PatternScanner:
+    """Compile the prohibited patterns of a loaded guardrails config."""
+    return PatternScanner(config.get('consistency_rules', {}).get('prohibited_patterns') or [])
+
+
+def summarize_findings(files: Dict[str, List[Any]], limit: int = 200) -> Dict[str, Any]:
+    """Collect per-file findings (manifest entry index 5) for code_metrics.
+
+    Counts cover every finding; the listed findings are capped at `limit`.
+    """
+    counts: Dict[str, int] = {}
+    findings = []
+    for rel_path in sorted(files):
+        entry = files[rel_path]
+        for name, line in (entry[5] if len(entry) > 5 else []):
+            counts[name] = counts.get(name, 0) + 1
+            findings.append({'pattern': name, 'path': rel_path, 'line': line})
+    return {
+        'counts': dict(sorted(counts.items())),
+        'findings': findings[:limit],
+        'truncated': len(findings) > limit
+    }
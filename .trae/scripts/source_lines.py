@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+"""
+TDD Context Management - Source Lines
+
+Splits TypeScript and JavaScript files into code, comment and blank lines.
+
+The lexer never looks at bytes one at a time: compiled regexes jump from one
+byte that can change its state (a quote, slash, backtick, brace or JSX angle
+bracket) to the next, and only record where comments and template literal
+text begin and end. The lines are then classified with whole-buffer
+operations: comment lines are the extra blank lines that appear once the
+comments are masked out, and blank lines inside template literal text are
+counted as code. Files are fed one run of whole lines at a time, with the
+lexer state carried between runs, so memory stays bounded by the chunk size.
+Line breaks are \\n, \\r\\n or \\r, as for the line counts.
+
+A line is blank when it holds only whitespace, comment when everything else
+on it is comment (including JSX {/* ... */} comments), and code otherwise.
+Regex literals are told apart from division, and JSX from less-than and type
+arguments, by the token before them. JSX is recognised in .js files too,
+since React projects commonly use it there; in plain JavaScript a `<` only
+starts JSX where an expression may begin and a tag name follows.
+"""
+
+import re
+from typing import Dict, List, Any, Optional, Tuple
+
+JSX_EXTENSIONS = ('.tsx', '.jsx', '.js')
+
+# Comments and strings are consumed whole by the regex engine; the lexer
+# only stops at the single-byte tokens, which depend on context. Every
+# branch starts with a literal byte so the engine can skip ahead to the next
+# candidate without trying the branches at each position. A line comment
+# takes the following lines with it as long as they hold nothing but plain
+# code and another line comment, so commented code costs one token per run.
+_CODE_TOKENS = (rb"//[^\n]*(?:\n[^'\"/`{}<]*//[^\n]*)*|/\*[\s\S]*?(?:\*/|\Z)"
+                rb"|'(?:[^'\\\n]|\\[\s\S])*'?|\"(?:[^\"\\\n]|\\[\s\S])*\"?")
+_SEARCH = {
+    # (JSX enabled, inside braces that end a template expression or JSX container)
+    (False, False): re.compile(_CODE_TOKENS + rb"|`|/"),
+    (False, True): re.compile(_CODE_TOKENS + rb"|`|/|\{|\}"),
+    (True, False): re.compile(_CODE_TOKENS + rb"|`|/|<"),
+    (True, True): re.compile(_CODE_TOKENS + rb"|`|/|<|\{|\}"),
+}
+_QUOTES = (ord("'"), ord('"'))
+_SLASH = ord('/')
+_TEMPLATE = re.compile(rb"\\[\s\S]|`|\$\{")
+_REGEX_LITERAL = re.compile(rb"/(?![*/])(?:[^/\\\[\n]|\\.|\[(?:[^\]\\\n]|\\.)*\])+/[A-Za-z]*")
+_JSX_START = re.compile(rb"<[A-Za-z>]")
+# <T,>(...) and <T extends U>(...) are type parameters, even in .tsx files
+_TYPE_PARAMETERS = re.compile(rb"<[A-Za-z_$][\w$]*\s*(?:,|extends\b)")
+_JSX_TAG = re.compile(rb"[\"'{]|/>|>")
+_JSX_CHILDREN = re.compile(rb"[{<]")
+_LINE_COMMENT = re.compile(rb"//[^\n]*")
+_JSX_COMMENT = re.compile(rb"\{\s*(?:/\*[\s\S]*?\*/\s*)+\}")
+_STRING_REST = {
+    ord("'"): re.compile(rb"(?:[^'\\\n]|\\[\s\S])*'?"),
+    ord('"'): re.compile(rb'(?:[^"\\\n]|\\[\s\S])*"?'),
+}
+_LINE_WHITESPACE = b' \t\f\v'
+
+_WHITESPACE = frozenset(b' \t\r\n\f\v')
+_WORD = frozenset(b'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_$') | frozenset(range(0x80, 0x100))
+# An expression (so a regex literal or JSX element) may follow these words
+_EXPRESSION_KEYWORDS = frozenset([b'return', b'typeof', b'instanceof', b'in', b'of', b'new', b'delete',
+                                  b'void', b'throw', b'case', b'do', b'else', b'yield', b'await'])
+
+
+def _expression_start(buf: bytes, pos: int, floor: int, default: bool) -> bool:
+    """Whether an expression may start at `pos`, judged by the token before it.
+
+    Only bytes from `floor` (the end of the last token the lexer handled) are
+    looked at; when there are none, `default` carries over from that token.
+    """
+    i = pos - 1
+    while i >= floor and buf[i] in _WHITESPACE:
+        i -= 1
+    if i < floor:
+        return default
+    c = buf[i]
+    if c in _WORD:
+        j = i
+        while j >= floor and buf[j] in _WORD:
+            j -= 1
+        return buf[j + 1:i + 1] in _EXPRESSION_KEYWORDS
+    return c not in b')]}'
+
+
+def _after_line_comments(buf: bytes, start: int, end: int, floor: int, default: bool) -> bool:
+    """Whether an expression may start after a run of line comments.
+
+    Judged by the code before the last comment in the run that has any,
+    or else by the code before the run.
+    """
+    line_end = end
+    while True:
+        newline = buf.rfind(b'\n', start, line_end)
+        if newline < 0:
+            return _expression_start(buf, start, floor, default)
+        # Lines of plain code between the comments have no comment of their own
+        comment = buf.find(b'//', newline + 1, line_end)
+        if comment < 0:
+            comment = line_end
+        if buf[newline + 1:comment].strip():
+            return _expression_start(buf, comment, newline + 1, default)
+        line_end = newline
+
+
+class LineClassifier:
+    """Splits a file into [code, comment, blank] lines, one run of lines at a time.
+
+    Each run fed to the classifier must end with a line break, except the
+    last; open comments, strings, template literals and JSX elements carry
+    over from one run to the next, so a file never has to be held whole.
+    Line breaks must already be \\n (see normalize_newlines).
+    """
+
+    def __init__(self, jsx: bool = False):
+        self.jsx = jsx
+        # Frames: ['code', brace depth or None at top level], ['template', text start
+        # or -1 when the text began in an earlier run], ['jsx', element depth, in a tag,
+        # closing tag], and for tokens left open at the end of a run: ['comment'],
+        # ['string', quote], ['attribute', quote]
+        self.stack: List[List[Any]] = [['code', None]]
+        self.expression = True
+        self.counts = [0, 0, 0]
+
+    def feed(self, text: bytes, final: bool = False):
+        """Classify the lines of `text`, which ends with a line break unless `final`."""
+        continued = self.stack[-1][0] == 'comment'
+        comments, literals = self._scan(text, final)
+        final_break = not text or text.endswith(b'\n')
+        blank = _blank_lines(text, final_break)
+        if comments:
+            comment = _blank_lines(_without_comments(text, comments, continued), final_break) - blank
+        else:
+            comment = 0
+        for start, end in literals:
+            # Whole lines of template literal text are code even when blank
+            first = text.find(b'\n', start, end) if start >= 0 else -1
+            last = text.rfind(b'\n', max(start, 0), end)
+            if first != last:
+                blank -= _blank_lines(text[first + 1:last + 1], True)
+        lines = text.count(b'\n') + (not final_break)
+        self.counts[0] += lines - blank - comment
+        self.counts[1] += comment
+        self.counts[2] += blank
+
+    def _scan(self, buf: bytes, final: bool) -> Tuple[List[Tuple[int, int]], List[Tuple[int, int]]]:
+        """Find the (start, end) offsets of comments and of template literal text."""
+        comments: List[Tuple[int, int]] = []
+        literals: List[Tuple[int, int]] = []
+        n = len(buf)
+        stack = self.stack
+        pos = floor = 0
+        expression = self.expression
+
+        while pos < n:
+            frame = stack[-1]
+            kind = frame[0]
+            if kind == 'code':
+                match = None
+                for match in _SEARCH[self.jsx, frame[1] is not None].finditer(buf, pos):
+                    token = match.group()
+                    if token[0] in _QUOTES:
+                        expression = False
+                    elif len(token) > 1:
+                        # The code before a comment decides what may follow it
+                        start = match.start()
+                        if token[1] == _SLASH and b'\n' in token:
+                            expression = _after_line_comments(buf, start, match.end(), floor, expression)
+                        elif start > floor:
+                            expression = _expression_start(buf, start, floor, expression)
+                        comments.append(match.span())
+                    else:
+                        break
+                    floor = match.end()
+                else:
+                    # A comment or (line-continued) string still open at the end of the run
+                    if not final and match is not None and match.end() == n and buf.endswith(b'\n'):
+                        token = match.group()
+                        stack.append(['string', token[0]] if token[0] in _QUOTES else ['comment'])
+                    break
+                start = match.start()
+                token = match.group()
+                if token == b'`':
+                    stack.append(['template', start])
+                    pos = start + 1
+                elif token == b'/':
+                    literal = None
+                    if _expression_start(buf, start, floor, expression):
+                        literal = _REGEX_LITERAL.match(buf, start)
+                    pos = floor = literal.end() if literal else start + 1
+                    expression = literal is None
+                elif token == b'<':
+                    if (_expression_start(buf, start, floor, expression) and _JSX_START.match(buf, start)
+                            and not _TYPE_PARAMETERS.match(buf, start)):
+                        stack.append(['jsx', 0, True, False])
+                    pos = floor = start + 1
+                    expression = True
+                elif token == b'{':
+                    frame[1] += 1
+                    pos = floor = start + 1
+                    expression = True
+                else:
+                    pos = floor = start + 1
+                    expression = False
+                    if frame[1]:
+                        frame[1] -= 1
+                    else:
+                        # End of a ${...} or JSX {...}: back to the template or element
+                        stack.pop()
+                        if stack[-1][0] == 'template':
+                            stack[-1][1] = pos
+            elif kind == 'template':
+                match = _TEMPLATE.search(buf, pos)
+                if match is None:
+                    break
+                token = match.group()
+                pos = match.end()
+                if token == b'`':
+                    literals.append((frame[1], pos))
+                    stack.pop()
+                    floor = pos
+                    expression = False
+                elif token == b'${':
+                    literals.append((frame[1], match.start()))
+                    stack.append(['code', 0])
+                    floor = pos
+                    expression = True
+            elif kind == 'comment':
+                end = buf.find(b'*/', pos)
+                if end < 0:
+                    comments.append((pos, n))
+                    break
+                comments.append((pos, end + 2))
+                pos = floor = end + 2
+                stack.pop()
+            elif kind == 'string':
+                match = _STRING_REST[frame[1]].match(buf, pos)
+                pos = floor = match.end()
+                expression = False
+                if final or pos < n or not match.group().endswith(b'\n'):
+                    stack.pop()
+            elif kind == 'attribute':
+                end = buf.find(frame[1], pos)
+                if end < 0:
+                    break
+                pos = end + 1
+                stack.pop()
+            elif frame[2]:
+                # Inside a JSX tag: attributes, {expressions}, and the end of the tag
+                match = _JSX_TAG.search(buf, pos)
+                if match is None:
+                    break
+                token = match.group()
+                pos = match.end()
+                if token in (b'"', b"'"):
+                    end = buf.find(token, pos)
+                    if end < 0:
+                        stack.append(['attribute', token])
+                        break
+                    pos = end + 1
+                elif token == b'{':
+                    stack.append(['code', 0])
+                    floor = pos
+                    expression = True
+                else:
+                    frame[2] = False
+                    if token == b'>':
+                        frame[1] += -1 if frame[3] else 1
+                    if frame[1] <= 0:
+                        stack.pop()
+                        floor = pos
+                        expression = False
+            else:
+                # JSX children: text (quotes and slashes in it mean nothing), {expressions}, tags
+                match = _JSX_CHILDREN.search(buf, pos)
+                if match is None:
+                    break
+                pos = match.end()
+                if match.group() == b'{':
+                    comment = _JSX_COMMENT.match(buf, match.start())
+                    if comment:
+                        comments.append((match.start(), comment.end()))
+                        pos = comment.end()
+                        continue
+                    stack.append(['code', 0])
+                    floor = pos
+                    expression = True
+                else:
+                    frame[2] = True
+                    frame[3] = buf[pos:pos + 1] == b'/'
+                    if frame[3]:
+                        pos += 1
+
+        if stack[-1][0] == 'template':
+            # Text of a template literal still open at the end of the run
+            literals.append((stack[-1][1], n))
+            stack[-1][1] = -1
+        # The next run only sees its own bytes, so settle what the tail of this one means
+        self.expression = _expression_start(buf, n, floor, expression)
+        return comments, literals
+
+
+def normalize_newlines(buf: bytes) -> bytes:
+    """Turn \\r\\n and lone \\r line breaks into \\n, as universal newlines would."""
+    if b'\r' not in buf:
+        return buf
+    return buf.replace(b'\r\n', b'\n').replace(b'\r', b'\n')
+
+
+def _without_comments(buf: bytes, comments: List[Tuple[int, int]], continued: bool = False) -> bytes:
+    """The buffer with each comment replaced by the line breaks in it.
+
+    `continued` says the buffer starts inside a block comment, which then
+    starts at 0 whatever its first bytes are.
+    """
+    pieces = []
+    last = 0
+    for start, end in comments:
+        pieces.append(buf[last:start])
+        if not buf.startswith(b'//', start) or (continued and not start):
+            breaks = buf.count(b'\n', start, end)
+            if breaks:
+                pieces.append(b'\n' * breaks)
+        elif buf.find(b'\n', start, end) >= 0:
+            # A run of line comments with plain code between them
+            pieces.append(_LINE_COMMENT.sub(b'', buf[start:end]))
+        last = end
+    pieces.append(buf[last:])
+    return b''.join(pieces)
+
+
+def _blank_lines(buf: bytes, final_break: bool) -> int:
+    """Count whitespace-only lines: the empty lines once whitespace is deleted.
+
+    `final_break` says whether the text ends with a line break (or is
+    empty), in which case the empty "line" after it is not a line.
+    """
+    return buf.translate(None, _LINE_WHITESPACE).split(b'\n').count(b'') - final_break
+
+
+def classify_lines(buf: bytes, jsx: bool = False) -> List[int]:
+    """Split a whole file into [code, comment, blank] line counts."""
+    classifier = LineClassifier(jsx)
+    classifier.feed(normalize_newlines(buf), final=True)
+    return classifier.counts
+
+
+def directory_key(rel_path: str, depth: int = 2) -> str:
+    """The directory a file is reported under, e.g. src/components or umca-task-api/src."""
+    parts = rel_path.split('/')[:-1][:depth]
+    return '/'.join(parts) if parts else '.'
+
+
+def summarize_source_lines(files: Dict[str, List[Any]], depth: int = 2) -> Dict[str, Any]:
+    """Code/comment/blank line totals per extension and per directory.
+
+    `files` is the scan manifest; entry index 6 holds [code, comment, blank].
+    """
+    by_extension: Dict[str, Dict[str, int]] = {}
+    by_directory: Dict[str, Dict[str, int]] = {}
+    for rel_path, entry in files.items():
+        counts: Optional[List[int]] = entry[6] if len(entry) > 6 else None
+        if counts is None:
+            continue
+        extension = '.' + rel_path.rsplit('.', 1)[-1] if '.' in rel_path.rsplit('/', 1)[-1] else ''
+        for group, key in ((by_extension, extension), (by_directory, directory_key(rel_path, depth))):
+            totals = group.setdefault(key, {'files': 0, 'code': 0, 'comment': 0, 'blank': 0})
+            totals['files'] += 1
+            totals['code'] += counts[0]
+            totals['comment'] += counts[1]
+            totals['blank'] += counts[2]
+    return {
+        'by_extension': dict(sorted(by_extension.items())),
+        'by_directory': dict(sorted(by_directory.items()))
+    }
@@ -0,0 +1,11 @@
+"""
+Tests for the TDD context management scripts.
+
+The scripts import their siblings by module name, so the scripts directory
+is put on sys.path here. Run with: python -m pytest .trae/scripts/tests
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
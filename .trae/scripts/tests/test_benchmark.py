@@ -0,0 +1,33 @@
+"""Tests for the benchmark's syscall accounting."""
+
+import subprocess
+import sys
+
+import pytest
+
+import benchmark
+
+STRACE_REPORT = """\
+% time     seconds  usecs/call     calls    errors syscall
+------ ----------- ----------- --------- --------- ----------------
+ 41.20    0.000412           2       180           read
+ 30.00    0.000300           3       100        12 openat
+------ ----------- ----------- --------- --------- ----------------
+100.00    0.001000           3       280        12 total
+"""
+
+
+def test_strace_total():
+    assert benchmark._strace_total(STRACE_REPORT) == 280
+    assert benchmark._strace_total('no table here') is None
+
+
+def test_proc_io_includes_reaped_children():
+    before = benchmark._proc_io()
+    if not before:
+        pytest.skip('/proc/self/io is not available')
+    subprocess.run([sys.executable, '-c',
+                    'import os\nfor _ in range(2000): os.read(os.open(os.devnull, os.O_RDONLY), 1)'],
+                   check=True)
+    after = benchmark._proc_io()
+    assert after['syscr'] - before['syscr'] >= 2000
@@ -0,0 +1,95 @@
+"""Tests for the test results cache key."""
+
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from codebase_scan import build_ignore_rules, digest_other_files, iter_source_files
+import jest_runner
+
+
+def make_project(root):
+    (root / 'src' / '__snapshots__').mkdir(parents=True)
+    (root / 'src' / 'a.test.ts').write_text('test("a", () => {})\n')
+    (root / 'src' / '__snapshots__' / 'a.test.ts.snap').write_text('exports[`a`] = `1`;\n')
+    (root / 'src' / 'fixture.json').write_text('{"a": 1}\n')
+    (root / 'node_modules').mkdir()
+    (root / 'node_modules' / 'dep.json').write_text('{}\n')
+    (root / 'docs').mkdir()
+    (root / 'docs' / 'notes.md').write_text('notes\n')
+
+
+def key(root, digest_file, roots=None):
+    return jest_runner.test_inputs_key(root, digest_other_files(root, digest_file, roots, discovery='walk'))
+
+
+def test_fixture_and_snapshot_changes_change_key(tmp_path):
+    root = tmp_path / 'project'
+    root.mkdir()
+    make_project(root)
+    digest_file = tmp_path / 'test_inputs.json'
+
+    digests = digest_other_files(root, digest_file, discovery='walk')
+    assert sorted(digests) == ['docs/notes.md', 'src/__snapshots__/a.test.ts.snap', 'src/fixture.json']
+
+    first = key(root, digest_file)
+    assert key(root, digest_file) == first
+    (root / 'src' / 'fixture.json').write_text('{"a": 2}\n')
+    second = key(root, digest_file)
+    assert second != first
+    (root / 'src' / '__snapshots__' / 'a.test.ts.snap').write_text('exports[`a`] = `2`;\n')
+    assert key(root, digest_file) != second
+
+
+def test_roots_limit_files_and_env_is_global(tmp_path):
+    root = tmp_path / 'project'
+    root.mkdir()
+    make_project(root)
+    digest_file = tmp_path / 'test_inputs.json'
+
+    first = key(root, digest_file, ['src'])
+    (root / 'docs' / 'notes.md').write_text('changed\n')
+    assert key(root, digest_file, ['src']) == first
+    (root / '.env').write_text('API_URL=http://localhost\n')
+    assert key(root, digest_file, ['src']) != first
+
+
+def test_unchanged_files_are_not_reread(tmp_path):
+    root = tmp_path / 'project'
+    root.mkdir()
+    make_project(root)
+    digest_file = tmp_path / 'test_inputs.json'
+    fixture = root / 'src' / 'fixture.json'
+    old = 1_000_000_000
+    os.utime(fixture, ns=(old, old))
+
+    digests = digest_other_files(root, digest_file, discovery='walk')
+    # Same size and mtime: the stored digest is trusted without a read
+    fixture.write_text('{"a": 9}\n')
+    os.utime(fixture, ns=(old, old))
+    assert digest_other_files(root, digest_file, discovery='walk') == digests
+
+
+@pytest.mark.parametrize('discovery', ['walk', 'git'])
+def test_roots_list_only_their_directories(tmp_path, discovery):
+    if discovery == 'git' and shutil.which('git') is None:
+        pytest.skip('git is not installed')
+    root = tmp_path / 'project'
+    root.mkdir()
+    make_project(root)
+    (root / '.gitignore').write_text('build/\n')
+    (root / 'build' / 'fixtures').mkdir(parents=True)
+    (root / 'build' / 'fixtures' / 'out.json').write_text('{}\n')
+    if discovery == 'git':
+        subprocess.run(['git', 'init', '-q'], cwd=root, check=True)
+
+    stats = {}
+    files = sorted(path for path, _ in iter_source_files(root, build_ignore_rules(), stats, discovery,
+                                                         suffixes=None,
+                                                         roots=['src/', 'src/__snapshots__', 'missing',
+                                                                'build/fixtures']))
+    assert files == ['src/__snapshots__/a.test.ts.snap', 'src/a.test.ts', 'src/fixture.json']
+    if discovery == 'walk':
+        assert stats['entries_visited'] == 4
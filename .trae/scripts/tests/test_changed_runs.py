@@ -0,0 +1,82 @@
+"""Tests for when and how widely update_context runs the tests."""
+
+import json
+import os
+import shutil
+import subprocess
+
+import pytest
+
+import update_context
+
+SUITE = {'status': 'passed', 'tests': {'a works': 'passed'}}
+
+
+@pytest.fixture
+def project(tmp_path):
+    (tmp_path / 'package.json').write_text(json.dumps({'scripts': {'test': 'jest'}}))
+    (tmp_path / 'src').mkdir()
+    (tmp_path / 'src' / 'a.ts').write_text('export const a = 1;\n')
+    (tmp_path / 'src' / 'a.test.ts').write_text('test("a works", () => {});\n')
+    (tmp_path / '.env').write_text('API=1\n')
+    return tmp_path
+
+
+@pytest.fixture
+def jest_calls(monkeypatch):
+    calls = []
+
+    def fake_run_jest(root, jest_args, **kwargs):
+        calls.append(jest_args)
+        return {'returncode': 0, 'stderr': '', 'suites': {'src/a.test.ts': SUITE},
+                'complete': True, 'stopped_early': False, 'cancelled': False}
+
+    monkeypatch.setattr(update_context, 'run_jest', fake_run_jest)
+    return calls
+
+
+def git(repo, *args):
+    env = {key: value for key, value in os.environ.items() if not key.startswith('GIT_')}
+    env.update(GIT_AUTHOR_NAME='t', GIT_AUTHOR_EMAIL='t@example.com',
+               GIT_COMMITTER_NAME='t', GIT_COMMITTER_EMAIL='t@example.com')
+    return subprocess.run(['git', *args], cwd=repo, env=env, check=True,
+                          capture_output=True, text=True).stdout.strip()
+
+
+def test_changed_env_file_runs_everything(project, jest_calls):
+    updater = update_context.ContextUpdater(str(project))
+    previous = {'suites': {'src/a.test.ts': SUITE}}
+    updater.run_tests(changed=True, previous=previous, paths=['.env'])
+    assert jest_calls == [[]]
+
+
+def test_changed_source_runs_related_tests(project, jest_calls):
+    updater = update_context.ContextUpdater(str(project))
+    previous = {'suites': {'src/a.test.ts': SUITE}}
+    updater.run_tests(changed=True, previous=previous, paths=['src/a.ts', '.trae/context/x.json'])
+    assert jest_calls == [['--passWithNoTests', '--findRelatedTests', 'src/a.ts']]
+
+
+@pytest.mark.skipif(shutil.which('git') is None, reason='git is not installed')
+def test_dirty_env_file_is_kept_and_runs_everything(project, jest_calls):
+    git(project, 'init', '-q')
+    git(project, 'add', '.')
+    git(project, 'commit', '-q', '-m', 'initial')
+    (project / '.env').write_text('API=2\n')
+    updater = update_context.ContextUpdater(str(project))
+
+    previous = {'suites': {'src/a.test.ts': SUITE}, 'commit': git(project, 'rev-parse', 'HEAD'),
+                'dirty': []}
+    results = updater.run_tests(changed=True, previous=previous)
+    assert jest_calls == [[]]
+    assert results['dirty'] == ['.env']
+
+
+def test_cache_hit_does_not_start_tests(project, jest_calls):
+    updater = update_context.ContextUpdater(str(project))
+    updater.update_context()
+    assert len(jest_calls) == 1
+    context = updater.update_context()
+    assert len(jest_calls) == 1
+    assert context['test_status']['cache']['hit'] is True
+    assert 'tests' not in context['performance']['stages']
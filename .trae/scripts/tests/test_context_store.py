@@ -0,0 +1,116 @@
+"""Tests for the context history store."""
+
+import json
+import sqlite3
+from datetime import datetime, timedelta
+
+from check_context import ContextChecker
+from context_store import ContextStore, summarize_context
+
+
+def make_context(recorded_at, coverage=80.0):
+    return {
+        'project_info': {'name': 'demo', 'last_updated': recorded_at.isoformat()},
+        'current_phase': 'implementation',
+        'current_gate': 'G3',
+        'tdd_cycle': {'current_cycle': 'GREEN', 'cycles_completed': 4},
+        'quality_gates': {'G3': {'status': 'passed'}},
+        'test_status': {'total_tests': 10, 'passing_tests': 10, 'failing_tests': 0,
+                        'coverage_percentage': coverage, 'test_results': [{'name': 'a'}] * 50},
+        'code_metrics': {'total_files': 12, 'total_lines': 900, 'file_list': ['src/a.ts'] * 50},
+        'performance': {'update_seconds': 0.5, 'stages': {'scan': 0.2, 'tests': 0.3}},
+    }
+
+
+def stored_context(store):
+    row = store.conn.execute('SELECT context FROM updates ORDER BY id DESC LIMIT 1').fetchone()
+    return json.loads(row['context'])
+
+
+def test_summary_drops_bulky_fields():
+    summary = summarize_context(make_context(datetime.now()))
+    assert summary['test_status'] == {'total_tests': 10, 'passing_tests': 10, 'failing_tests': 0,
+                                      'coverage_percentage': 80.0}
+    assert summary['code_metrics'] == {'total_files': 12, 'total_lines': 900}
+    assert summary['tdd_cycle'] == {'current_cycle': 'GREEN'}
+    assert 'performance' not in summary
+
+
+def test_record_stores_summary(tmp_path):
+    store = ContextStore(tmp_path / 'history.db')
+    context = make_context(datetime.now())
+    store.record(context)
+    assert stored_context(store) == summarize_context(context)
+    stages = store.conn.execute('SELECT stage, seconds FROM stage_timings ORDER BY stage').fetchall()
+    assert [tuple(row) for row in stages] == [('scan', 0.2), ('tests', 0.3)]
+    store.close()
+
+
+def test_prune_keeps_newest_entries(tmp_path):
+    store = ContextStore(tmp_path / 'history.db', max_entries=3, max_age_days=None)
+    now = datetime.now()
+    for i in range(6):
+        store.record(make_context(now, coverage=float(i)))
+    assert [row['coverage_percentage'] for row in store.recent(10)] == [5.0, 4.0, 3.0]
+    assert store.conn.execute('SELECT COUNT(*) FROM stage_timings').fetchone()[0] == 6
+    assert store.conn.execute('SELECT COUNT(*) FROM gate_states').fetchone()[0] == 3
+    store.close()
+
+
+def test_prune_drops_old_entries(tmp_path):
+    store = ContextStore(tmp_path / 'history.db', max_entries=None, max_age_days=7)
+    now = datetime.now()
+    store.record(make_context(now - timedelta(days=30), coverage=1.0))
+    store.record(make_context(now - timedelta(days=1), coverage=2.0))
+    store.record(make_context(now, coverage=3.0))
+    assert [row['coverage_percentage'] for row in store.recent(10)] == [3.0, 2.0]
+    store.close()
+
+
+def test_version_1_rows_are_summarized(tmp_path):
+    db_file = tmp_path / 'history.db'
+    store = ContextStore(db_file)
+    context = make_context(datetime.now())
+    store.record(context)
+    store.close()
+    conn = sqlite3.connect(db_file)
+    with conn:
+        conn.execute('UPDATE updates SET context = ?', (json.dumps(context),))
+    conn.execute('PRAGMA user_version=1')
+    conn.close()
+
+    store = ContextStore(db_file)
+    assert stored_context(store) == summarize_context(context)
+    store.close()
+
+
+def test_previous_coverage_excludes_the_checked_context(tmp_path):
+    store = ContextStore(tmp_path / 'history.db')
+    now = datetime.now()
+    contexts = [make_context(now - timedelta(minutes=4 - i), coverage=c)
+                for i, c in enumerate([91.0, None, 90.0, 70.0])]
+    for context in contexts:
+        store.record(context)
+    before = contexts[-1]['project_info']['last_updated']
+    assert store.previous_coverage(2, before) == [90.0, None]
+    assert store.previous_coverage(10, before) == [90.0, None, 91.0]
+    assert store.previous_coverage(1, None) == [70.0]
+    store.close()
+
+
+def test_coverage_drop_rule_uses_history(tmp_path):
+    checker = ContextChecker(str(tmp_path))
+    now = datetime.now()
+    for minutes, coverage in ((3, 92.0), (2, 90.0)):
+        checker.store.record(make_context(now - timedelta(minutes=minutes), coverage=coverage))
+    current = make_context(now, coverage=80.0)
+
+    # Checked before and after it is recorded, the trend is the same
+    for record in (False, True):
+        if record:
+            checker.store.record(current)
+            checker._rule_issues = None
+        drops = [issue for issue in checker.evaluate_rules(current) if issue['type'] == 'COVERAGE_DROP']
+        assert len(drops) == 1
+        assert '12.0 points' in drops[0]['message']
+    checker.store.close()
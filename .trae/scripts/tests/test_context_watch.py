@@ -0,0 +1,143 @@
+"""Tests for the file watcher and the debounced watch loop."""
+
+import os
+import threading
+from pathlib import Path
+
+import context_watch
+from context_watch import PollingWatcher, watch_context
+
+
+class RecordingUpdater:
+    """Stands in for ContextUpdater, recording each update's paths."""
+
+    def __init__(self, project_root: Path, fail_on: int = -1):
+        self.project_root = project_root
+        self.context_file = project_root / '.trae' / 'context' / 'development_context.json'
+        self.context_file.parent.mkdir(parents=True)
+        self.calls = []
+        self.fail_on = fail_on
+
+    def update_context(self, changed=False, paths=None):
+        self.calls.append(paths)
+        if len(self.calls) - 1 == self.fail_on:
+            raise RuntimeError('scan failed')
+        return {'paths': paths}
+
+
+class ScriptedWatcher:
+    """Returns scripted (changed, rescan) reads, then stops the loop."""
+
+    name = 'scripted'
+
+    def __init__(self, reads, stop):
+        self.reads = list(reads)
+        self.stop = stop
+        self.closed = False
+
+    def read(self, timeout):
+        if not self.reads:
+            self.stop.set()
+            return set(), False
+        return self.reads.pop(0)
+
+    def close(self):
+        self.closed = True
+
+
+def run_watch(tmp_path, monkeypatch, reads, **kwargs):
+    stop = threading.Event()
+    watcher = ScriptedWatcher(reads, stop)
+    monkeypatch.setattr(context_watch, 'open_watcher', lambda *args: watcher)
+    updater = RecordingUpdater(tmp_path, kwargs.pop('fail_on', -1))
+    updates = []
+    watch_context(updater, on_update=lambda context, paths: updates.append(paths), stop=stop, **kwargs)
+    assert watcher.closed
+    assert not context_watch.watch_state_file(updater.context_file.parent).exists()
+    return updater.calls, updates
+
+
+def touch(path: Path, content: str, mtime: int):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content)
+    os.utime(path, ns=(mtime, mtime))
+
+
+def test_polling_reports_changed_added_and_removed_files(tmp_path):
+    touch(tmp_path / 'src' / 'a.ts', 'a', 1_000_000_000)
+    touch(tmp_path / 'src' / 'b.ts', 'b', 1_000_000_000)
+    touch(tmp_path / 'node_modules' / 'dep' / 'index.js', 'x', 1_000_000_000)
+    watcher = PollingWatcher(tmp_path, interval=0)
+    assert watcher.read(0) == (set(), False)
+
+    touch(tmp_path / 'src' / 'a.ts', 'a', 2_000_000_000)
+    touch(tmp_path / 'src' / 'c.ts', 'c', 1_000_000_000)
+    (tmp_path / 'src' / 'b.ts').unlink()
+    touch(tmp_path / 'node_modules' / 'dep' / 'index.js', 'y', 2_000_000_000)
+    assert watcher.read(0) == ({'src/a.ts', 'src/b.ts', 'src/c.ts'}, False)
+    assert watcher.read(0) == (set(), False)
+
+
+def test_polling_watch_loop_updates_changed_files(tmp_path):
+    touch(tmp_path / 'src' / 'a.ts', 'a', 1_000_000_000)
+    updater = RecordingUpdater(tmp_path)
+    stop = threading.Event()
+    # Never hang the suite if the change goes unnoticed
+    timer = threading.Timer(10, stop.set)
+    timer.start()
+    updates = []
+
+    def on_update(context, paths):
+        updates.append(paths)
+        if len(updates) == 1:
+            touch(tmp_path / 'src' / 'a.ts', 'changed', 2_000_000_000)
+        else:
+            stop.set()
+
+    watch_context(updater, backend='poll', debounce=0.05, poll_interval=0.01,
+                  on_update=on_update, stop=stop)
+    timer.cancel()
+    assert updates == [None, ['src/a.ts']]
+
+
+def test_burst_of_saves_becomes_one_update(tmp_path, monkeypatch):
+    calls, updates = run_watch(tmp_path, monkeypatch, [
+        ({'src/a.ts'}, False),
+        ({'src/b.ts', 'src/a.ts'}, False),
+        (set(), False),
+        ({'src/c.ts'}, False),
+        (set(), False),
+    ])
+    # The first update catches up on changes made while no watcher ran
+    assert calls == [None, ['src/a.ts', 'src/b.ts'], ['src/c.ts']]
+    assert updates == calls
+
+
+def test_rescan_replaces_the_changed_paths(tmp_path, monkeypatch):
+    calls, _ = run_watch(tmp_path, monkeypatch, [
+        ({'src/a.ts'}, False),
+        (set(), True),
+        ({'src/b.ts'}, False),
+        (set(), False),
+    ])
+    assert calls == [None, None]
+
+
+def test_max_delay_flushes_a_steady_stream(tmp_path, monkeypatch):
+    calls, _ = run_watch(tmp_path, monkeypatch, [
+        ({'src/a.ts'}, False),
+        ({'src/b.ts'}, False),
+    ], max_delay=0)
+    assert calls == [None, ['src/a.ts'], ['src/b.ts']]
+
+
+def test_failed_update_does_not_stop_watching(tmp_path, monkeypatch, capsys):
+    calls, updates = run_watch(tmp_path, monkeypatch, [
+        ({'src/a.ts'}, False),
+        (set(), False),
+        ({'src/b.ts'}, False),
+        (set(), False),
+    ], fail_on=1)
+    assert calls == [None, ['src/a.ts'], ['src/b.ts']]
+    assert updates == [None, ['src/b.ts']]
+    assert 'scan failed' in capsys.readouterr().out
@@ -0,0 +1,73 @@
+"""Tests for streaming coverage-final.json reports."""
+
+import json
+
+import pytest
+
+from coverage_report import CoverageCache, iter_report_entries, iter_report_spans, read_coverage
+
+
+def make_entry(path, statements, hits):
+    return {
+        'path': path,
+        'statementMap': {str(i): {'start': {'line': i + 1, 'column': 0},
+                                  'end': {'line': i + 1, 'column': 9}}
+                         for i in range(statements)},
+        'fnMap': {'0': {'name': 'f{ "path": x }', 'decl': {}, 'loc': {}, 'line': 1}},
+        'branchMap': {},
+        's': {str(i): (1 if i < hits else 0) for i in range(statements)},
+        'f': {'0': 1},
+        'b': {}
+    }
+
+
+def make_report(root, count=30):
+    return {str(root / 'src' / f'file{i}.ts'): make_entry(str(root / 'src' / f'file{i}.ts'), 5 + i, i)
+            for i in range(count)}
+
+
+@pytest.mark.parametrize('indent', [None, 2])
+@pytest.mark.parametrize('chunk_size', [16, 100, 1 << 20])
+def test_spans_match_decoded_entries(tmp_path, indent, chunk_size):
+    report = make_report(tmp_path)
+    report['C:\\src\\ü "quoted".ts'] = make_entry('C:\\src\\ü "quoted".ts', 3, 1)
+    report_file = tmp_path / 'coverage-final.json'
+    report_file.write_text(json.dumps(report, indent=indent, ensure_ascii=False), encoding='utf-8')
+
+    spans = list(iter_report_spans(report_file, chunk_size))
+    assert [path for path, _ in spans] == list(report)
+    assert [json.loads(raw) for _, raw in spans] == list(report.values())
+    assert [raw for _, raw in spans] == [raw for _, raw, _ in iter_report_entries(report_file, chunk_size)]
+
+
+def test_other_layouts_are_decoded(tmp_path):
+    report_file = tmp_path / 'coverage-final.json'
+    report_file.write_text('{}', encoding='utf-8')
+    assert list(iter_report_spans(report_file)) == []
+
+    # An entry whose object does not start with its path
+    entry = {'statementMap': {}, 's': {}, 'path': 'a.ts'}
+    report_file.write_text(json.dumps({'a.ts': entry}), encoding='utf-8')
+    assert [(path, json.loads(raw)) for path, raw in iter_report_spans(report_file)] == [('a.ts', entry)]
+
+
+def test_unchanged_entries_are_not_decoded(tmp_path, monkeypatch):
+    report = make_report(tmp_path, 4)
+    report_file = tmp_path / 'coverage-final.json'
+    report_file.write_text(json.dumps(report), encoding='utf-8')
+    cache = CoverageCache(tmp_path / 'coverage_cache.json')
+    first = read_coverage(tmp_path, report_file, cache)
+    assert first['files_aggregated'] == 4
+
+    changed = str(tmp_path / 'src' / 'file2.ts')
+    report[changed]['s']['0'] = 0
+    report_file.write_text(json.dumps(report), encoding='utf-8')
+    decoded = []
+    real_loads = json.loads
+    monkeypatch.setattr('coverage_report.json.loads',
+                        lambda text, **kw: decoded.append(text) or real_loads(text, **kw))
+    second = read_coverage(tmp_path, report_file, cache)
+
+    assert (second['files_reused'], second['files_aggregated']) == (3, 1)
+    assert [real_loads(text).get('path') for text in decoded if text.startswith('{')] == [changed]
+    assert second['files']['src/file2.ts']['statements'] == [1, 7]
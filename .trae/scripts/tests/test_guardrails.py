@@ -0,0 +1,35 @@
+"""Tests for guardrails config loading and rule messages."""
+
+import os
+
+import pytest
+
+from guardrails_config import config_path, load_guardrails_config
+from guardrails_rules import format_message
+
+
+@pytest.mark.parametrize('message, expected', [
+    ('Coverage {coverage:.1f}% is below {threshold}%', 'Coverage 71.5% is below 80%'),
+    ('Coverage {missing} is {coverage}', 'Coverage {missing} is 71.5'),
+    ('Value {none:.1f} and {x.y} and {0}', 'Value None and {x.y} and {0}'),
+    ('Unbalanced {brace', 'Unbalanced {brace'),
+])
+def test_format_message(message, expected):
+    assert format_message(message, {'coverage': 71.5, 'threshold': 80, 'none': None}) == expected
+
+
+def test_config_reloaded_when_file_changes(tmp_path):
+    pytest.importorskip('yaml')
+    path = config_path(tmp_path)
+    assert load_guardrails_config(tmp_path) == {}
+
+    path.parent.mkdir(parents=True)
+    path.write_text('test_cache:\n  max_entries: 5\n')
+    config = load_guardrails_config(tmp_path)
+    assert config == {'test_cache': {'max_entries': 5}}
+    assert load_guardrails_config(tmp_path) is config
+
+    path.write_text('test_cache:\n  max_entries: 7\n')
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert load_guardrails_config(tmp_path) == {'test_cache': {'max_entries': 7}}
@@ -0,0 +1,101 @@
+"""Tests for .gitignore matching in the codebase scan."""
+
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from codebase_scan import IgnoreRules, build_ignore_rules, is_path_ignored, walk_files
+
+
+def rules_for(*patterns, base=''):
+    rules = IgnoreRules()
+    for pattern in patterns:
+        rules.add_pattern(pattern, base)
+    return rules
+
+
+@pytest.mark.parametrize('patterns, path, is_dir, ignored', [
+    (['*.log'], 'debug.log', False, True),
+    (['*.log'], 'src/deep/debug.log', False, True),
+    (['*.log'], 'debug.log.txt', False, False),
+    (['/build'], 'build', True, True),
+    (['/build'], 'src/build', True, False),
+    (['docs/*.md'], 'docs/a.md', False, True),
+    (['docs/*.md'], 'docs/api/a.md', False, False),
+    (['docs/*.md'], 'src/docs/a.md', False, False),
+    (['logs/'], 'logs', True, True),
+    (['logs/'], 'logs', False, False),
+    (['**/tmp'], 'tmp', True, True),
+    (['**/tmp'], 'a/b/tmp', True, True),
+    (['a/**/b'], 'a/b', False, True),
+    (['a/**/b'], 'a/x/y/b', False, True),
+    (['cache/**'], 'cache/x/y', False, True),
+    (['cache/**'], 'cache', True, False),
+    (['*.log', '!keep.log'], 'keep.log', False, False),
+    (['*.log', '!keep.log'], 'drop.log', False, True),
+    (['!keep.log', '*.log'], 'keep.log', False, True),
+    (['\\!important'], '!important', False, True),
+    (['\\#hash'], '#hash', False, True),
+    (['# comment'], '# comment', False, False),
+    (['[abc].txt'], 'b.txt', False, True),
+    (['[abc].txt'], 'd.txt', False, False),
+    (['[!a].txt'], 'b.txt', False, True),
+    (['[!a].txt'], 'a.txt', False, False),
+    (['file?.ts'], 'file1.ts', False, True),
+    (['file?.ts'], 'file/.ts', False, False),
+    (['trailing   '], 'trailing', False, True),
+])
+def test_is_ignored(patterns, path, is_dir, ignored):
+    assert rules_for(*patterns).is_ignored(path, is_dir) is ignored
+
+
+def test_patterns_are_relative_to_their_directory():
+    rules = rules_for('*.tmp', '/local', base='src')
+    assert rules.is_ignored('src/x.tmp', False)
+    assert rules.is_ignored('src/a/x.tmp', False)
+    assert not rules.is_ignored('x.tmp', False)
+    assert rules.is_ignored('src/local', True)
+    assert not rules.is_ignored('src/a/local', True)
+
+
+def test_default_rules_prune_build_output():
+    rules = build_ignore_rules(['*.snap'])
+    assert rules.is_ignored('node_modules', True)
+    assert rules.is_ignored('packages/app/dist', True)
+    assert not rules.is_ignored('dist', False)
+    assert rules.is_ignored('src/__snapshots__/a.snap', False)
+
+
+GITIGNORE = {
+    '.gitignore': '*.log\n!keep.log\n/generated/\ndocs/*.md\ntmp/\n',
+    'src/.gitignore': '*.tmp\n!important.tmp\n/local.ts\n',
+}
+
+FILES = [
+    'a.log', 'keep.log', 'src/keep.log', 'src/a.ts', 'src/a.tmp', 'src/important.tmp',
+    'src/local.ts', 'src/lib/local.ts', 'src/lib/b.tmp', 'generated/out.ts',
+    'src/generated/out.ts', 'docs/readme.md', 'docs/api/readme.md', 'tmp/x.ts',
+    'src/tmp/keep.log', 'README.md',
+]
+
+
+@pytest.mark.skipif(shutil.which('git') is None, reason='git is not installed')
+def test_walk_matches_git(tmp_path):
+    for name, content in GITIGNORE.items():
+        (tmp_path / name).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / name).write_text(content)
+    for name in FILES:
+        (tmp_path / name).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / name).write_text('x\n')
+    env = {key: value for key, value in os.environ.items() if not key.startswith('GIT_')}
+    subprocess.run(['git', 'init', '-q'], cwd=tmp_path, env=env, check=True)
+    listed = subprocess.run(['git', 'ls-files', '--others', '--exclude-standard'],
+                            cwd=tmp_path, env=env, check=True, capture_output=True, text=True)
+    expected = sorted(path for path in listed.stdout.splitlines() if not path.endswith('.gitignore'))
+
+    walked = sorted(path for path, _ in walk_files(tmp_path, IgnoreRules()))
+    assert walked == expected
+    for name in FILES:
+        assert is_path_ignored(tmp_path, name, IgnoreRules()) is (name not in expected)
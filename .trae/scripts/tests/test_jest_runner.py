@@ -0,0 +1,173 @@
+"""Tests for reporter event ingestion, shard merging and the Jest daemon client."""
+
+import json
+import os
+import socket
+import threading
+
+import pytest
+
+import jest_runner
+from jest_runner import REPORTER_MARKER, _EventIngester, merge_shard_runs, summarize_suites
+
+
+def event(**fields):
+    return REPORTER_MARKER + json.dumps(fields) + '\n'
+
+
+def suite_event(root, name, *statuses):
+    tests = [{'fullName': f'{name} {i}', 'status': status} for i, status in enumerate(statuses)]
+    return event(type='suite', file=str(root / name),
+                 status='failed' if 'failed' in statuses else 'passed', tests=tests)
+
+
+def shard_run(shard, suites, returncode=0, complete=True, stderr=''):
+    return {'returncode': returncode, 'stderr': stderr, 'suites': suites, 'complete': complete,
+            'stopped_early': False, 'cancelled': False,
+            'shard': {'shard': shard, 'status': 'passed'}}
+
+
+def test_ingester_collects_suites_and_progress(tmp_path):
+    progress = []
+    ingester = _EventIngester(tmp_path, False, progress.append)
+    lines = ['PASS src/a.test.ts\n',
+             REPORTER_MARKER + '{not json\n',
+             event(type='case', file=str(tmp_path / 'src/a.test.ts'), fullName='a 0', status='passed'),
+             suite_event(tmp_path, 'src/a.test.ts', 'passed', 'pending'),
+             suite_event(tmp_path, 'src/b.test.ts', 'passed', 'failed'),
+             event(type='complete'),
+             event(type='exit', code=1)]
+    assert all(ingester.feed(line) for line in lines)
+
+    result = ingester.result(1, 'stderr')
+    assert sorted(result['suites']) == ['src/a.test.ts', 'src/b.test.ts']
+    assert result['suites']['src/b.test.ts'] == {'status': 'failed',
+                                                 'tests': {'src/b.test.ts 0': 'passed',
+                                                           'src/b.test.ts 1': 'failed'}}
+    assert result['complete'] and not result['stopped_early']
+    assert ingester.exit_code == 1
+    assert [p['suites_finished'] for p in progress] == [1, 2]
+    assert progress[-1]['failing_tests'] == 1 and progress[-1]['pending_tests'] == 1
+
+
+def test_ingester_stops_at_first_failure(tmp_path):
+    ingester = _EventIngester(tmp_path, True, None)
+    assert ingester.feed(event(type='case', file=str(tmp_path / 'src/a.test.ts'),
+                               fullName='a 0', status='passed'))
+    assert not ingester.feed(event(type='case', file=str(tmp_path / 'src/a.test.ts'),
+                                   fullName='a 1', status='failed'))
+    result = ingester.result(0, '')
+    assert result['stopped_early']
+    assert result['suites'] == {'src/a.test.ts': {'status': 'failed', 'tests': {'a 1': 'failed'}}}
+
+
+def test_ingester_error_discards_results(tmp_path):
+    ingester = _EventIngester(tmp_path, False, None)
+    ingester.feed(suite_event(tmp_path, 'src/a.test.ts', 'passed'))
+    ingester.feed(event(type='error', message='Cannot find module'))
+    result = ingester.result(1, 'npm ERR\n')
+    assert result['suites'] is None
+    assert result['stderr'] == 'npm ERR\nCannot find module'
+
+
+def test_ingester_without_events_reports_nothing(tmp_path):
+    ingester = _EventIngester(tmp_path, False, None)
+    ingester.feed('Error: no tests\n')
+    assert ingester.result(1, '')['suites'] is None
+
+
+def test_merge_sums_totals_across_shards():
+    first = {'src/a.test.ts': {'status': 'passed', 'tests': {'a': 'passed', 'b': 'pending'}}}
+    second = {'src/b.test.ts': {'status': 'passed', 'tests': {'c': 'passed'}},
+              'src/c.test.ts': {'status': 'passed', 'tests': {'d': 'passed'}}}
+    merged = merge_shard_runs([shard_run('1/2', first), shard_run('2/2', second)])
+
+    assert summarize_suites(merged['suites']) == {'total_tests': 4, 'passing_tests': 3, 'failing_tests': 0,
+                                                  'pending_tests': 1, 'failing_suites': 0}
+    assert merged['returncode'] == 0 and merged['complete']
+    assert [shard['shard'] for shard in merged['shards']] == ['1/2', '2/2']
+
+
+def test_merge_keeps_other_shards_when_one_fails_or_crashes():
+    failed = {'src/a.test.ts': {'status': 'failed', 'tests': {'a': 'failed'}}}
+    passed = {'src/b.test.ts': {'status': 'passed', 'tests': {'b': 'passed'}}}
+    merged = merge_shard_runs([shard_run('1/3', failed, returncode=1),
+                               shard_run('2/3', passed),
+                               shard_run('3/3', None, returncode=137, complete=False, stderr='Killed\n')])
+
+    assert sorted(merged['suites']) == ['src/a.test.ts', 'src/b.test.ts']
+    assert summarize_suites(merged['suites'])['failing_tests'] == 1
+    assert merged['returncode'] == 137
+    assert not merged['complete']
+    assert merged['stderr'] == '[shard 3/3]\nKilled\n'
+
+
+def test_merge_without_any_results():
+    merged = merge_shard_runs([shard_run('1/1', None, returncode=1, complete=False)], cancelled=True)
+    assert merged['suites'] is None and merged['cancelled']
+
+
+def test_failing_shard_stops_the_others(tmp_path, monkeypatch):
+    def fake_run_jest(root, args, timeout, stop_on_failure, on_progress, cancel):
+        shard = next(arg for arg in args if arg.startswith('--shard='))
+        if shard == '--shard=1/2':
+            on_progress({'total_tests': 1, 'failing_tests': 1})
+            return {'returncode': 1, 'stderr': '', 'complete': False, 'stopped_early': True,
+                    'cancelled': False,
+                    'suites': {'src/a.test.ts': {'status': 'failed', 'tests': {'a': 'failed'}}}}
+        assert cancel.wait(5)
+        return {'returncode': -15, 'stderr': '', 'suites': None, 'complete': False,
+                'stopped_early': False, 'cancelled': True}
+
+    monkeypatch.setattr(jest_runner, 'run_jest', fake_run_jest)
+    progress = []
+    run = jest_runner.run_jest_sharded(tmp_path, [], shards=2, stop_on_failure=True,
+                                       on_progress=progress.append)
+
+    assert [shard['status'] for shard in run['shards']] == ['stopped_early', 'stopped']
+    assert run['stopped_early'] and not run['cancelled']
+    assert list(run['suites']) == ['src/a.test.ts']
+    assert progress == [{'total_tests': 1, 'failing_tests': 1}]
+
+
+@pytest.fixture
+def daemon(tmp_path):
+    client = jest_runner.JestDaemon(tmp_path, tmp_path)
+    yield client
+    client.socket_path.unlink(missing_ok=True)
+
+
+def test_daemon_run_reads_events_from_socket(tmp_path, daemon):
+    requests = []
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(str(daemon.socket_path))
+    server.listen(1)
+
+    def serve():
+        conn, _ = server.accept()
+        with conn:
+            requests.append(json.loads(conn.makefile('r').readline()))
+            conn.sendall((suite_event(tmp_path, 'src/a.test.ts', 'passed', 'failed')
+                          + event(type='complete') + event(type='exit', code=1)).encode())
+        server.close()
+
+    thread = threading.Thread(target=serve)
+    thread.start()
+    run = daemon.run(['--passWithNoTests', '--findRelatedTests', 'src/a.ts'])
+    thread.join()
+
+    assert requests[0]['findRelatedTests'] and requests[0]['passWithNoTests']
+    assert requests[0]['files'] == ['src/a.ts']
+    assert run['returncode'] == 1 and run['complete']
+    assert summarize_suites(run['suites'])['failing_tests'] == 1
+
+
+def test_daemon_not_replaced_while_busy(tmp_path, daemon, monkeypatch):
+    # A live pid whose socket does not answer: starting another daemon would
+    # unlink that socket, so the caller falls back to npm instead
+    daemon.socket_path.write_text('')
+    daemon.info_file.write_text(json.dumps({'pid': os.getpid()}))
+    monkeypatch.setattr(jest_runner.subprocess, 'Popen',
+                        lambda *args, **kwargs: pytest.fail('started a second daemon'))
+    assert daemon.ensure_running() is False
+    assert daemon.socket_path.exists()
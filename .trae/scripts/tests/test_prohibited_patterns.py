@@ -0,0 +1,40 @@
+"""Tests for compiling the prohibited patterns of a config."""
+
+import pytest
+
+from prohibited_patterns import PatternScanner
+
+
+@pytest.mark.parametrize('regex, problem', [
+    ('foo(', 'invalid regex'),
+    ('(?P<word>todo)', 'named groups'),
+    ('(a)\\1', 'backreferences'),
+    ('x(?i)y', 'invalid regex'),
+    ('a*', 'matches empty text'),
+    (42, 'must be a string'),
+])
+def test_bad_regex_is_skipped_with_warning(regex, problem, capsys):
+    scanner = PatternScanner([
+        {'pattern': 'custom', 'regex': regex},
+        {'pattern': 'todo_comments', 'regex': r'//\s*TODO\b'},
+    ])
+
+    assert list(scanner.rules) == ['todo_comments']
+    assert problem in capsys.readouterr().out
+    assert [m.lastgroup for m in scanner.regex.finditer(b'x = 1 // TODO later\n')] == ['todo_comments']
+
+
+def test_escaped_backslash_is_not_a_backreference(capsys):
+    scanner = PatternScanner([{'pattern': 'windows_paths', 'regex': r'C:\\\\1'}])
+
+    assert list(scanner.rules) == ['windows_paths']
+    assert capsys.readouterr().out == ''
+    assert scanner.regex.search(b"const p = 'C:\\\\1'") is not None
+
+
+def test_default_detectors_compile():
+    scanner = PatternScanner([{'pattern': name} for name in
+                              ('hardcoded_values', 'mock_data_in_production', 'skipped_tests',
+                               'direct_database_access')])
+    assert len(scanner.rules) == 4
+    assert scanner.regex.search(b"it.skip('x', () => {})").lastgroup == 'skipped_tests'
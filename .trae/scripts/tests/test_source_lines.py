@@ -0,0 +1,102 @@
+"""Tests for the code/comment/blank line classifier."""
+
+import pytest
+
+import codebase_scan
+from codebase_scan import count_lines
+from source_lines import LineClassifier, classify_lines, directory_key, summarize_source_lines
+
+
+@pytest.mark.parametrize('source, jsx, expected', [
+    ('', False, [0, 0, 0]),
+    ('x', False, [1, 0, 0]),
+    ('\n\n', False, [0, 0, 2]),
+    ('   ', False, [0, 0, 1]),
+    ('x\n// c', False, [1, 1, 0]),
+    ('a\n\n// c\n/* x\n\n y */\nb /* t */\n', False, [2, 3, 2]),
+    # Blank lines inside template literal text are code; comments inside it are not comments
+    ('const s = `x\n\n  \n// not comment\n${ a /* c */ }\n`;\n\n', False, [6, 0, 1]),
+    ('const t = `a ${`inner\n\n${x}`}\n`\n', False, [4, 0, 0]),
+    ("const s = 'a // b'; /* unterminated\n\n", False, [1, 0, 1]),
+    ('x = "it\'s" // c\n\'/*\'\n', False, [2, 0, 0]),
+    ('x = 1 // a\ny = 2 // b\n  // c\nz = y\n/ 2 // d\n', False, [4, 1, 0]),
+])
+def test_classify_lines(source, jsx, expected):
+    assert classify_lines(source.encode(), jsx) == expected
+
+
+@pytest.mark.parametrize('source, expected', [
+    ('const r = /\\/\\/notcomment/g;\n// real\n', [1, 1, 0]),
+    ('if (a) /re/.test(s)\n', [1, 0, 0]),
+    ('const d = a / b; // c\nx = a / b / c;\n', [2, 0, 0]),
+    # The identifier before the comment makes this a division, not a regex
+    ('x = a // c\n/ b /* d */\n', [2, 0, 0]),
+    ('// a\nx = 1\n  // b\n/ 2 /* x\n\n*/\n', [2, 3, 1]),
+])
+def test_regex_literals_and_division(source, expected):
+    assert classify_lines(source.encode()) == expected
+
+
+@pytest.mark.parametrize('source, expected', [
+    ('return (\n  <div>\n    Don\'t // text\n    {/* jsx comment */}\n'
+     '    <a href="http://x">l</a>\n  </div>\n);\n// end\n', [6, 2, 0]),
+    ('const f = <T,>(x: T) => x;\n// c\n', [1, 1, 0]),
+    ('let a = b < c; // lt\n/* d */\nlet e = f > g;\n', [2, 1, 0]),
+    ("const el = cond ? <A /> : <B x={`t ${y}`}>{'s'}</B>;\n/*\n*/\n", [1, 2, 0]),
+])
+def test_jsx(source, expected):
+    assert classify_lines(source.encode(), jsx=True) == expected
+
+
+@pytest.mark.parametrize('source', [b'// a\r\n\r\nb\r\n', b'// a\r\rb\r', b'// a\n\nb\n'])
+def test_line_breaks(source):
+    assert classify_lines(source) == [1, 1, 1]
+
+
+SPLIT_SOURCE = (b"const t = `a\n\n${b}\n  \n`; // c\n/* open\n\n// still comment\n*/\n"
+                b"x = 'cont\\\n inued' // d\nreturn <div a='x\ny'>\n{/* c */}\n text\n</div>;\n"
+                b"y = a\n/ b // e\n")
+
+
+@pytest.mark.parametrize('cut', range(1, SPLIT_SOURCE.count(b'\n')))
+def test_state_carries_across_runs(cut):
+    lines = SPLIT_SOURCE.split(b'\n')
+    classifier = LineClassifier(jsx=True)
+    classifier.feed(b'\n'.join(lines[:cut]) + b'\n')
+    classifier.feed(b'\n'.join(lines[cut:]), final=True)
+    assert classifier.counts == classify_lines(SPLIT_SOURCE, jsx=True)
+
+
+@pytest.mark.parametrize('chunk_size', [40, 57, 64, 1 << 20])
+def test_count_lines_reads_in_chunks(tmp_path, monkeypatch, chunk_size):
+    monkeypatch.setattr(codebase_scan, 'CHUNK_SIZE', chunk_size)
+    path = tmp_path / 'mixed.tsx'
+    path.write_bytes(SPLIT_SOURCE.replace(b'\n', b'\r\n'))
+    lines, status, _, _, source_lines = count_lines(path)
+    assert status == 'ok'
+    assert source_lines == classify_lines(SPLIT_SOURCE, jsx=True)
+    assert sum(source_lines) == lines
+
+
+def test_long_line_is_not_classified(tmp_path, monkeypatch):
+    monkeypatch.setattr(codebase_scan, 'CHUNK_SIZE', 16)
+    path = tmp_path / 'bundle.js'
+    path.write_bytes(b'// header\n' + b'x=1;' * 100 + b'\n')
+    lines, status, _, _, source_lines = count_lines(path)
+    assert (lines, status, source_lines) == (2, 'ok', None)
+
+
+def test_summarize_source_lines():
+    files = {
+        'src/components/App.tsx': [0, 0, 0, 10, None, [], [7, 2, 1]],
+        'src/components/ui/Button.tsx': [0, 0, 0, 4, None, [], [4, 0, 0]],
+        'index.ts': [0, 0, 0, 1, None, [], [1, 0, 0]],
+        'bundle.js': [0, 0, 0, 1, None, [], None],
+    }
+    summary = summarize_source_lines(files)
+    assert summary['by_extension'] == {
+        '.ts': {'files': 1, 'code': 1, 'comment': 0, 'blank': 0},
+        '.tsx': {'files': 2, 'code': 11, 'comment': 2, 'blank': 1},
+    }
+    assert summary['by_directory']['src/components'] == {'files': 2, 'code': 11, 'comment': 2, 'blank': 1}
+    assert directory_key('index.ts') == '.'
@@ -7,23 +7,69 @@ test results, and development progress. It maintains context preservation as req
 by the development guardrails framework.
 
 Usage:
-    python update_context.py [--phase <phase>] [--gate <gate>] [--force]
+    python update_context.py [--phase <phase>] [--gate <gate>] [--force] [--full-rescan]
+                             [--discovery auto|git|walk] [--changed] [--no-cache] [--red-check]
+                             [--shards [N]] [--daemon] [--stop-daemon]
+                             [--watch [--watch-backend auto|inotify|poll]]
+                             [--trace-file <trace.json>] [--metrics-file <metrics.prom>]
 """
 
 import os
 import sys
 import json
+import signal
 import argparse
+import threading
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Callable, Tuple
+
+from codebase_scan import DISCOVERY_BACKENDS, FileManifest, digest_other_files, scan_codebase
+from context_store import ContextStore
+from context_trace import SpanRecorder, write_chrome_trace, write_openmetrics
+from context_watch import WATCH_BACKENDS, watch_context
+from coverage_report import CoverageCache, find_report, read_coverage
+from guardrails_config import load_guardrails_config
+from prohibited_patterns import load_scanner, summarize_findings
+from source_lines import summarize_source_lines
+from jest_runner import (DEFAULT_TEST_INPUT_ROOTS, GLOBAL_TEST_INPUTS, JestDaemon, TestResultCache,
+                         changed_files_since, git_head, run_jest, run_jest_sharded,
+                         summarize_suites, test_inputs_key)
+
+def _affects_tests(rel_path: str) -> bool:
+    """Whether a changed file can change test results: dot-paths (.trae
+    state, editor files) can't, except the global inputs such as .env."""
+    return rel_path in GLOBAL_TEST_INPUTS or not any(part.startswith('.') for part in rel_path.split('/'))
+
 
 class ContextUpdater:
     def __init__(self, project_root: str):
         self.project_root = Path(project_root)
         self.context_file = self.project_root / '.trae' / 'context' / 'development_context.json'
+        self.manifest_file = self.context_file.parent / 'code_manifest.json'
+        self.test_cache_dir = self.context_file.parent / 'test_cache'
+        self.test_inputs_file = self.context_file.parent / 'test_inputs.json'
+        # Every update is also summarized as a row; the JSON file is the latest export
+        history_config = load_guardrails_config(self.project_root).get('context_history', {})
+        self.store = ContextStore(self.context_file.parent / 'context_history.db',
+                                  max_entries=history_config.get('max_entries', 1000),
+                                  max_age_days=history_config.get('max_age_days', 90))
         self.context_file.parent.mkdir(parents=True, exist_ok=True)
+        self.manifest: Optional[FileManifest] = None
+        self.last_scan: Dict[str, Any] = {}
+        # Called with running totals as each test file finishes
+        self.on_test_progress: Optional[Callable[[Dict[str, int]], None]] = None
+        # Set to run tests in a warm Jest daemon instead of a fresh npm process
+        self.test_daemon: Optional[JestDaemon] = None
+        # Set to split full and --changed runs into parallel Jest shards (0 = one per CPU)
+        self.test_shards: Optional[int] = None
+        # Set to export each update's spans as a Chrome trace / OpenMetrics text
+        self.trace_file: Optional[Path] = None
+        self.metrics_file: Optional[Path] = None
+        # Spans of the last update, including saving it
+        self.last_performance: Optional[Dict[str, Any]] = None
         
     def load_current_context(self) -> Dict[str, Any]:
         """Load the current development context."""
@@ -78,8 +124,26 @@ class ContextUpdater:
             }
         }
     
-    def run_tests(self) -> Dict[str, Any]:
-        """Run the test suite and collect results."""
+    def run_tests(self, changed: bool = False, previous: Optional[Dict[str, Any]] = None,
+                  stop_on_failure: bool = False,
+                  cancel: Optional[threading.Event] = None,
+                  paths: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Run the test suite and collect results.
+        
+        With changed=True, only tests related to files changed since the
+        commit recorded in `previous` (the last test_status) are run, and
+        their results are merged into the previous per-suite results. Falls
+        back to a full run when there is nothing to merge into. Files that
+        were uncommitted at the previous run are checked again, since
+        reverting one leaves no trace in the diff. `paths`, when known (e.g.
+        from a file watcher), replaces the git diff as the list of changed
+        files.
+        
+        With stop_on_failure=True (a RED-phase check) the run ends at the
+        first failing test; results for test files that did not run are
+        carried over from `previous`. Setting `cancel` from another thread
+        abandons the run and returns an error.
+        """
         try:
             # Check if package.json exists and has test script
             package_json = self.project_root / 'package.json'
@@ -93,86 +157,235 @@ class ContextUpdater:
             if 'test' not in scripts:
                 return {'error': 'No test script defined in package.json'}
             
-            # Run tests
-            result = subprocess.run(
-                ['npm', 'test', '--', '--reporter=json'],
-                cwd=self.project_root,
-                capture_output=True,
-                text=True,
-                timeout=300
-            )
+            head = git_head(self.project_root)
+            dirty = changed_files_since(self.project_root, 'HEAD') if head else None
+            if dirty is not None:
+                dirty = [p for p in dirty if _affects_tests(p)]
+            previous = previous or {}
+            changed_files = None
+            if changed and previous.get('suites') and paths is not None:
+                changed_files = list(paths)
+            elif (changed and previous.get('suites') and previous.get('commit')
+                    and previous.get('dirty') is not None):
+                changed_files = changed_files_since(self.project_root, previous['commit'])
+                if changed_files is not None:
+                    changed_files = sorted(set(changed_files).union(previous['dirty']))
+            if changed_files is not None:
+                changed_files = [p for p in changed_files if _affects_tests(p)]
+                # Dependents of a deleted module can't be found, so run everything
+                deleted = [p for p in changed_files
+                           if not (self.project_root / p).exists() and p not in previous['suites']]
+                if deleted or GLOBAL_TEST_INPUTS.intersection(changed_files):
+                    changed_files = None
             
-            if result.returncode == 0:
-                # Parse test results if available
-                try:
-                    test_output = json.loads(result.stdout)
-                    return {
-                        'total_tests': test_output.get('numTotalTests', 0),
-                        'passing_tests': test_output.get('numPassedTests', 0),
-                        'failing_tests': test_output.get('numFailedTests', 0),
-                        'last_run': datetime.now().isoformat(),
-                        'success': True
-                    }
-                except json.JSONDecodeError:
-                    return {
-                        'total_tests': 0,
-                        'passing_tests': 0,
-                        'failing_tests': 0,
-                        'last_run': datetime.now().isoformat(),
-                        'success': True,
-                        'note': 'Tests ran but output not parseable'
-                    }
+            if changed_files is not None:
+                related = [p for p in changed_files if (self.project_root / p).is_file()]
+                if not related:
+                    suites = self._existing_suites(previous['suites'])
+                    return self._test_results(suites, head, dirty, 'changed', [])
+                jest_args = ['--passWithNoTests', '--findRelatedTests'] + related
             else:
+                jest_args = []
+            runner = run_jest
+            if self.test_daemon is not None and self.test_daemon.ensure_running():
+                runner = lambda root, *args, **kwargs: self.test_daemon.run(*args, **kwargs)
+            elif self.test_shards is not None and self.test_shards != 1:
+                runner = lambda root, *args, **kwargs: run_jest_sharded(
+                    root, *args, shards=self.test_shards, **kwargs)
+            run = runner(self.project_root, jest_args, stop_on_failure=stop_on_failure,
+                         on_progress=self.on_test_progress, cancel=cancel)
+            if run['cancelled']:
+                return {'error': 'Test run cancelled'}
+            
+            shard_errors = [f"shard {shard['shard']} {shard['error']}"
+                            for shard in run.get('shards', []) if 'error' in shard]
+            if run['suites'] is None:
                 return {
-                    'error': f'Tests failed with exit code {result.returncode}',
-                    'stderr': result.stderr,
+                    'error': '; '.join(shard_errors) or f'Tests failed with exit code {run["returncode"]}',
+                    'stderr': run['stderr'],
                     'last_run': datetime.now().isoformat(),
                     'success': False
                 }
+            
+            suites = run['suites']
+            mode = 'changed' if changed_files is not None else 'full'
+            if run['stopped_early'] or not run['complete']:
+                # A shard that crashed or timed out leaves the run incomplete;
+                # what the other shards reported is still merged in
+                mode = 'red_check' if run['stopped_early'] else mode
+                merged = dict(previous.get('suites', {}))
+                for path, suite in suites.items():
+                    # A suite cut short only holds the tests that finished
+                    tests = dict(merged.get(path, {}).get('tests', {}))
+                    tests.update(suite['tests'])
+                    merged[path] = {'status': suite['status'], 'tests': tests}
+                results = self._test_results(self._existing_suites(merged), head, dirty,
+                                             mode, sorted(suites))
+                results['complete'] = False
+            elif changed_files is not None:
+                merged = dict(previous['suites'])
+                merged.update(suites)
+                results = self._test_results(self._existing_suites(merged), head, dirty,
+                                             mode, sorted(suites))
+            else:
+                results = self._test_results(suites, head, dirty, mode, sorted(suites))
+            if 'shards' in run:
+                results['shards'] = run['shards']
+            if shard_errors:
+                results['shard_errors'] = shard_errors
+            return results
                 
         except subprocess.TimeoutExpired:
             return {'error': 'Test execution timed out'}
         except Exception as e:
             return {'error': f'Failed to run tests: {str(e)}'}
     
-    def analyze_codebase(self) -> Dict[str, Any]:
-        """Analyze the current codebase metrics."""
-        metrics = {
-            'total_files': 0,
-            'total_lines': 0,
-            'typescript_files': 0,
-            'component_files': 0,
-            'test_files': 0
-        }
+    def _test_cache(self) -> TestResultCache:
+        cache_config = load_guardrails_config(self.project_root).get('test_cache', {})
+        return TestResultCache(self.test_cache_dir,
+                               max_entries=cache_config.get('max_entries', 20),
+                               max_age_days=cache_config.get('max_age_days', 14))
+    
+    def digest_test_inputs(self) -> Dict[str, str]:
+        """Digest the files tests read besides source files: every other
+        file under test_cache.roots (snapshots, fixtures, mocks)."""
+        config = load_guardrails_config(self.project_root)
+        return digest_other_files(
+            self.project_root, self.test_inputs_file,
+            roots=config.get('test_cache', {}).get('roots', DEFAULT_TEST_INPUT_ROOTS),
+            ignore_patterns=config.get('code_metrics', {}).get('ignore', []),
+            discovery=config.get('code_metrics', {}).get('discovery', 'auto')
+        )
+    
+    def lookup_cached_tests(self, other_digests: Optional[Dict[str, str]] = None
+                            ) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """Get the test inputs key and any cached results for it.
+        
+        The key covers the source and test files from the last
+        analyze_codebase call, so the codebase must be analyzed first, and
+        `other_digests` from digest_test_inputs (computed when not given).
+        """
+        digests = self.manifest.digests()
+        digests.update(self.digest_test_inputs() if other_digests is None else other_digests)
+        key = test_inputs_key(self.project_root, digests)
+        cached = self._test_cache().get(key)
+        if cached is not None:
+            cached['cache'] = {
+                'enabled': True,
+                'hit': True,
+                'key': key,
+                'checked_at': datetime.now().isoformat()
+            }
+        return key, cached
+    
+    def store_cached_tests(self, key: str, results: Dict[str, Any]):
+        """Cache complete test results under a test inputs key."""
+        if 'error' not in results and results['complete']:
+            self._test_cache().put(key, {k: v for k, v in results.items() if k != 'cache'})
+    
+    def read_coverage_report(self, previous: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """Read line/branch/function coverage from the Istanbul coverage report.
+        
+        Returns None when no report has been written. A report that has not
+        changed since the previous update is not read again.
+        """
+        coverage_config = load_guardrails_config(self.project_root).get('coverage', {})
+        report_file = find_report(self.project_root, coverage_config.get('report'))
+        if report_file is None:
+            return None
+        stat = report_file.stat()
+        if (previous and previous.get('generated_at') == stat.st_mtime
+                and previous.get('report_bytes') == stat.st_size):
+            previous['files_reused'] = len(previous.get('files', {}))
+            previous['files_aggregated'] = 0
+            return previous
+        cache = CoverageCache(self.context_file.parent / 'coverage_cache.json')
+        cache.load()
+        coverage = read_coverage(self.project_root, report_file, cache)
+        coverage['report_bytes'] = stat.st_size
+        return coverage
+    
+    def _existing_suites(self, suites: Dict[str, Any]) -> Dict[str, Any]:
+        """Drop results for test files that no longer exist."""
+        return {path: suite for path, suite in suites.items()
+                if (self.project_root / path).exists()}
+    
+    def _test_results(self, suites: Dict[str, Any], head: Optional[str],
+                      dirty: Optional[List[str]], mode: str,
+                      suites_run: List[str]) -> Dict[str, Any]:
+        """Build the test_status update for a set of per-suite results."""
+        results = summarize_suites(suites)
+        results.update({
+            'suites': suites,
+            'commit': head,
+            # Uncommitted at `commit`; a later --changed run re-checks them
+            'dirty': dirty,
+            'run_mode': mode,
+            'suites_run': suites_run,
+            'complete': True,
+            'last_run': datetime.now().isoformat(),
+            'success': True
+        })
+        return results
+    
+    def analyze_codebase(self, full_rescan: bool = False,
+                         discovery: Optional[str] = None,
+                         paths: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Analyze the current codebase metrics.
+        
+        Unchanged files are taken from the manifest next to the context file;
+        pass full_rescan=True to ignore it and re-read every file. Files are
+        listed from git when available unless discovery is set to 'walk'.
+        Given the changed `paths`, only those files are looked at.
         
-        # Count files and lines
-        for file_path in self.project_root.rglob('*'):
-            if file_path.is_file() and not any(part.startswith('.') for part in file_path.parts):
-                if file_path.suffix in ['.ts', '.tsx', '.js', '.jsx']:
-                    metrics['total_files'] += 1
-                    
-                    try:
-                        with open(file_path, 'r', encoding='utf-8') as f:
-                            lines = len(f.readlines())
-                            metrics['total_lines'] += lines
-                    except (UnicodeDecodeError, PermissionError):
-                        pass
-                    
-                    if file_path.suffix in ['.ts', '.tsx']:
-                        metrics['typescript_files'] += 1
-                    
-                    if file_path.suffix in ['.tsx', '.jsx'] or 'component' in file_path.name.lower():
-                        metrics['component_files'] += 1
-                    
-                    if 'test' in file_path.name.lower() or 'spec' in file_path.name.lower():
-                        metrics['test_files'] += 1
+        Prohibited patterns from the guardrails config are searched for in
+        the same reads and listed under 'prohibited_patterns'; code, comment
+        and blank lines are broken down by extension and directory under
+        'source_lines'.
+        """
+        config = load_guardrails_config(self.project_root)
+        scan_config = config.get('code_metrics', {})
+        max_file_size_kb = scan_config.get('max_file_size_kb')
+        max_file_size = int(max_file_size_kb * 1024) if max_file_size_kb else None
+        patterns = load_scanner(config)
         
+        self.manifest = FileManifest(self.manifest_file, {'max_file_size': max_file_size,
+                                                          'patterns': patterns.digest})
+        metrics, self.last_scan = scan_codebase(
+            self.project_root, self.manifest, full_rescan,
+            ignore_patterns=scan_config.get('ignore', []),
+            max_file_size=max_file_size,
+            workers=scan_config.get('workers'),
+            discovery=discovery or scan_config.get('discovery', 'auto'),
+            paths=paths,
+            patterns=patterns
+        )
+        metrics = dict(metrics)
+        metrics['prohibited_patterns'] = summarize_findings(self.manifest.files)
+        metrics['source_lines'] = summarize_source_lines(self.manifest.files,
+                                                         scan_config.get('breakdown_depth', 2))
         return metrics
     
     def update_context(self, phase: Optional[str] = None, gate: Optional[str] = None, 
-                      force: bool = False) -> Dict[str, Any]:
-        """Update the development context."""
-        context = self.load_current_context()
+                      force: bool = False, full_rescan: bool = False,
+                      discovery: Optional[str] = None, changed: bool = False,
+                      use_cache: bool = True, red_check: bool = False,
+                      paths: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Update the development context.
+        
+        `paths` lists the files changed since the last update when the
+        caller knows them (watch mode); the scan and a changed-only test
+        run are then limited to those files.
+        
+        Every phase is timed as a span under context['performance']. The
+        saved context cannot time its own write, so the save and history
+        spans are only in self.last_performance and the trace/metrics exports.
+        """
+        recorder = SpanRecorder()
+        with recorder.span('load') as span:
+            context = self.load_current_context()
+            if self.context_file.exists():
+                span['bytes'] = self.context_file.stat().st_size
         
         # Update timestamp
         context['project_info']['last_updated'] = datetime.now().isoformat()
@@ -183,22 +396,86 @@ class ContextUpdater:
         if gate:
             context['current_gate'] = gate
         
+        def run_tests() -> Dict[str, Any]:
+            with recorder.span('tests') as span:
+                results = self.run_tests(changed, context['test_status'], red_check, cancel_tests, paths)
+                if 'suites_run' in results:
+                    span['files'] = len(results['suites_run'])
+                return results
+        
+        def digest_test_inputs() -> Dict[str, str]:
+            with recorder.span('test_inputs') as span:
+                digests = self.digest_test_inputs()
+                span['files'] = len(digests)
+                return digests
+        
+        # With the cache, the other test inputs are digested alongside the
+        # scan and tests only start once the lookup misses. Without it, the
+        # test run (waiting on a subprocess) overlaps the scan (CPU/IO work).
+        cancel_tests = threading.Event()
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            background = pool.submit(digest_test_inputs if use_cache else run_tests)
+            try:
+                with recorder.span('scan') as span:
+                    code_metrics = self.analyze_codebase(full_rescan, discovery, paths)
+                    span['files'] = self.last_scan['files_reread'] + self.last_scan['files_reused']
+                    span['bytes'] = self.last_scan['bytes_read']
+            except BaseException:
+                cancel_tests.set()
+                raise
+            background_result = background.result()
+        
+        cache_key, cached = None, None
+        if use_cache:
+            with recorder.span('test_cache'):
+                cache_key, cached = self.lookup_cached_tests(background_result)
+            test_results = cached if cached is not None else run_tests()
+        else:
+            test_results = background_result
+        
+        if cached is not None:
+            test_results = cached
+        elif cache_key is not None:
+            self.store_cached_tests(cache_key, test_results)
+            if 'error' not in test_results:
+                test_results['cache'] = {'enabled': True, 'hit': False, 'key': cache_key}
+        elif 'error' not in test_results:
+            test_results['cache'] = {'enabled': False, 'hit': False}
+        
+        # Update code metrics
+        context['code_metrics'] = code_metrics
+        context['code_scan'] = self.last_scan
+        
         # Update test status
-        test_results = self.run_tests()
         if 'error' not in test_results:
+            context['test_status'].pop('last_error', None)
+            context['test_status'].pop('note', None)
+            context['test_status'].pop('shards', None)
+            context['test_status'].pop('shard_errors', None)
             context['test_status'].update(test_results)
         else:
             context['test_status']['last_error'] = test_results['error']
             context['test_status']['last_run'] = datetime.now().isoformat()
         
-        # Update code metrics
-        context['code_metrics'] = self.analyze_codebase()
+        with recorder.span('coverage') as span:
+            previous_coverage = context['test_status'].get('coverage')
+            coverage_report = self.read_coverage_report(previous_coverage)
+            if coverage_report is not None:
+                span['files'] = len(coverage_report['files'])
+                span['bytes'] = 0 if coverage_report is previous_coverage else coverage_report['report_bytes']
         
-        # Calculate test coverage if possible
-        if context['test_status']['total_tests'] > 0:
+        # Use line coverage from the Istanbul report when there is one,
+        # otherwise fall back to the test pass rate
+        if coverage_report is not None:
+            context['test_status']['coverage'] = coverage_report
+            context['test_status']['coverage_percentage'] = coverage_report['overall']['lines']['pct']
+            context['test_status']['coverage_source'] = 'istanbul'
+        elif context['test_status']['total_tests'] > 0:
+            context['test_status'].pop('coverage', None)
             coverage = (context['test_status']['passing_tests'] / 
                        context['test_status']['total_tests']) * 100
             context['test_status']['coverage_percentage'] = round(coverage, 2)
+            context['test_status']['coverage_source'] = 'test_pass_rate'
         
         # Update TDD cycle based on test results
         if context['test_status'].get('success'):
@@ -214,12 +491,31 @@ class ContextUpdater:
                     context['tdd_cycle']['last_refactor_phase'] = datetime.now().isoformat()
                     context['tdd_cycle']['cycles_completed'] += 1
         
+        context['performance'] = recorder.performance()
+        
         # Save updated context
-        with open(self.context_file, 'w') as f:
-            json.dump(context, f, indent=2)
+        with recorder.span('save') as span:
+            data = json.dumps(context, indent=2)
+            with open(self.context_file, 'w') as f:
+                f.write(data)
+            span['bytes'] = len(data.encode('utf-8'))
+        with recorder.span('store'):
+            self.store.record(context)
         
+        self.last_performance = recorder.performance()
+        self.export_performance(self.last_performance)
         return context
     
+    def export_performance(self, performance: Dict[str, Any]):
+        """Write an update's spans to the configured trace and metrics files."""
+        try:
+            if self.trace_file:
+                write_chrome_trace(self.trace_file, performance)
+            if self.metrics_file:
+                write_openmetrics(self.metrics_file, performance, {'project': self.project_root.resolve().name})
+        except OSError as e:
+            print(f"Warning: Could not export performance data: {e}")
+    
     def print_summary(self, context: Dict[str, Any]):
         """Print a summary of the current context."""
         print("\n=== Development Context Summary ===")
@@ -234,6 +530,21 @@ class ContextUpdater:
         print(f"Passing: {test_status['passing_tests']}")
         print(f"Failing: {test_status['failing_tests']}")
         print(f"Coverage: {test_status['coverage_percentage']}%")
+        coverage = test_status.get('coverage')
+        if coverage:
+            overall = coverage['overall']
+            print(f"  Lines {overall['lines']['pct']}%, Branches {overall['branches']['pct']}%, "
+                  f"Functions {overall['functions']['pct']}% ({len(coverage['files'])} files, "
+                  f"{coverage['files_aggregated']} re-aggregated, from {coverage['report']})")
+        if 'run_mode' in test_status:
+            source = 'cached' if test_status.get('cache', {}).get('hit') else 'fresh'
+            print(f"Last Run: {test_status['run_mode']}, {source} "
+                  f"({len(test_status.get('suites_run', []))} suites run)")
+        if test_status.get('shards'):
+            print("Shards: " + ', '.join(f"{shard['shard']} {shard['status']} ({shard['seconds']}s)"
+                                         for shard in test_status['shards']))
+        for shard_error in test_status.get('shard_errors', []):
+            print(f"Shard Error: {shard_error}")
         
         print("\n--- Code Metrics ---")
         metrics = context['code_metrics']
@@ -241,6 +552,23 @@ class ContextUpdater:
         print(f"Total Lines: {metrics['total_lines']}")
         print(f"TypeScript Files: {metrics['typescript_files']}")
         print(f"Component Files: {metrics['component_files']}")
+        if 'code_lines' in metrics:
+            print(f"Source Lines: {metrics['code_lines']} code, {metrics['comment_lines']} comment, "
+                  f"{metrics['blank_lines']} blank")
+        prohibited = metrics.get('prohibited_patterns', {}).get('counts')
+        if prohibited:
+            print("Prohibited Patterns: " + ', '.join(f"{name} {count}" for name, count in prohibited.items()))
+        scan = context.get('code_scan')
+        if scan:
+            print(f"Scan: {scan['mode']} ({scan['files_reread']} re-read, "
+                  f"{scan['files_reused']} reused, {scan['files_removed']} removed)")
+            print(f"Discovery: {scan.get('discovery', 'walk')}, {scan.get('entries_visited', 0)} entries visited, "
+                  f"{scan.get('dirs_pruned', 0)} directories pruned")
+        
+        performance = context.get('performance')
+        if performance:
+            stages = ', '.join(f"{name} {seconds}s" for name, seconds in performance['stages'].items())
+            print(f"Update Time: {performance['update_seconds']}s ({stages})")
         
         print("\n--- TDD Cycle ---")
         tdd = context['tdd_cycle']
@@ -257,6 +585,30 @@ def main():
     parser.add_argument('--gate', help='Set the current quality gate')
     parser.add_argument('--force', action='store_true', help='Force update even if tests fail')
     parser.add_argument('--quiet', action='store_true', help='Suppress output')
+    parser.add_argument('--full-rescan', action='store_true',
+                        help='Ignore the file manifest and re-read every source file')
+    parser.add_argument('--discovery', choices=DISCOVERY_BACKENDS,
+                        help='How to list source files (default: git when available)')
+    parser.add_argument('--changed', action='store_true',
+                        help='Only run tests related to files changed since the last recorded run')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Always run the tests, ignoring cached results')
+    parser.add_argument('--red-check', action='store_true',
+                        help='Stop the test run at the first failing test (RED phase check)')
+    parser.add_argument('--shards', type=int, nargs='?', const=0, metavar='N',
+                        help='Split the test run into N parallel Jest shards (default: one per CPU)')
+    parser.add_argument('--watch', action='store_true',
+                        help='Keep running and update the context as files change')
+    parser.add_argument('--watch-backend', choices=WATCH_BACKENDS,
+                        help='How to detect changes in watch mode (default: inotify when available)')
+    parser.add_argument('--trace-file', type=Path,
+                        help='Write the phase timings of each update as a Chrome trace-event file')
+    parser.add_argument('--metrics-file', type=Path,
+                        help='Write the phase timings of each update as OpenMetrics text (textfile collector)')
+    parser.add_argument('--daemon', action='store_true',
+                        help='Run tests in a warm, long-lived Jest daemon')
+    parser.add_argument('--stop-daemon', action='store_true',
+                        help='Stop the Jest daemon for this project and exit')
     
     args = parser.parse_args()
     
@@ -274,12 +626,68 @@ def main():
         sys.exit(1)
     
     updater = ContextUpdater(str(project_root))
+    runner_config = load_guardrails_config(project_root).get('test_runner', {})
+    daemon = JestDaemon(project_root, updater.context_file.parent,
+                        idle_timeout=runner_config.get('idle_timeout_seconds', 900))
+    if args.stop_daemon:
+        daemon.stop()
+        print("Jest daemon stopped")
+        return
+    if args.daemon or runner_config.get('daemon', False):
+        updater.test_daemon = daemon
+    updater.test_shards = args.shards if args.shards is not None else runner_config.get('shards')
+    performance_config = load_guardrails_config(project_root).get('performance', {})
+    trace_file = args.trace_file or performance_config.get('trace_file')
+    metrics_file = args.metrics_file or performance_config.get('metrics_file')
+    updater.trace_file = project_root / trace_file if trace_file else None
+    updater.metrics_file = project_root / metrics_file if metrics_file else None
+    if not args.quiet:
+        updater.on_test_progress = lambda totals: print(
+            f"  tests: {totals['suites_finished']} files, {totals['passing_tests']} passed, "
+            f"{totals['failing_tests']} failed", flush=True)
+    
+    if args.watch:
+        watch_config = load_guardrails_config(project_root).get('watch', {})
+        
+        def report_update(context: Dict[str, Any], paths: Optional[List[str]]):
+            test_status = context['test_status']
+            performance = context.get('performance', {})
+            changed_note = 'rescan' if paths is None else f"{len(paths)} changed"
+            print(f"[{datetime.now():%H:%M:%S}] {changed_note}: "
+                  f"{test_status.get('passing_tests', 0)} passing, "
+                  f"{test_status.get('failing_tests', 0)} failing, "
+                  f"{context['code_metrics']['total_files']} files "
+                  f"({performance.get('update_seconds', 0)}s)", flush=True)
+            if 'last_error' in test_status:
+                print(f"  Error: {test_status['last_error']}", flush=True)
+        
+        stop = threading.Event()
+        signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+        print(f"Watching {project_root} (Ctrl+C to stop)", flush=True)
+        try:
+            watch_context(
+                updater,
+                backend=args.watch_backend or watch_config.get('backend', 'auto'),
+                debounce=watch_config.get('debounce_ms', 300) / 1000,
+                poll_interval=watch_config.get('poll_interval_seconds', 2),
+                ignore_patterns=load_guardrails_config(project_root).get('code_metrics', {}).get('ignore', []),
+                on_update=None if args.quiet else report_update,
+                stop=stop
+            )
+        except KeyboardInterrupt:
+            pass
+        return
     
     try:
         context = updater.update_context(
             phase=args.phase,
             gate=args.gate,
-            force=args.force
+            force=args.force,
+            full_rescan=args.full_rescan,
+            discovery=args.discovery,
+            changed=args.changed,
+            use_cache=not args.no_cache,
+            red_check=args.red_check
         )
         
         if not args.quiet:
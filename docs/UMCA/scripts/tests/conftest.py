@@ -0,0 +1,26 @@
+"""
+Tests for the UMCA context update script.
+
+The script shares its file name with .trae/scripts/update_context.py, so it
+is loaded by path under its own module name. Run with:
+python -m pytest docs/UMCA/scripts/tests
+"""
+
+import importlib.util
+import sys
+from pathlib import Path
+
+import pytest
+
+SCRIPT = Path(__file__).resolve().parent.parent / "update_context.py"
+
+
+@pytest.fixture(scope="session")
+def umca():
+    module = sys.modules.get("umca_update_context")
+    if module is None:
+        spec = importlib.util.spec_from_file_location("umca_update_context", SCRIPT)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[spec.name] = module
+        spec.loader.exec_module(module)
+    return module
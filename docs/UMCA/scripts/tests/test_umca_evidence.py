@@ -0,0 +1,91 @@
+"""Tests for the evidence store and its incremental Markdown render."""
+
+import json
+
+LOG = """# Evidence Log
+
+**Last Updated**: 2025-08-12
+
+## Evidence Registry
+
+### Manual evidence
+- kept
+
+### 2025-08-12 - Context Update Evidence
+
+#### Project State Update
+- **Artifact**: Context Update - old change
+- **Type**: State Management
+- **Timestamp**: 2025-08-12 10:00:00 UTC
+- **Location**: `docs/UMCA/state/CURRENT_STATE.md`
+- **Validation**: Automated context persistence
+- **Status**: ✅ LOGGED
+
+## Notes
+
+trailing
+"""
+
+
+def setup_state(umca, tmp_path, monkeypatch):
+    state_dir = tmp_path / "state"
+    state_dir.mkdir()
+    (state_dir / "EVIDENCE_LOG.md").write_text(LOG, encoding="utf-8")
+    (state_dir / "CURRENT_STATE.md").write_text("# State\n", encoding="utf-8")
+    monkeypatch.setattr(umca, "get_state_dir", lambda: state_dir)
+    monkeypatch.setattr(umca, "get_project_root", lambda: tmp_path)
+    return state_dir
+
+
+def full_render(umca, state_dir):
+    """What a from-scratch render of the whole store produces"""
+    (state_dir / umca.EVIDENCE_RENDER_STATE_NAME).unlink()
+    umca.render_evidence_log(force=True)
+    return (state_dir / "EVIDENCE_LOG.md").read_text(encoding="utf-8")
+
+
+def test_import_keeps_backup(umca, tmp_path, monkeypatch):
+    state_dir = setup_state(umca, tmp_path, monkeypatch)
+
+    assert umca.update_evidence_log("first")
+
+    assert (state_dir / umca.EVIDENCE_BACKUP_NAME).read_text(encoding="utf-8") == LOG
+    content = (state_dir / "EVIDENCE_LOG.md").read_text(encoding="utf-8")
+    assert content.count("Context Update Evidence") == 2
+    assert content.index("first") < content.index("old change") < content.index(umca.EVIDENCE_END_MARKER)
+    assert "### Manual evidence" in content and content.endswith("trailing\n")
+
+
+def test_incremental_render_matches_full_render(umca, tmp_path, monkeypatch):
+    state_dir = setup_state(umca, tmp_path, monkeypatch)
+    monkeypatch.setattr(umca, "EVIDENCE_RENDER_BATCH", 3)
+    umca.update_evidence_log("first")
+
+    for i in range(7):
+        umca.update_evidence_log(f"change {i}")
+    content = (state_dir / "EVIDENCE_LOG.md").read_text(encoding="utf-8")
+    render_state = json.loads((state_dir / umca.EVIDENCE_RENDER_STATE_NAME).read_text())
+    assert render_state["entries"] == 8
+    assert "change 5" in content and "change 6" not in content
+
+    umca.render_evidence_log(force=True)
+    content = (state_dir / "EVIDENCE_LOG.md").read_text(encoding="utf-8")
+    assert content == full_render(umca, state_dir)
+    assert content.count("Context Update Evidence") == 9
+
+
+def test_render_finds_markers_after_manual_edit(umca, tmp_path, monkeypatch):
+    state_dir = setup_state(umca, tmp_path, monkeypatch)
+    umca.update_evidence_log("first")
+    evidence_file = state_dir / "EVIDENCE_LOG.md"
+    evidence_file.write_text("Intro added by hand\n\n" + evidence_file.read_text(encoding="utf-8"),
+                             encoding="utf-8")
+
+    umca.append_evidence_entries(state_dir / umca.EVIDENCE_STORE_NAME,
+                                 [umca.make_evidence_entry("second", "2026-10-18 00:00:00 UTC")])
+    assert umca.render_evidence_log(force=True)
+
+    content = evidence_file.read_text(encoding="utf-8")
+    assert content.startswith("Intro added by hand\n")
+    assert "**Last Updated**: 2026-10-18\n" in content
+    assert content == full_render(umca, state_dir)
@@ -0,0 +1,94 @@
+"""Tests for reading commit, branch and dirty state straight from .git."""
+
+import os
+import shutil
+import subprocess
+import time
+
+import pytest
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="git is not installed")
+
+
+def git(repo, *args):
+    env = dict(os.environ, GIT_AUTHOR_NAME="t", GIT_AUTHOR_EMAIL="t@example.com",
+               GIT_COMMITTER_NAME="t", GIT_COMMITTER_EMAIL="t@example.com")
+    env.pop("GIT_DIR", None)
+    env.pop("GIT_WORK_TREE", None)
+    return subprocess.run(["git", *args], cwd=repo, env=env, check=True,
+                          capture_output=True, text=True).stdout.strip()
+
+
+@pytest.fixture
+def repo(tmp_path):
+    repo = tmp_path / "repo"
+    (repo / "src").mkdir(parents=True)
+    git(repo, "init", "-q", "-b", "main")
+    # Files older than the index, so none of them is racily clean
+    past = time.time() - 60
+    for name in ("README.md", "src/app.ts", "src/util.ts"):
+        (repo / name).write_text(f"{name}\n")
+        os.utime(repo / name, (past, past))
+    git(repo, "add", ".")
+    git(repo, "commit", "-q", "-m", "initial")
+    return repo
+
+
+def test_clean_repository_matches_git(umca, repo):
+    info = umca.read_git_info(repo)
+    assert info == {"commit": git(repo, "rev-parse", "HEAD"),
+                    "branch": git(repo, "branch", "--show-current"),
+                    "dirty": False}
+
+
+@pytest.mark.parametrize("index_version", ["2", "3", "4"])
+def test_modified_and_deleted_files_are_dirty(umca, repo, index_version):
+    git(repo, "update-index", "--index-version", index_version)
+    assert umca.read_git_info(repo)["dirty"] is False
+
+    (repo / "src" / "util.ts").write_text("changed\n")
+    assert umca.read_git_info(repo)["dirty"] is True
+
+    git(repo, "checkout", "--", "src/util.ts")
+    past = time.time() - 60
+    os.utime(repo / "src" / "util.ts", (past, past))
+    git(repo, "update-index", "--refresh")
+    assert umca.read_git_info(repo)["dirty"] is False
+
+    (repo / "src" / "app.ts").unlink()
+    assert umca.read_git_info(repo)["dirty"] is True
+
+
+def test_untracked_files_are_not_dirty(umca, repo):
+    (repo / "notes.txt").write_text("scratch\n")
+    assert umca.read_git_info(repo)["dirty"] is False
+
+
+def test_detached_head_and_packed_refs(umca, repo):
+    commit = git(repo, "rev-parse", "HEAD")
+    git(repo, "pack-refs", "--all")
+    assert umca.read_git_info(repo)["commit"] == commit
+
+    git(repo, "checkout", "-q", "--detach")
+    info = umca.read_git_info(repo)
+    assert info["commit"] == commit
+    assert info["branch"] == ""
+
+
+def test_linked_worktree(umca, repo, tmp_path):
+    worktree = tmp_path / "feature"
+    git(repo, "worktree", "add", "-q", "-b", "feature", str(worktree))
+    info = umca.read_git_info(worktree)
+    assert info["commit"] == git(worktree, "rev-parse", "HEAD")
+    assert info["branch"] == "feature"
+
+
+def test_git_environment_defers_to_git(umca, repo, monkeypatch):
+    monkeypatch.setenv("GIT_DIR", str(repo / ".git"))
+    assert umca.read_git_info(repo) is None
+
+
+def test_outside_a_repository(umca, tmp_path):
+    if umca.find_git_directories(tmp_path) is not None:
+        pytest.skip("temporary directory is inside a git repository")
+    assert umca.read_git_info(tmp_path) == {"commit": "unknown", "branch": "unknown", "dirty": None}
@@ -0,0 +1,93 @@
+"""Tests for the snapshot pack: deltas, keyframes, the head file and import."""
+
+import json
+
+import pytest
+
+
+def make_snapshot(i, commit="abc123"):
+    # Consecutive pairs share their content
+    change = f"change {i // 2}"
+    return {
+        "timestamp": f"2026-10-18T10:{i // 60:02d}:{i % 60:02d}+00:00",
+        "change_description": change,
+        "git_info": {"commit": commit, "branch": "main", "dirty": i // 2 % 2 == 0},
+        "project_state": {"current_phase": "G0", "active_tasks": [],
+                          "recent_changes": change, "notes": "x" * 400}
+    }
+
+
+@pytest.mark.parametrize("delta", [
+    {"set": [], "unset": []},
+    {"set": [[["a", "b"], 1], [["c"], [1, 2]]], "unset": [["d"]]},
+])
+def test_delta_round_trip(umca, delta):
+    base = {"a": {"b": 0, "keep": True}, "d": "gone", "e": {"f": None}}
+    content = umca.apply_snapshot_delta(base, delta)
+    assert umca.apply_snapshot_delta(base, umca.snapshot_delta(base, content)) == content
+    assert base["a"]["b"] == 0
+
+
+def test_every_snapshot_rebuilds(umca, tmp_path, monkeypatch):
+    monkeypatch.setattr(umca, "SNAPSHOT_KEYFRAME_INTERVAL", 4)
+    snapshots = [make_snapshot(i) for i in range(30)]
+    entries = [umca.store_snapshot(tmp_path, snapshot) for snapshot in snapshots]
+
+    stored = [entry["stored"] for entry in entries]
+    assert stored.count("keyframe") >= 2 and "delta" in stored and "duplicate" in stored
+    history = umca.load_snapshot_index(tmp_path)
+    assert history == entries
+    for snapshot, entry in zip(snapshots, entries):
+        assert umca.rebuild_snapshot(tmp_path, entry) == snapshot
+
+    # The head kept up to date matches one rebuilt from the index
+    head = json.loads((tmp_path / umca.SNAPSHOT_HEAD_NAME).read_text())
+    (tmp_path / umca.SNAPSHOT_HEAD_NAME).unlink()
+    assert umca.load_snapshot_head(tmp_path) == head
+
+
+def test_entries_without_keyframe_location_rebuild(umca, tmp_path):
+    snapshots = [make_snapshot(i) for i in range(1, 4)]
+    for snapshot in snapshots:
+        umca.store_snapshot(tmp_path, snapshot)
+    # As written before delta entries recorded their keyframe's location
+    index_file = tmp_path / umca.SNAPSHOT_INDEX_NAME
+    history = [{k: v for k, v in e.items() if k not in ("base_offset", "base_length")}
+               for e in umca.load_snapshot_index(tmp_path)]
+    index_file.write_text("".join(json.dumps(e) + "\n" for e in history))
+
+    assert [umca.rebuild_snapshot(tmp_path, e) for e in history] == snapshots
+    entry = umca.store_snapshot(tmp_path, make_snapshot(5))
+    assert entry["stored"] == "delta" and entry["base_offset"] == history[0]["offset"]
+
+
+def test_import_removes_loose_files(umca, tmp_path):
+    for i in (1, 2):
+        (tmp_path / f"context-2026101{i}.json").write_text(json.dumps(make_snapshot(i)))
+    (tmp_path / "context-broken.json").write_text("{")
+
+    umca.import_loose_snapshots(tmp_path)
+
+    assert sorted(p.name for p in tmp_path.glob("context-*.json")) == ["context-broken.json"]
+    history = umca.load_snapshot_index(tmp_path)
+    assert [umca.rebuild_snapshot(tmp_path, e) for e in history] == [make_snapshot(1), make_snapshot(2)]
+
+
+def test_snapshots_in_the_same_second_get_distinct_ids(umca, tmp_path):
+    first = make_snapshot(0)
+    second = dict(make_snapshot(2), timestamp=first["timestamp"])
+    entries = [umca.store_snapshot(tmp_path, snapshot) for snapshot in (first, second)]
+
+    assert entries[0]["id"] != entries[1]["id"]
+    history = umca.load_snapshot_index(tmp_path)
+    for snapshot, entry in zip((first, second), entries):
+        matches = umca.find_snapshots(history, entry["id"])
+        assert matches == [entry]
+        assert umca.rebuild_snapshot(tmp_path, matches[-1], history) == snapshot
+
+    # A head written before it counted snapshots is rebuilt, and numbering goes on
+    head_file = tmp_path / umca.SNAPSHOT_HEAD_NAME
+    head = json.loads(head_file.read_text())
+    del head["count"]
+    head_file.write_text(json.dumps(head))
+    assert umca.store_snapshot(tmp_path, make_snapshot(4))["id"].endswith("-3")
@@ -0,0 +1,52 @@
+"""Tests for the in-place CURRENT_STATE.md activity update."""
+
+import json
+
+STATE = (b"# Current State\n\n**Last Updated**: 2025-08-12\n\n## Status\n\nok\n\n"
+         b"## Recent Activity\n\n### Manual note\n- kept\n\n## Next\n\nmore\n")
+
+
+def entry(date, text):
+    return f"### {date} - Context Update\n- 🔄 **{date} 00:00:00 UTC**: {text}\n\n".encode()
+
+
+def test_date_overwritten_in_place_and_prefix_untouched(umca, tmp_path):
+    state_file = tmp_path / "CURRENT_STATE.md"
+    state_file.write_bytes(STATE)
+    insert = STATE.index(b"### Manual")
+
+    umca.add_recent_activity(state_file, [entry("2026-10-18", "first")], "2026-10-18")
+
+    content = state_file.read_bytes()
+    assert content[:insert] == STATE[:insert].replace(b"2025-08-12", b"2026-10-18")
+    assert content[insert:] == entry("2026-10-18", "first") + STATE[insert:]
+
+
+def test_index_matches_rebuild_after_retention(umca, tmp_path, monkeypatch):
+    monkeypatch.setattr(umca, "ACTIVITY_RETENTION", 3)
+    state_file = tmp_path / "CURRENT_STATE.md"
+    state_file.write_bytes(STATE)
+
+    for day in range(10, 16):
+        date = f"2026-10-{day}"
+        umca.add_recent_activity(state_file, [entry(date, str(day))], date)
+
+    index = json.loads((tmp_path / umca.STATE_INDEX_NAME).read_text())
+    rebuilt = umca.build_state_index(state_file)
+    for key in ("insert_offset", "last_updated", "entries"):
+        assert index[key] == rebuilt[key]
+    assert [date for _, _, date in rebuilt["entries"]] == ["2026-10-15", "2026-10-14", "2026-10-13"]
+    archive = (tmp_path / "archive" / "RECENT_ACTIVITY-2026-10.md").read_bytes()
+    assert archive.index(b"2026-10-10") < archive.index(b"2026-10-12")
+
+
+def test_short_date_field_is_widened(umca, tmp_path):
+    state_file = tmp_path / "CURRENT_STATE.md"
+    state_file.write_bytes(STATE.replace(b"2025-08-12", b"TBD"))
+
+    umca.add_recent_activity(state_file, [entry("2026-10-18", "a")], "2026-10-18")
+    umca.add_recent_activity(state_file, [entry("2026-10-19", "b")], "2026-10-19")
+
+    index = json.loads((tmp_path / umca.STATE_INDEX_NAME).read_text())
+    assert index["last_updated"] == umca.build_state_index(state_file)["last_updated"]
+    assert b"**Last Updated**: 2026-10-19\n" in state_file.read_bytes()
@@ -0,0 +1,44 @@
+"""The UMCA trace and metrics writers must match .trae/scripts/context_trace.py."""
+
+import importlib.util
+import sys
+from pathlib import Path
+
+import pytest
+
+CONTEXT_TRACE = Path(__file__).resolve().parents[4] / ".trae" / "scripts" / "context_trace.py"
+
+
+@pytest.fixture(scope="module")
+def context_trace():
+    module = sys.modules.get("context_trace")
+    if module is None:
+        spec = importlib.util.spec_from_file_location("context_trace", CONTEXT_TRACE)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def performance():
+    return {
+        "started_at": 1760000000.25,
+        "stages": {"state": 0.012, "evidence": 0.003},
+        "spans": [
+            {"name": "state", "thread": "MainThread", "start": 0.001, "seconds": 0.012,
+             "files": 2, "bytes": 4096},
+            {"name": 'evidence "log"', "thread": "worker-1", "start": 0.004, "seconds": 0.003},
+        ],
+        "update_seconds": 0.02,
+    }
+
+
+def test_chrome_trace_matches(umca, context_trace, performance):
+    expected = context_trace.chrome_trace(performance, umca.TRACE_PROCESS_NAME, umca.TRACE_CATEGORY)
+    assert umca.chrome_trace(performance) == expected
+
+
+def test_openmetrics_matches(umca, context_trace, performance):
+    project = 'demo "app"'
+    expected = context_trace.openmetrics(performance, {"project": project}, umca.METRIC_PREFIX)
+    assert umca.openmetrics(performance, project) == expected
@@ -4,14 +4,38 @@
 Context Update Script for Master Coordinator AI
 Updates project state and evidence log after task completion
 Usage: python3 scripts/update_context.py "description of changes"
+       python3 scripts/update_context.py --batch [file|-]
+       python3 scripts/update_context.py --render-evidence
+       python3 scripts/update_context.py --snapshots [show] [id|commit|hash prefix]
+       python3 scripts/update_context.py [--trace-file PATH] [--metrics-file PATH] ...
+
+--batch applies one change description per line (from a file, or stdin)
+with a single update of each state file, one git query and one snapshot.
+
+Evidence is appended to EVIDENCE_LOG.jsonl in the state directory and
+rendered into EVIDENCE_LOG.md every UMCA_EVIDENCE_RENDER_BATCH entries
+(default 20) or on --render-evidence. Context snapshots are stored in a
+deduplicated pack in execution/evidence/context-snapshots; --snapshots lists
+them and --snapshots show rebuilds one
+
+Each update times its phases; the timings are kept in
+.update_performance.json in the state directory and can be written as a
+Chrome trace (--trace-file) or OpenMetrics text (--metrics-file)
 
 Auto-detects project structure and state file locations
 Supports multiple deployment patterns and configurations
 """
 
 import os
+import re
 import sys
 import json
+import zlib
+import struct
+import hashlib
+import threading
+import contextlib
+import time
 from datetime import datetime, timezone
 from pathlib import Path
 
@@ -40,9 +64,9 @@ def find_project_root():
     # Fallback to current directory
     return current_dir
 
-def find_state_directory():
+def find_state_directory(project_root=None):
     """Auto-detect state directory in common UMCA locations"""
-    project_root = find_project_root()
+    project_root = project_root or find_project_root()
     
     candidate_dirs = [
         # Environment variable override
@@ -82,9 +106,9 @@ def find_state_directory():
     print(f"📁 Using fallback state directory: {fallback_dir}")
     return fallback_dir
 
-def find_evidence_directory():
+def find_evidence_directory(project_root=None):
     """Auto-detect evidence directory for context snapshots"""
-    project_root = find_project_root()
+    project_root = project_root or find_project_root()
     
     candidate_dirs = [
         # Environment variable override
@@ -123,69 +147,445 @@ def find_evidence_directory():
     print(f"📁 Using fallback evidence directory: {fallback_dir}")
     return fallback_dir
 
-# Dynamic configuration based on auto-detection
-PROJECT_ROOT = find_project_root()
-STATE_DIR = find_state_directory()
-EVIDENCE_DIR = find_evidence_directory()
+def write_text_atomic(path, content):
+    """Replace a file's content without leaving it half-written"""
+    tmp_file = path.with_name(f".{path.name}.tmp")
+    tmp_file.write_text(content, encoding='utf-8')
+    os.replace(tmp_file, path)
+
+# Dynamic configuration based on auto-detection. Discovery runs on first use,
+# not at import, and its result is cached per working directory in memory and
+# in a small file so later processes skip probing the filesystem
+PATHS_CACHE_FILE = Path(os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache') / 'umca' / 'resolved_paths.json'
+PATHS_CACHE_LIMIT = 64
+_resolved_paths = {}
+
+def _load_paths_cache():
+    try:
+        return json.loads(PATHS_CACHE_FILE.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
+
+def resolve_paths():
+    """Get (project root, state directory, evidence directory) for the cwd
+
+    A cached result is reused while its directories still exist; delete
+    PATHS_CACHE_FILE to force discovery after moving state directories.
+    """
+    key = json.dumps([os.getcwd(), os.environ.get('UMCA_STATE_DIR'),
+                      os.environ.get('UMCA_EVIDENCE_DIR')])
+    if key in _resolved_paths:
+        return _resolved_paths[key]
+    
+    cache = _load_paths_cache()
+    cached = cache.get(key)
+    if cached and all(os.path.isdir(path) for path in cached):
+        paths = tuple(Path(path) for path in cached)
+    else:
+        project_root = find_project_root()
+        paths = (project_root, find_state_directory(project_root),
+                 find_evidence_directory(project_root))
+        cache.pop(key, None)
+        cache[key] = [str(path) for path in paths]
+        for stale_key in list(cache)[:-PATHS_CACHE_LIMIT]:
+            del cache[stale_key]
+        try:
+            PATHS_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+            write_text_atomic(PATHS_CACHE_FILE, json.dumps(cache, indent=2))
+        except OSError:
+            pass
+    
+    _resolved_paths[key] = paths
+    return paths
+
+def get_project_root():
+    """Project root for the current working directory"""
+    return resolve_paths()[0]
+
+def get_state_dir():
+    """State directory holding CURRENT_STATE.md and EVIDENCE_LOG.md"""
+    return resolve_paths()[1]
+
+def get_evidence_dir():
+    """Evidence directory holding context snapshots"""
+    return resolve_paths()[2]
+
+def __getattr__(name):
+    # PROJECT_ROOT, STATE_DIR and EVIDENCE_DIR stay available to importers
+    paths = {'PROJECT_ROOT': 0, 'STATE_DIR': 1, 'EVIDENCE_DIR': 2}
+    if name in paths:
+        return resolve_paths()[paths[name]]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# CURRENT_STATE.md keeps the newest activity entries; older generated
+# entries are moved into monthly archive segments under state/archive
+ACTIVITY_RETENTION = max(int(os.environ.get('UMCA_ACTIVITY_RETENTION', '25')), 1)
+ACTIVITY_ARCHIVE_DIR_NAME = "archive"
+STATE_INDEX_NAME = ".current_state_index.json"
+ACTIVITY_HEADING = b"## Recent Activity"
+LAST_UPDATED_PREFIX = b"**Last Updated**: "
+ACTIVITY_ENTRY_PATTERN = re.compile(
+    rb"^### (?P<date>\d{4}-\d{2}-\d{2}) - Context Update[ \t]*\n- [^\n]*\n\n*",
+    re.MULTILINE
+)
+
+def build_state_index(state_file):
+    """Scan CURRENT_STATE.md once for the byte offsets an update needs
+
+    The index records where new activity goes, where the Last Updated date
+    is, and the extent of every generated activity entry (newest first).
+    It is only valid while the file's size and mtime match.
+    """
+    content = state_file.read_bytes()
+    heading = re.search(rb"^" + re.escape(ACTIVITY_HEADING) + rb"[^\n]*\n\n?", content, re.MULTILINE)
+    if heading is None:
+        content = content.rstrip(b"\n") + b"\n\n" + ACTIVITY_HEADING + b"\n\n"
+        state_file.write_bytes(content)
+        heading = re.search(rb"^" + re.escape(ACTIVITY_HEADING) + rb"[^\n]*\n\n?", content, re.MULTILINE)
+    section_end = content.find(b"\n## ", heading.end())
+    section_end = len(content) if section_end == -1 else section_end + 1
+
+    last_updated = re.search(rb"^" + re.escape(LAST_UPDATED_PREFIX) + rb"([^\n]*)", content, re.MULTILINE)
+    entries = [[m.start(), m.end() - m.start(), m.group('date').decode()]
+               for m in ACTIVITY_ENTRY_PATTERN.finditer(content, heading.end(), section_end)]
+    stat = state_file.stat()
+    return {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "insert_offset": heading.end(),
+        "last_updated": [last_updated.start(1), last_updated.end(1) - last_updated.start(1)]
+                        if last_updated and last_updated.start() < heading.end() else None,
+        "entries": entries
+    }
+
+def load_state_index(state_file):
+    """Load the CURRENT_STATE.md offset index, rebuilding it if stale"""
+    index_file = state_file.parent / STATE_INDEX_NAME
+    try:
+        index = json.loads(index_file.read_text(encoding='utf-8'))
+        stat = state_file.stat()
+        if index["size"] == stat.st_size and index["mtime_ns"] == stat.st_mtime_ns:
+            return index
+    except (OSError, ValueError, KeyError):
+        pass
+    return build_state_index(state_file)
+
+def archive_activity_entries(state_dir, entries):
+    """Append activity entries, oldest first, to their dated archive segments"""
+    archive_dir = state_dir / ACTIVITY_ARCHIVE_DIR_NAME
+    archive_dir.mkdir(exist_ok=True)
+    by_month = {}
+    for date, text in entries:
+        by_month.setdefault(date[:7], []).append(text)
+    for month, texts in sorted(by_month.items()):
+        archive_file = archive_dir / f"RECENT_ACTIVITY-{month}.md"
+        with open(archive_file, 'ab') as f:
+            if f.tell() == 0:
+                f.write(f"# Recent Activity Archive - {month}\n\n".encode('utf-8'))
+            f.write(b"".join(texts))
+
+def splice_in_place(f, insert_offset, data, field=None, value=b""):
+    """Replace everything from insert_offset on with data, updating a field before it
+
+    `field` is the [offset, width] of a value ahead of insert_offset (such as
+    a Last Updated date), overwritten in place and padded to its width so
+    nothing else moves. Only a field too short for `value` is widened (and
+    its width in `field` updated), which rewrites the bytes between it and
+    insert_offset once. Returns how far insert_offset moved.
+    """
+    start, prefix = insert_offset, b""
+    if field and field[1] >= len(value):
+        f.seek(field[0])
+        f.write(value.ljust(field[1]))
+    elif field:
+        start = field[0]
+        f.seek(start)
+        prefix = value + f.read(insert_offset - start)[field[1]:]
+        field[1] = len(value)
+    f.seek(start)
+    f.write(prefix + data)
+    f.truncate()
+    return start + len(prefix) - insert_offset
+
+def add_recent_activity(state_file, activities, today):
+    """Insert activity entries (newest first) at the top of Recent Activity in place
+
+    The Last Updated date is a fixed-width field overwritten where it is,
+    and only the bytes from the insertion point on are rewritten. Generated
+    entries beyond ACTIVITY_RETENTION are cut from the section and moved to
+    the archive, which keeps the rewrite, and so the cost of an update, bounded.
+    """
+    index = load_state_index(state_file)
+    insert_offset = index["insert_offset"]
+    last_updated = index["last_updated"]
+    date = today.encode()
+
+    # Entries are newest first, so the expired ones are at the end of the section
+    added, overflow = activities[:ACTIVITY_RETENTION], activities[ACTIVITY_RETENTION:]
+    keep_existing = ACTIVITY_RETENTION - len(added)
+    kept, expired = index["entries"][:keep_existing], index["entries"][keep_existing:]
+
+    with open(state_file, 'r+b') as f:
+        f.seek(insert_offset)
+        tail = f.read()
+        archived = []
+        for offset, length, entry_date in reversed(expired):
+            pos = offset - insert_offset
+            archived.append((entry_date, tail[pos:pos + length]))
+            tail = tail[:pos] + tail[pos + length:]
+        archived += [(today, activity) for activity in reversed(overflow)]
+
+        inserted = b"".join(added)
+        shift = splice_in_place(f, insert_offset, inserted + tail, last_updated, date)
+
+    if archived:
+        archive_activity_entries(state_file.parent, archived)
+
+    # Shift the recorded offsets instead of rescanning the file
+    new_insert_offset = insert_offset + shift
+    entries = []
+    offset = new_insert_offset
+    for activity in added:
+        entries.append([offset, len(activity), today])
+        offset += len(activity)
+    entries += [[offset + shift + len(inserted), length, entry_date] for offset, length, entry_date in kept]
+    stat = state_file.stat()
+    index.update({
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "insert_offset": new_insert_offset,
+        "last_updated": last_updated,
+        "entries": entries
+    })
+    write_text_atomic(state_file.parent / STATE_INDEX_NAME, json.dumps(index))
+    return len(archived)
+
+def as_descriptions(change_description):
+    """Accept one change description or a batch of them (oldest first)"""
+    if isinstance(change_description, str):
+        return [change_description]
+    return list(change_description)
 
 def update_current_state(change_description):
-    """Update the CURRENT_STATE.md file with the latest change"""
-    state_file = STATE_DIR / "CURRENT_STATE.md"
+    """Update the CURRENT_STATE.md file with the latest change(s)"""
+    descriptions = as_descriptions(change_description)
+    state_file = get_state_dir() / "CURRENT_STATE.md"
     timestamp = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC")
+    today = datetime.now(timezone.utc).strftime('%Y-%m-%d')
     
     if not state_file.exists():
         print(f"❌ State file not found: {state_file}")
         return False
     
     try:
-        content = state_file.read_text(encoding='utf-8')
-        
-        # Find the "Recent Activity" section
-        lines = content.split('\n')
-        new_lines = []
-        activity_section_found = False
-        activity_section_updated = False
-        
-        for i, line in enumerate(lines):
-            if "## Recent Activity" in line:
-                activity_section_found = True
-                new_lines.append(line)
-                new_lines.append("")
-                # Add the new activity entry
-                new_lines.append(f"### {datetime.now(timezone.utc).strftime('%Y-%m-%d')} - Context Update")
-                new_lines.append(f"- 🔄 **{timestamp}**: {change_description}")
-                new_lines.append("")
-                activity_section_updated = True
-                continue
-            elif activity_section_found and line.startswith("### ") and not activity_section_updated:
-                # This is the start of an existing activity entry
-                new_lines.append(f"### {datetime.now(timezone.utc).strftime('%Y-%m-%d')} - Context Update") 
-                new_lines.append(f"- 🔄 **{timestamp}**: {change_description}")
-                new_lines.append("")
-                new_lines.append(line)
-                activity_section_updated = True
-                continue
-            
-            new_lines.append(line)
-        
-        # Update the "Last Updated" timestamp at the top
-        for i, line in enumerate(new_lines):
-            if line.startswith("**Last Updated**:"):
-                new_lines[i] = f"**Last Updated**: {datetime.now(timezone.utc).strftime('%Y-%m-%d')}"
-                break
-        
-        # Write updated content
-        state_file.write_text('\n'.join(new_lines), encoding='utf-8')
-        print(f"✅ Updated CURRENT_STATE.md with: {change_description}")
+        activities = [(f"### {today} - Context Update\n"
+                       f"- 🔄 **{timestamp}**: {description}\n\n").encode('utf-8')
+                      for description in reversed(descriptions)]
+        archived = add_recent_activity(state_file, activities, today)
+        if len(descriptions) == 1:
+            print(f"✅ Updated CURRENT_STATE.md with: {descriptions[0]}")
+        else:
+            print(f"✅ Updated CURRENT_STATE.md with {len(descriptions)} changes")
+        if archived:
+            print(f"🗄️ Archived {archived} older activity entries")
         return True
         
     except Exception as e:
         print(f"❌ Failed to update state file: {e}")
         return False
 
+# Evidence entries are appended to a JSONL store next to EVIDENCE_LOG.md at
+# constant cost; the Markdown registry is re-rendered from the store in batches
+EVIDENCE_STORE_NAME = "EVIDENCE_LOG.jsonl"
+EVIDENCE_RENDER_STATE_NAME = ".evidence_render.json"
+EVIDENCE_RENDER_BATCH = int(os.environ.get('UMCA_EVIDENCE_RENDER_BATCH', '20'))
+EVIDENCE_BEGIN_MARKER = "<!-- evidence-store:begin (rendered from EVIDENCE_LOG.jsonl) -->"
+EVIDENCE_END_MARKER = "<!-- evidence-store:end -->"
+EVIDENCE_BACKUP_NAME = "EVIDENCE_LOG.pre-import.md"
+
+# Context update entries as previously written into EVIDENCE_LOG.md
+EVIDENCE_BLOCK_PATTERN = re.compile(
+    r"^### [^\n]* - Context Update Evidence\n\n"
+    r"#### Project State Update[ \t]*\n"
+    r"- \*\*Artifact\*\*: Context Update - (?P<description>[^\n]*)\n"
+    r"- \*\*Type\*\*: (?P<type>[^\n]*)\n"
+    r"- \*\*Timestamp\*\*: (?P<timestamp>[^\n]*)\n"
+    r"- \*\*Location\*\*: `(?P<location>[^`\n]*)`\n"
+    r"- \*\*Validation\*\*: (?P<validation>[^\n]*)\n"
+    r"- \*\*Status\*\*: (?P<status>[^\n]*)\n\n*",
+    re.MULTILINE
+)
+
+def make_evidence_entry(change_description, timestamp):
+    """Build a structured evidence entry for a context update"""
+    return {
+        "timestamp": timestamp,
+        "description": change_description,
+        "type": "State Management",
+        "location": str((get_state_dir() / 'CURRENT_STATE.md').relative_to(get_project_root())),
+        "validation": "Automated context persistence",
+        "status": "✅ LOGGED"
+    }
+
+def format_evidence_entry(entry):
+    """Render one evidence entry as an EVIDENCE_LOG.md registry block"""
+    return "\n".join([
+        f"### {entry['timestamp'][:10]} - Context Update Evidence",
+        "",
+        "#### Project State Update",
+        f"- **Artifact**: Context Update - {entry['description']}",
+        f"- **Type**: {entry['type']}",
+        f"- **Timestamp**: {entry['timestamp']}",
+        f"- **Location**: `{entry['location']}`",
+        f"- **Validation**: {entry['validation']}",
+        f"- **Status**: {entry['status']}",
+        "",
+        ""
+    ])
+
+def append_evidence_entries(store_file, entries):
+    """Append entries to the evidence store in a single write"""
+    data = "".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries)
+    fd = os.open(store_file, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, data.encode('utf-8'))
+    finally:
+        os.close(fd)
+
+def read_evidence_entries(store_file, offset=0, end=None):
+    """Read evidence entries from the store between two byte offsets"""
+    entries = []
+    with open(store_file, 'rb') as f:
+        f.seek(offset)
+        data = f.read() if end is None else f.read(end - offset)
+    for line in data.splitlines():
+        if line.strip():
+            entries.append(json.loads(line))
+    return entries
+
+def import_evidence_log(evidence_file, store_file):
+    """One-time import of context update entries from EVIDENCE_LOG.md
+
+    Entries are de-duplicated (older versions of this script repeated them
+    before every heading in the file), stored oldest first, and removed from
+    the Markdown, which gets store markers under "## Evidence Registry".
+    The Markdown as it was is kept in EVIDENCE_BACKUP_NAME first.
+    """
+    content = evidence_file.read_text(encoding='utf-8')
+    backup_file = evidence_file.with_name(EVIDENCE_BACKUP_NAME)
+    if not backup_file.exists():
+        write_text_atomic(backup_file, content)
+    entries = {}
+    for match in EVIDENCE_BLOCK_PATTERN.finditer(content):
+        entry = match.groupdict()
+        entries[(entry['timestamp'], entry['description'], entry['location'])] = entry
+    imported = sorted(entries.values(), key=lambda entry: entry['timestamp'])
+
+    content = EVIDENCE_BLOCK_PATTERN.sub("", content)
+    if EVIDENCE_BEGIN_MARKER not in content:
+        markers = f"{EVIDENCE_BEGIN_MARKER}\n{EVIDENCE_END_MARKER}\n"
+        registry = re.search(r"^## Evidence Registry[^\n]*\n\n?", content, re.MULTILINE)
+        if registry:
+            content = content[:registry.end()] + markers + "\n" + content[registry.end():]
+        else:
+            content = content.rstrip("\n") + "\n\n## Evidence Registry\n\n" + markers
+
+    tmp_file = store_file.with_suffix('.tmp')
+    tmp_file.write_text("".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in imported),
+                        encoding='utf-8')
+    write_text_atomic(evidence_file, content)
+    os.replace(tmp_file, store_file)
+    print(f"📥 Imported {len(imported)} evidence entries into {store_file.name} "
+          f"(original kept in {backup_file.name})")
+
+def scan_evidence_layout(evidence_file):
+    """Find the registry markers and the Last Updated date in EVIDENCE_LOG.md
+
+    Returns byte offsets: where new entries are inserted (just after the
+    begin marker), where the end marker is, and the [offset, width] of the
+    date, or None if the markers are missing.
+    """
+    content = evidence_file.read_bytes()
+    begin = content.find(EVIDENCE_BEGIN_MARKER.encode() + b"\n")
+    end = content.find(EVIDENCE_END_MARKER.encode(), begin)
+    if begin == -1 or end == -1:
+        return None
+    last_updated = re.compile(rb"^" + re.escape(LAST_UPDATED_PREFIX) + rb"([^\n]*)",
+                              re.MULTILINE).search(content, 0, begin)
+    return {
+        "insert_offset": begin + len(EVIDENCE_BEGIN_MARKER) + 1,
+        "end_offset": end,
+        "last_updated": [last_updated.start(1), last_updated.end(1) - last_updated.start(1)]
+                        if last_updated else None
+    }
+
+def render_evidence_log(force=False):
+    """Render the evidence store into the EVIDENCE_LOG.md registry
+
+    Only renders once EVIDENCE_RENDER_BATCH entries are pending, unless
+    forced. Just the entries appended since the last render are read and
+    spliced in after the begin marker; the whole registry is rendered again
+    only when the render state is missing or the store was replaced.
+    Returns True if the Markdown was updated.
+    """
+    state_dir = get_state_dir()
+    evidence_file = state_dir / "EVIDENCE_LOG.md"
+    store_file = state_dir / EVIDENCE_STORE_NAME
+    render_state_file = state_dir / EVIDENCE_RENDER_STATE_NAME
+    if not store_file.exists() or not evidence_file.exists():
+        return False
+
+    try:
+        render_state = json.loads(render_state_file.read_text(encoding='utf-8'))
+        rendered_offset, rendered = render_state['offset'], render_state['entries']
+    except (OSError, ValueError, KeyError):
+        render_state, rendered_offset, rendered = {}, 0, 0
+    store_size = store_file.stat().st_size
+    if rendered_offset > store_size:
+        rendered_offset, rendered = 0, 0
+    entries = read_evidence_entries(store_file, rendered_offset, store_size)
+    if not entries or (not force and len(entries) < EVIDENCE_RENDER_BATCH):
+        return False
+
+    # The recorded layout holds while the Markdown is as the last render left it
+    stat = evidence_file.stat()
+    layout = render_state.get('layout')
+    if not rendered_offset or not layout or layout.get('file') != [stat.st_size, stat.st_mtime_ns]:
+        layout = scan_evidence_layout(evidence_file)
+        if layout is None:
+            print(f"❌ Evidence store markers not found in {evidence_file}")
+            return False
+
+    insert_offset = layout['insert_offset']
+    registry = "".join(format_evidence_entry(entry) for entry in reversed(entries)).encode('utf-8')
+    with open(evidence_file, 'r+b') as f:
+        # A full render drops what was between the markers; otherwise it is kept
+        f.seek(layout['end_offset'] if not rendered_offset else insert_offset)
+        tail = f.read()
+        shift = splice_in_place(f, insert_offset, registry + tail, layout['last_updated'],
+                                entries[-1]['timestamp'][:10].encode())
+
+    stat = evidence_file.stat()
+    kept = layout['end_offset'] - layout['insert_offset'] if rendered_offset else 0
+    layout.update({
+        "file": [stat.st_size, stat.st_mtime_ns],
+        "insert_offset": insert_offset + shift,
+        "end_offset": insert_offset + shift + len(registry) + kept
+    })
+    write_text_atomic(render_state_file, json.dumps({
+        "offset": store_size,
+        "entries": rendered + len(entries),
+        "layout": layout
+    }))
+    print(f"📝 Rendered {len(entries)} evidence entries into EVIDENCE_LOG.md")
+    return True
+
 def update_evidence_log(change_description):
-    """Update the EVIDENCE_LOG.md file with context change evidence"""
-    evidence_file = STATE_DIR / "EVIDENCE_LOG.md"
+    """Record context change evidence in the evidence store"""
+    descriptions = as_descriptions(change_description)
+    state_dir = get_state_dir()
+    evidence_file = state_dir / "EVIDENCE_LOG.md"
+    store_file = state_dir / EVIDENCE_STORE_NAME
     timestamp = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC")
     
     if not evidence_file.exists():
@@ -193,138 +593,661 @@ def update_evidence_log(change_description):
         return False
     
     try:
-        content = evidence_file.read_text(encoding='utf-8')
-        
-        # Find the Evidence Registry section
-        lines = content.split('\n')
-        new_lines = []
-        registry_found = False
+        imported = not store_file.exists()
+        if imported:
+            import_evidence_log(evidence_file, store_file)
         
-        for i, line in enumerate(lines):
-            if "## Evidence Registry" in line:
-                registry_found = True
-                new_lines.append(line)
-                new_lines.append("")
-                # Add new evidence entry
-                new_lines.append(f"### {datetime.now(timezone.utc).strftime('%Y-%m-%d')} - Context Update Evidence")
-                new_lines.append("")
-                new_lines.append("#### Project State Update")
-                new_lines.append(f"- **Artifact**: Context Update - {change_description}")
-                new_lines.append("- **Type**: State Management")
-                new_lines.append(f"- **Timestamp**: {timestamp}")
-                new_lines.append(f"- **Location**: `{(STATE_DIR / 'CURRENT_STATE.md').relative_to(PROJECT_ROOT)}`")
-                new_lines.append("- **Validation**: Automated context persistence")
-                new_lines.append("- **Status**: ✅ LOGGED")
-                new_lines.append("")
-                continue
-            elif registry_found and line.startswith("### ") and "Context Update Evidence" not in line:
-                # This is an existing entry - add our new entry before it
-                new_lines.append(f"### {datetime.now(timezone.utc).strftime('%Y-%m-%d')} - Context Update Evidence")
-                new_lines.append("")
-                new_lines.append("#### Project State Update") 
-                new_lines.append(f"- **Artifact**: Context Update - {change_description}")
-                new_lines.append("- **Type**: State Management")
-                new_lines.append(f"- **Timestamp**: {timestamp}")
-                new_lines.append(f"- **Location**: `{(STATE_DIR / 'CURRENT_STATE.md').relative_to(PROJECT_ROOT)}`")
-                new_lines.append("- **Validation**: Automated context persistence")
-                new_lines.append("- **Status**: ✅ LOGGED")
-                new_lines.append("")
-                new_lines.append(line)
-                continue
-                
-            new_lines.append(line)
+        append_evidence_entries(store_file, [make_evidence_entry(description, timestamp)
+                                             for description in descriptions])
+        print(f"✅ Logged context change evidence in {EVIDENCE_STORE_NAME}")
         
-        # Update the "Last Updated" timestamp at the top
-        for i, line in enumerate(new_lines):
-            if line.startswith("**Last Updated**:"):
-                new_lines[i] = f"**Last Updated**: {datetime.now(timezone.utc).strftime('%Y-%m-%d')}"
-                break
-        
-        # Write updated content
-        evidence_file.write_text('\n'.join(new_lines), encoding='utf-8')
-        print(f"✅ Updated EVIDENCE_LOG.md with context change evidence")
+        # Show the imported entries right away instead of waiting for a batch
+        render_evidence_log(force=imported)
         return True
         
     except Exception as e:
         print(f"❌ Failed to update evidence log: {e}")
         return False
 
+# Snapshots are kept in a content-addressed pack: snapshots.pack holds
+# zlib-compressed objects (full keyframes or deltas against a keyframe) and
+# snapshots.idx.jsonl has one line per snapshot for lookup by time and commit.
+# snapshots.head.json records the latest keyframe, so adding a snapshot only
+# reads the index lines written since that keyframe
+SNAPSHOT_PACK_NAME = "snapshots.pack"
+SNAPSHOT_INDEX_NAME = "snapshots.idx.jsonl"
+SNAPSHOT_HEAD_NAME = "snapshots.head.json"
+SNAPSHOT_KEYFRAME_INTERVAL = 50
+
+def snapshot_hash(content):
+    """Content address of a snapshot, ignoring when it was taken"""
+    canonical = json.dumps(content, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+def snapshot_delta(base, content):
+    """Describe content as changes to base: keys set or removed, by path"""
+    delta = {"set": [], "unset": []}
+    
+    def diff(path, old, new):
+        for key in sorted(old.keys() - new.keys()):
+            delta["unset"].append(path + [key])
+        for key, value in new.items():
+            if isinstance(old.get(key), dict) and isinstance(value, dict):
+                diff(path + [key], old[key], value)
+            elif key not in old or old[key] != value:
+                delta["set"].append([path + [key], value])
+    
+    diff([], base, content)
+    return delta
+
+def apply_snapshot_delta(base, delta):
+    """Rebuild snapshot content from a keyframe and a delta"""
+    content = json.loads(json.dumps(base))
+    for path in delta["unset"]:
+        parent = content
+        for key in path[:-1]:
+            parent = parent[key]
+        del parent[path[-1]]
+    for path, value in delta["set"]:
+        parent = content
+        for key in path[:-1]:
+            parent = parent.setdefault(key, {})
+        parent[path[-1]] = value
+    return content
+
+def load_snapshot_index(snapshot_dir):
+    """Read the snapshot history, oldest first"""
+    try:
+        with open(snapshot_dir / SNAPSHOT_INDEX_NAME, 'r', encoding='utf-8') as f:
+            return [json.loads(line) for line in f if line.strip()]
+    except FileNotFoundError:
+        return []
+
+def read_snapshot_object(snapshot_dir, entry):
+    """Read one pack object at the location recorded in an index entry"""
+    with open(snapshot_dir / SNAPSHOT_PACK_NAME, 'rb') as f:
+        f.seek(entry["offset"])
+        return json.loads(zlib.decompress(f.read(entry["length"])))
+
+def rebuild_snapshot(snapshot_dir, entry, history=None):
+    """Rebuild the full snapshot for an index entry"""
+    record = read_snapshot_object(snapshot_dir, entry)
+    if "delta" in record and "base_offset" in entry:
+        keyframe = {"offset": entry["base_offset"], "length": entry["base_length"]}
+        content = apply_snapshot_delta(read_snapshot_object(snapshot_dir, keyframe)["content"],
+                                       record["delta"])
+    elif "delta" in record:
+        # Written before entries recorded where their keyframe is
+        history = history if history is not None else load_snapshot_index(snapshot_dir)
+        keyframe = next(e for e in history if e["hash"] == entry["base"] and e["base"] is None)
+        content = apply_snapshot_delta(read_snapshot_object(snapshot_dir, keyframe)["content"],
+                                       record["delta"])
+    else:
+        content = record["content"]
+    return {"timestamp": entry["timestamp"], **content}
+
+def load_snapshot_head(snapshot_dir):
+    """Get the latest keyframe, where its index line starts, the deltas on it
+    and how many snapshots the index holds
+
+    The head is trusted while the index is the size it recorded; otherwise
+    (first use, or an index written by an older version) it is rebuilt with
+    one pass over the index.
+    """
+    index_file = snapshot_dir / SNAPSHOT_INDEX_NAME
+    index_size = index_file.stat().st_size if index_file.exists() else 0
+    try:
+        head = json.loads((snapshot_dir / SNAPSHOT_HEAD_NAME).read_text(encoding='utf-8'))
+        if head["index_size"] == index_size and "count" in head:
+            return head
+    except (OSError, ValueError, KeyError):
+        pass
+
+    head = {"keyframe": None, "keyframe_line": 0, "since_keyframe": 0, "index_size": index_size,
+            "count": 0}
+    if index_size:
+        with open(index_file, 'rb') as f:
+            line_start = 0
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    head["count"] += 1
+                    if entry["base"] is None and entry["stored"] != "duplicate":
+                        head.update(keyframe=entry, keyframe_line=line_start, since_keyframe=0)
+                    elif head["keyframe"] and entry["base"] == head["keyframe"]["hash"]:
+                        head["since_keyframe"] += 1
+                line_start += len(line)
+    return head
+
+def store_snapshot(snapshot_dir, snapshot):
+    """Add a snapshot to the pack; returns its index entry
+
+    A snapshot whose content matches the latest keyframe or a snapshot
+    stored since then only gets an index line. Otherwise it is stored as a
+    delta against the latest keyframe, or as a new keyframe every
+    SNAPSHOT_KEYFRAME_INTERVAL snapshots or when the delta would not be much
+    smaller than the snapshot itself. Delta entries record where their
+    keyframe is, so rebuilding one needs no index lookup. Ids end in the
+    snapshot's sequence number, so snapshots taken in the same second
+    (a --batch) stay apart.
+    """
+    head = load_snapshot_head(snapshot_dir)
+    index_file = snapshot_dir / SNAPSHOT_INDEX_NAME
+    timestamp = snapshot["timestamp"]
+    content = {k: v for k, v in snapshot.items() if k != "timestamp"}
+    digest = snapshot_hash(content)
+    entry = {
+        "id": f"{datetime.fromisoformat(timestamp).strftime('%Y%m%d-%H%M%S')}-{head['count'] + 1}",
+        "timestamp": timestamp,
+        "commit": content.get("git_info", {}).get("commit", "unknown"),
+        "branch": content.get("git_info", {}).get("branch", "unknown"),
+        "hash": digest
+    }
+
+    keyframe = head["keyframe"]
+    existing = None
+    if keyframe is not None:
+        with open(index_file, 'rb') as f:
+            f.seek(head["keyframe_line"])
+            recent = [json.loads(line) for line in f if line.strip()]
+        existing = next((e for e in reversed(recent) if e["hash"] == digest), None)
+    if existing is not None:
+        entry.update({k: existing[k] for k in ("offset", "length", "base", "base_offset", "base_length")
+                      if k in existing}, stored="duplicate")
+    else:
+        record = {"content": content}
+        if keyframe is not None:
+            delta = snapshot_delta(read_snapshot_object(snapshot_dir, keyframe)["content"], content)
+            if (head["since_keyframe"] < SNAPSHOT_KEYFRAME_INTERVAL and
+                    len(json.dumps(delta)) * 2 < len(json.dumps(content))):
+                record = {"delta": delta}
+        data = zlib.compress(json.dumps(record, ensure_ascii=False).encode('utf-8'))
+        with open(snapshot_dir / SNAPSHOT_PACK_NAME, 'ab') as f:
+            offset = f.tell()
+            f.write(data)
+        entry.update(offset=offset, length=len(data), base=None, stored="keyframe")
+        if "delta" in record:
+            entry.update(base=keyframe["hash"], base_offset=keyframe["offset"],
+                         base_length=keyframe["length"], stored="delta")
+
+    line = (json.dumps(entry) + "\n").encode('utf-8')
+    with open(index_file, 'ab') as f:
+        line_start = f.tell()
+        f.write(line)
+    if entry["stored"] == "keyframe":
+        head.update(keyframe=entry, keyframe_line=line_start, since_keyframe=0)
+    elif keyframe is not None and entry["base"] == keyframe["hash"]:
+        head["since_keyframe"] += 1
+    head["index_size"] = line_start + len(line)
+    head["count"] += 1
+    write_text_atomic(snapshot_dir / SNAPSHOT_HEAD_NAME, json.dumps(head))
+    return entry
+
+def import_loose_snapshots(snapshot_dir):
+    """Add existing context-*.json snapshot files to a new pack, oldest first
+
+    Each file is removed once its snapshot is in the pack; --snapshots show
+    rebuilds it from there.
+    """
+    imported = 0
+    for snapshot_file in sorted(snapshot_dir.glob("context-*.json")):
+        try:
+            snapshot = json.loads(snapshot_file.read_text(encoding='utf-8'))
+            store_snapshot(snapshot_dir, snapshot)
+        except (ValueError, KeyError, TypeError) as e:
+            print(f"⚠️ Skipped unreadable snapshot {snapshot_file.name}: {e}")
+            continue
+        snapshot_file.unlink()
+        imported += 1
+    if imported:
+        print(f"📥 Imported {imported} existing snapshots into {SNAPSHOT_PACK_NAME}")
+
+def find_snapshots(history, ref=None):
+    """Select index entries whose id, commit or content hash starts with ref
+
+    An exact id match is the only match.
+    """
+    if not ref:
+        return history
+    exact = [e for e in history if e["id"] == ref]
+    if exact:
+        return exact
+    return [e for e in history
+            if e["id"].startswith(ref) or e["timestamp"].startswith(ref)
+            or e["commit"].startswith(ref) or e["hash"].startswith(ref)]
+
 def create_context_snapshot(change_description):
-    """Create a timestamped context snapshot for audit trail"""
-    evidence_context_dir = EVIDENCE_DIR / "context-snapshots"
+    """Create a timestamped context snapshot for audit trail
+
+    A batch of changes is covered by a single snapshot.
+    """
+    descriptions = as_descriptions(change_description)
+    evidence_context_dir = get_evidence_dir() / "context-snapshots"
     evidence_context_dir.mkdir(exist_ok=True)
     
     timestamp = datetime.now(timezone.utc)
-    snapshot_file = evidence_context_dir / f"context-{timestamp.strftime('%Y%m%d-%H%M%S')}.json"
     
     snapshot = {
         "timestamp": timestamp.isoformat(),
-        "change_description": change_description,
+        "change_description": "; ".join(descriptions),
         "git_info": get_git_info(),
         "project_state": {
             "current_phase": "G0 (Strategy & Risk Scoping)",  # This would be dynamic
             "active_tasks": [],  # This would be populated from actual task tracking
-            "recent_changes": change_description
+            "recent_changes": descriptions[0] if len(descriptions) == 1 else descriptions
         }
     }
     
     try:
-        with open(snapshot_file, 'w', encoding='utf-8') as f:
-            json.dump(snapshot, f, indent=2, ensure_ascii=False)
+        if not (evidence_context_dir / SNAPSHOT_INDEX_NAME).exists():
+            import_loose_snapshots(evidence_context_dir)
         
-        print(f"📸 Context snapshot created: {snapshot_file.name}")
+        entry = store_snapshot(evidence_context_dir, snapshot)
+        print(f"📸 Context snapshot {entry['id']} stored ({entry['stored']}, {entry['hash'][:12]})")
         return True
         
     except Exception as e:
         print(f"❌ Failed to create context snapshot: {e}")
         return False
 
+def snapshot_command(args):
+    """List snapshot history, or print one rebuilt snapshot as JSON"""
+    snapshot_dir = get_evidence_dir() / "context-snapshots"
+    history = load_snapshot_index(snapshot_dir)
+    if args and args[0] == 'show':
+        matches = find_snapshots(history, args[1] if len(args) > 1 else None)
+        if not matches:
+            print(f"❌ No snapshot matches: {' '.join(args[1:])}")
+            return False
+        print(json.dumps(rebuild_snapshot(snapshot_dir, matches[-1], history), indent=2, ensure_ascii=False))
+        return True
+    
+    for entry in find_snapshots(history, args[0] if args else None):
+        print(f"{entry['id']}  {entry['commit'][:10]:<10}  {entry['branch']:<20}  "
+              f"{entry['hash'][:12]}  {entry['stored']}")
+    return True
+
+# Git metadata is read straight from the .git directory; the git binary is
+# only run for layouts this reader does not handle (reftable, GIT_DIR, ...)
+GIT_SYMREF_DEPTH = 5
+
+def find_git_directories(start):
+    """Locate (work tree, git dir, common dir) above start, following .git files
+
+    Linked worktrees and submodules have a .git file pointing at their git
+    dir, which names the shared repository in its commondir file. Raises
+    ValueError for a .git file this reader does not understand.
+    """
+    for path in [start] + list(start.parents):
+        dot_git = path / '.git'
+        if dot_git.is_dir():
+            git_dir = dot_git
+        elif dot_git.is_file():
+            content = dot_git.read_text(encoding='utf-8').strip()
+            if not content.startswith('gitdir:'):
+                raise ValueError(f"unrecognised .git file: {dot_git}")
+            git_dir = (path / content[len('gitdir:'):].strip()).resolve()
+        else:
+            continue
+        common_dir = git_dir
+        commondir_file = git_dir / 'commondir'
+        if commondir_file.is_file():
+            common_dir = (git_dir / commondir_file.read_text(encoding='utf-8').strip()).resolve()
+        return path, git_dir, common_dir
+    return None
+
+def read_packed_ref(common_dir, ref):
+    """Look a ref up in packed-refs"""
+    try:
+        with open(common_dir / 'packed-refs', 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.startswith(('#', '^')):
+                    continue
+                parts = line.split()
+                if len(parts) == 2 and parts[1] == ref:
+                    return parts[0]
+    except FileNotFoundError:
+        pass
+    return None
+
+def resolve_git_ref(git_dir, common_dir, ref):
+    """Resolve a ref to a commit id through symbolic refs, loose refs and packed-refs"""
+    for _ in range(GIT_SYMREF_DEPTH):
+        # HEAD and other per-worktree refs live in the worktree's git dir
+        per_worktree = ref == 'HEAD' or ref.startswith(('refs/bisect/', 'refs/worktree/', 'refs/rewritten/'))
+        ref_dir = git_dir if per_worktree else common_dir
+        try:
+            value = (ref_dir / ref).read_text(encoding='utf-8').strip()
+        except (FileNotFoundError, IsADirectoryError):
+            return read_packed_ref(common_dir, ref)
+        if not value.startswith('ref:'):
+            return value
+        ref = value[len('ref:'):].strip()
+    return None
+
+def index_is_dirty(work_tree, git_dir, hash_size):
+    """Compare tracked files' size and mtime with the index
+
+    Returns True if any tracked file looks modified or deleted, or is
+    unmerged. Changes already staged are not detected (that would need the
+    HEAD tree). Like git's own stat check it does not read file contents, so
+    a file touched without changes counts as dirty; files modified in the
+    same second the index was written are assumed dirty too. Untracked
+    files are not considered. Returns None if the index can't be read.
+    """
+    index_file = git_dir / 'index'
+    try:
+        data = index_file.read_bytes()
+        index_mtime_ns = index_file.stat().st_mtime_ns
+    except FileNotFoundError:
+        return False
+    if data[:4] != b'DIRC':
+        return None
+    version, count = struct.unpack('>II', data[4:12])
+    if version not in (2, 3, 4):
+        return None
+
+    offset = 12
+    path = b''
+    for _ in range(count):
+        entry_start = offset
+        (_, _, mtime_s, mtime_ns, _, _, mode, _, _, size) = struct.unpack('>10I', data[offset:offset + 40])
+        offset += 40 + hash_size
+        flags, = struct.unpack('>H', data[offset:offset + 2])
+        offset += 2
+        extended = 0
+        if flags & 0x4000:
+            extended, = struct.unpack('>H', data[offset:offset + 2])
+            offset += 2
+        if version == 4:
+            # Path is stored as a prefix length to strip from the previous path
+            byte = data[offset]
+            offset += 1
+            strip = byte & 0x7f
+            while byte & 0x80:
+                byte = data[offset]
+                offset += 1
+                strip = ((strip + 1) << 7) | (byte & 0x7f)
+            end = data.index(b'\0', offset)
+            path = path[:len(path) - strip] + data[offset:end]
+            offset = end + 1
+        else:
+            end = data.index(b'\0', offset)
+            path = data[offset:end]
+            # Entries are NUL-padded to a multiple of 8 bytes
+            offset = entry_start + ((end - entry_start) // 8 + 1) * 8
+
+        if (flags >> 12) & 0x3:
+            return True  # unmerged
+        if extended & 0x4000 or (mode >> 12) == 0o16:
+            continue  # skip-worktree entries and submodules
+        if extended & 0x2000:
+            return True  # intent-to-add
+        try:
+            st = os.lstat(work_tree / os.fsdecode(path))
+        except FileNotFoundError:
+            return True
+        if st.st_size & 0xffffffff != size or int(st.st_mtime) & 0xffffffff != mtime_s:
+            return True
+        if mtime_ns and st.st_mtime_ns % 1_000_000_000 != mtime_ns:
+            return True
+        if st.st_mtime_ns >= index_mtime_ns:
+            return True  # racily clean: changed after the index was written
+    return False
+
+def read_git_info(project_root):
+    """Read commit, branch and a dirty flag from the .git directory
+
+    Returns None when the repository uses a layout that needs git itself.
+    Outside a repository commit and branch are "unknown".
+    """
+    if 'GIT_DIR' in os.environ or 'GIT_WORK_TREE' in os.environ:
+        return None
+    dirs = find_git_directories(project_root)
+    if dirs is None:
+        return {"commit": "unknown", "branch": "unknown", "dirty": None}
+    work_tree, git_dir, common_dir = dirs
+    try:
+        config = (common_dir / 'config').read_text(encoding='utf-8').lower()
+    except FileNotFoundError:
+        config = ''
+    if 'refstorage' in config or (common_dir / 'reftable').exists():
+        return None
+    hash_size = 32 if re.search(r'objectformat\s*=\s*sha256', config) else 20
+
+    head = (git_dir / 'HEAD').read_text(encoding='utf-8').strip()
+    # Like `git branch --show-current`, a detached HEAD has no branch name
+    branch = ''
+    if head.startswith('ref:'):
+        branch = head[len('ref:'):].strip()
+        branch = branch[len('refs/heads/'):] if branch.startswith('refs/heads/') else branch
+    commit = resolve_git_ref(git_dir, common_dir, 'HEAD')
+    return {
+        "commit": commit or "unknown",
+        "branch": branch,
+        "dirty": index_is_dirty(work_tree, git_dir, hash_size)
+    }
+
 def get_git_info():
     """Get current git information for context"""
+    try:
+        info = read_git_info(get_project_root())
+        if info is not None:
+            return info
+    except (OSError, ValueError, struct.error):
+        pass
+    
     try:
         import subprocess
         
         # Get current commit hash
         commit = subprocess.run(['git', 'rev-parse', 'HEAD'], 
-                              capture_output=True, text=True, cwd=PROJECT_ROOT)
+                              capture_output=True, text=True, cwd=get_project_root())
         
         # Get current branch
         branch = subprocess.run(['git', 'branch', '--show-current'], 
-                              capture_output=True, text=True, cwd=PROJECT_ROOT)
+                              capture_output=True, text=True, cwd=get_project_root())
         
+        # Dirty state only comes from the direct reader; checking it here
+        # would cost a third git process on every update
         return {
             "commit": commit.stdout.strip() if commit.returncode == 0 else "unknown",
-            "branch": branch.stdout.strip() if branch.returncode == 0 else "unknown"
+            "branch": branch.stdout.strip() if branch.returncode == 0 else "unknown",
+            "dirty": None
         }
     except Exception:
-        return {"commit": "unknown", "branch": "unknown"}
+        return {"commit": "unknown", "branch": "unknown", "dirty": None}
+
+# Every update times its phases as spans with the files they updated and
+# those files' sizes. The last update's spans are kept in the state directory;
+# --trace-file / --metrics-file (or UMCA_TRACE_FILE / UMCA_METRICS_FILE) also
+# write them as Chrome trace events and as OpenMetrics text for the
+# node-exporter textfile collector.
+# This script stays standalone (stdlib only, no .trae checkout needed), so
+# chrome_trace and openmetrics mirror .trae/scripts/context_trace.py rather
+# than import it; tests/test_umca_trace.py checks both write the same format
+PERFORMANCE_NAME = ".update_performance.json"
+METRIC_PREFIX = "umca_context"
+TRACE_PROCESS_NAME = "umca update_context"
+TRACE_CATEGORY = "umca"
+
+def start_performance():
+    """Start collecting spans for one update"""
+    return {"started_at": time.time(), "origin": time.perf_counter(), "spans": []}
+
+@contextlib.contextmanager
+def timed_phase(run, name):
+    """Time the enclosed block as a span; the caller may set span["files"]"""
+    span = {"name": name, "thread": threading.current_thread().name}
+    started = time.perf_counter()
+    try:
+        yield span
+    finally:
+        span["start"] = round(started - run["origin"], 6)
+        span["seconds"] = round(time.perf_counter() - started, 6)
+        files = span.pop("files", None)
+        if files is not None:
+            sizes = [path.stat().st_size for path in files if path.exists()]
+            span["files"] = len(sizes)
+            span["bytes"] = sum(sizes)
+        run["spans"].append(span)
+
+def performance_section(run):
+    """The recorded performance of an update"""
+    return {
+        "started_at": run["started_at"],
+        "stages": {span["name"]: round(span["seconds"], 3) for span in run["spans"]},
+        "spans": sorted(run["spans"], key=lambda span: span["start"]),
+        "update_seconds": round(time.perf_counter() - run["origin"], 3)
+    }
+
+def chrome_trace(performance):
+    """Performance spans as Chrome trace-event JSON (chrome://tracing, Perfetto)"""
+    origin = performance["started_at"] * 1e6
+    threads = {}
+    events = [{"name": "process_name", "ph": "M", "pid": 1, "tid": 0,
+               "args": {"name": TRACE_PROCESS_NAME}},
+              {"name": TRACE_PROCESS_NAME, "cat": TRACE_CATEGORY, "ph": "X", "ts": round(origin, 3),
+               "dur": round(performance["update_seconds"] * 1e6, 3), "pid": 1, "tid": 1, "args": {}}]
+    threads[threading.main_thread().name] = 1
+    for span in performance["spans"]:
+        tid = threads.setdefault(span["thread"], len(threads) + 1)
+        events.append({"name": span["name"], "cat": TRACE_CATEGORY, "ph": "X",
+                       "ts": round(origin + span["start"] * 1e6, 3),
+                       "dur": round(span["seconds"] * 1e6, 3), "pid": 1, "tid": tid,
+                       "args": {key: span[key] for key in ("files", "bytes") if key in span}})
+    events += [{"name": "thread_name", "ph": "M", "pid": 1, "tid": tid, "args": {"name": name}}
+               for name, tid in threads.items()]
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+def label_value(value):
+    """Escape an OpenMetrics label value"""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def openmetrics(performance, project):
+    """Performance spans as OpenMetrics text, one gauge family per measure"""
+    project = label_value(project)
+    lines = []
+    for suffix, unit, key, help_text in (
+            ("phase_duration_seconds", "seconds", "seconds", "Duration of each context update phase"),
+            ("phase_files", None, "files", "Files handled by each context update phase"),
+            ("phase_bytes", "bytes", "bytes", "Bytes read or written by each context update phase")):
+        samples = [span for span in performance["spans"] if key in span]
+        if not samples:
+            continue
+        name = f"{METRIC_PREFIX}_{suffix}"
+        lines.append(f"# TYPE {name} gauge")
+        if unit:
+            lines.append(f"# UNIT {name} {unit}")
+        lines.append(f"# HELP {name} {help_text}.")
+        lines += [f'{name}{{project="{project}",phase="{label_value(span["name"])}"}} {span[key]}'
+                  for span in samples]
+    for suffix, key, help_text in (
+            ("update_duration_seconds", "update_seconds", "Duration of the last context update"),
+            ("last_update_timestamp_seconds", "started_at", "When the last context update started")):
+        name = f"{METRIC_PREFIX}_{suffix}"
+        lines += [f"# TYPE {name} gauge", f"# UNIT {name} seconds", f"# HELP {name} {help_text}.",
+                  f'{name}{{project="{project}"}} {performance[key]}']
+    lines.append("# EOF")
+    return "\n".join(lines) + "\n"
+
+def record_performance(run, trace_file=None, metrics_file=None):
+    """Keep an update's spans in the state directory and write the requested exports"""
+    performance = performance_section(run)
+    try:
+        write_text_atomic(get_state_dir() / PERFORMANCE_NAME, json.dumps(performance, indent=2))
+        if trace_file:
+            Path(trace_file).parent.mkdir(parents=True, exist_ok=True)
+            write_text_atomic(Path(trace_file), json.dumps(chrome_trace(performance)))
+        if metrics_file:
+            # Written atomically: the textfile collector may read it at any time
+            Path(metrics_file).parent.mkdir(parents=True, exist_ok=True)
+            write_text_atomic(Path(metrics_file), openmetrics(performance, get_project_root().name))
+    except OSError as e:
+        print(f"⚠️ Could not record performance: {e}")
+    return performance
+
+def split_export_options(args):
+    """Take --trace-file/--metrics-file PATH out of the arguments"""
+    options = {"--trace-file": os.environ.get('UMCA_TRACE_FILE'),
+               "--metrics-file": os.environ.get('UMCA_METRICS_FILE')}
+    rest = []
+    i = 0
+    while i < len(args):
+        if args[i] in options and i + 1 < len(args):
+            options[args[i]] = args[i + 1]
+            i += 2
+        else:
+            rest.append(args[i])
+            i += 1
+    return rest, options["--trace-file"], options["--metrics-file"]
 
 def main():
     """Main function to handle context updates"""
-    if len(sys.argv) < 2:
+    args, trace_file, metrics_file = split_export_options(sys.argv[1:])
+    if not args:
         print("❌ Usage: python3 update_context.py \"description of changes\"")
+        print("          python3 update_context.py --batch [file|-]")
+        print("          python3 update_context.py --render-evidence")
+        print("          python3 update_context.py --snapshots [show] [id|commit|hash prefix]")
+        print("          (updates also take --trace-file PATH and --metrics-file PATH)")
         print("   Example: python3 update_context.py \"Completed RA-MarketAnalysis task\"")
         sys.exit(1)
     
-    change_description = sys.argv[1]
+    if args[0] == '--snapshots':
+        # --snapshots [REF] lists history; --snapshots show [REF] rebuilds one
+        sys.exit(0 if snapshot_command(args[1:]) else 1)
     
-    print(f"🔄 Updating context: {change_description}")
+    if args[0] == '--render-evidence':
+        # Bring EVIDENCE_LOG.md up to date with the evidence store now
+        render_evidence_log(force=True)
+        return
+    
+    if args[0] == '--batch':
+        # One description per line from a file, or stdin when none is given
+        source = args[1] if len(args) > 1 and args[1] != '-' else None
+        if source:
+            lines = Path(source).read_text(encoding='utf-8').splitlines()
+        else:
+            lines = sys.stdin.read().splitlines()
+        change_description = [line.strip() for line in lines if line.strip()]
+        if not change_description:
+            print("❌ No change descriptions given for --batch")
+            sys.exit(1)
+        print(f"🔄 Updating context with {len(change_description)} changes")
+    else:
+        change_description = args[0]
+        print(f"🔄 Updating context: {change_description}")
     
     # Directories are already created by auto-detection functions
     
     success = True
+    run = start_performance()
+    
+    with timed_phase(run, "resolve_paths"):
+        state_dir = get_state_dir()
+        snapshot_dir = get_evidence_dir() / "context-snapshots"
     
     # Update state file
-    if not update_current_state(change_description):
-        success = False
+    with timed_phase(run, "current_state") as span:
+        if not update_current_state(change_description):
+            success = False
+        span["files"] = [state_dir / "CURRENT_STATE.md", state_dir / STATE_INDEX_NAME]
     
     # Update evidence log
-    if not update_evidence_log(change_description):
-        success = False
+    with timed_phase(run, "evidence_log") as span:
+        if not update_evidence_log(change_description):
+            success = False
+        span["files"] = [state_dir / EVIDENCE_STORE_NAME, state_dir / "EVIDENCE_LOG.md"]
     
     # Create context snapshot
-    if not create_context_snapshot(change_description):
-        success = False
+    with timed_phase(run, "snapshot") as span:
+        if not create_context_snapshot(change_description):
+            success = False
+        span["files"] = [snapshot_dir / SNAPSHOT_PACK_NAME, snapshot_dir / SNAPSHOT_INDEX_NAME]
+    
+    performance = record_performance(run, trace_file, metrics_file)
+    print("⏱️ " + ", ".join(f"{name} {seconds}s" for name, seconds in performance["stages"].items()))
     
     if success:
         print("✅ Context update completed successfully")